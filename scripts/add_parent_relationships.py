@@ -4,14 +4,14 @@ Add relationships for parent structures to lateralized targets.
 E.g., Masseter → Trigeminal nerve (L) and Masseter → Trigeminal nerve (R)
 """
 
-import yaml
+import yaml_fast
 from pathlib import Path
 
 def load_structures():
     structures = {}
     for yaml_file in Path('structures').glob('*.yaml'):
         with open(yaml_file) as f:
-            data = yaml.safe_load(f)
+            data = yaml_fast.safe_load(f)
             if data and 'structures' in data:
                 for s in data['structures']:
                     structures[s['id']] = s
@@ -4,39 +4,14 @@ AI Context Builder - Provides rich hierarchical context for reasoning.
 """
 
 from pathlib import Path
-from typing import Dict, List, Set, Optional
-import yaml
+from typing import Dict, List, Optional
 
-
-def load_yaml_file(filepath: Path) -> Optional[dict]:
-    """Load a YAML file."""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
-    except Exception as e:
-        print(f"Error loading {filepath}: {e}")
-        return None
+from ontology import HierarchyIndex, load_ontology
 
 
 def load_all_structures() -> Dict[str, dict]:
     """Load all structures from all YAML files."""
-    structures = {}
-    structures_dir = Path('structures')
-    
-    if not structures_dir.exists():
-        return structures
-    
-    for yaml_file in structures_dir.glob('*.yaml'):
-        data = load_yaml_file(yaml_file)
-        if data and 'structures' in data:
-            for struct in data['structures']:
-                if 'id' in struct:
-                    structures[struct['id']] = {
-                        **struct,
-                        '_source_file': yaml_file.name
-                    }
-    
-    return structures
+    return dict(load_ontology(Path('.')).structures)
 
 
 def classify_structure_type(name: str, definition: str = '') -> str:
@@ -77,7 +52,8 @@ def build_hierarchy_context(structures: Dict[str, dict]) -> dict:
         },
         'file_map': {},  # id -> source_file
         'name_to_id_map': {},  # name.lower() -> id
-        'depth_map': {}  # id -> depth in tree
+        'depth_map': {},  # id -> depth in tree
+        'hierarchy': HierarchyIndex.from_structures(structures)  # ancestor/descendant queries
     }
     
     # Build basic maps
@@ -116,29 +92,26 @@ def build_hierarchy_context(structures: Dict[str, dict]) -> dict:
         }
     
     # Calculate child counts and depths
+    hierarchy = context['hierarchy']
     for struct_id in structures:
         children = context['parent_child_map'].get(struct_id, [])
         context['structure_metadata'][struct_id]['child_count'] = len(children)
-        context['depth_map'][struct_id] = calculate_depth(struct_id, context['child_parent_map'])
+        context['depth_map'][struct_id] = calculate_depth(struct_id, hierarchy)
     
     return context
 
 
-def calculate_depth(struct_id: str, child_parent_map: Dict[str, str], visited: Set[str] = None) -> int:
-    """Calculate depth of a structure in the hierarchy (0 = root)."""
-    if visited is None:
-        visited = set()
+def calculate_depth(struct_id: str, hierarchy: HierarchyIndex) -> int:
+    """
+    Calculate depth of a structure in the hierarchy (0 = root).
     
-    if struct_id in visited:
+    A parent ID that is not in the ontology still counts as a level, so a
+    structure under a dangling parent has depth 1.
+    """
+    depth = hierarchy.depth(struct_id)
+    if depth is None:
         return 999  # Circular reference
-    
-    visited.add(struct_id)
-    
-    parent_id = child_parent_map.get(struct_id)
-    if parent_id is None:
-        return 0  # Root node
-    
-    return 1 + calculate_depth(parent_id, child_parent_map, visited)
+    return depth + hierarchy.root_offset(struct_id)
 
 
 def get_direct_children(parent_id: str, context: dict) -> List[str]:
@@ -148,20 +121,12 @@ def get_direct_children(parent_id: str, context: dict) -> List[str]:
 
 def get_all_descendants(parent_id: str, context: dict) -> List[str]:
     """Get all descendants (any depth) of a parent structure."""
-    descendants = []
-    direct_children = context['parent_child_map'].get(parent_id, [])
-    
-    for child_id in direct_children:
-        descendants.append(child_id)
-        descendants.extend(get_all_descendants(child_id, context))
-    
-    return descendants
+    return context['hierarchy'].descendants(parent_id)
 
 
 def is_descendant(potential_descendant: str, ancestor: str, context: dict) -> bool:
     """Check if potential_descendant is anywhere under ancestor in tree."""
-    descendants = get_all_descendants(ancestor, context)
-    return potential_descendant in descendants
+    return context['hierarchy'].is_ancestor(ancestor, potential_descendant)
 
 
 def find_structure_id_by_name(name: str, context: dict) -> Optional[str]:
@@ -10,18 +10,9 @@ import sys
 from pathlib import Path
 from typing import Optional, Dict
 
-# Try ruamel for format preservation, fall back to pyyaml
-try:
-    from ruamel.yaml import YAML
-    def get_yaml():
-        y = YAML()
-        y.preserve_quotes = True
-        y.width = 120
-        return y
-    USE_RUAMEL = True
-except ImportError:
-    import yaml
-    USE_RUAMEL = False
+from ruamel.yaml import YAML
+
+from yaml_utils import OntologyWriter
 
 # Import our context builder
 from ai_context import (
@@ -33,26 +24,12 @@ from ai_context import (
 )
 
 
-def load_yaml_file(filepath: Path) -> dict:
-    """Load a YAML file."""
-    if USE_RUAMEL:
-        y = get_yaml()
-        with open(filepath) as f:
-            return y.load(f) or {}
-    else:
-        with open(filepath) as f:
-            return yaml.safe_load(f) or {}
-
-
-def save_yaml_file(filepath: Path, data: dict):
-    """Save data to YAML file."""
-    if USE_RUAMEL:
-        y = get_yaml()
-        with open(filepath, 'w') as f:
-            y.dump(data, f)
-    else:
-        with open(filepath, 'w') as f:
-            yaml.dump(data, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+def get_yaml() -> YAML:
+    """YAML instance matching the layout of the ontology files."""
+    y = YAML()
+    y.preserve_quotes = True
+    y.width = 120
+    return y
 
 
 def determine_target_file(struct_name: str, parent_name: str, definition: str, struct_type: str = None) -> str:
@@ -70,21 +47,13 @@ def determine_target_file(struct_name: str, parent_name: str, definition: str, s
     return file_map.get(struct_type, 'structures/body_regions.yaml')
 
 
-def find_structure_file(struct_id: str) -> Optional[Path]:
-    """Find which YAML file contains a given structure."""
-    structures_dir = Path('structures')
-    
-    for yaml_file in structures_dir.glob('*.yaml'):
-        data = load_yaml_file(yaml_file)
-        if data and 'structures' in data:
-            for struct in data['structures']:
-                if struct.get('id') == struct_id:
-                    return yaml_file
-    
-    return None
+def find_structure_file(struct_id: str, writer: OntologyWriter) -> Optional[Path]:
+    """Find which YAML file contains a given structure (including pending edits)."""
+    found = writer.find_structure(struct_id)
+    return found[0] if found else None
 
 
-def action_create_structure(action: dict, context: dict) -> bool:
+def action_create_structure(action: dict, context: dict, writer: OntologyWriter) -> bool:
     """CREATE action handler."""
     name = action.get('name')
     struct_id = action.get('id')
@@ -112,11 +81,6 @@ def action_create_structure(action: dict, context: dict) -> bool:
         print(f"    ⚠️  File {filepath} not found")
         return False
     
-    # Load and update file
-    data = load_yaml_file(filepath)
-    if 'structures' not in data:
-        data['structures'] = []
-    
     new_struct = {
         'id': struct_id,
         'name': name,
@@ -126,14 +90,13 @@ def action_create_structure(action: dict, context: dict) -> bool:
     if definition:
         new_struct['definition'] = definition
     
-    data['structures'].append(new_struct)
-    save_yaml_file(filepath, data)
+    writer.add_structure(filepath, new_struct)
     
     print(f"    ✓ Created in {filepath.name}")
     return True
 
 
-def action_move_structure(action: dict, context: dict) -> bool:
+def action_move_structure(action: dict, context: dict, writer: OntologyWriter) -> bool:
     """MOVE action handler."""
     struct_name = action.get('structure_name')
     struct_id = action.get('structure_id')
@@ -157,32 +120,19 @@ def action_move_structure(action: dict, context: dict) -> bool:
             return False
     
     # Find which file contains the structure
-    filepath = find_structure_file(struct_id)
-    if not filepath:
-        print(f"    ⚠️  Structure file not found")
-        return False
-    
-    # Load and update
-    data = load_yaml_file(filepath)
-    found = False
-    
-    for struct in data.get('structures', []):
-        if struct.get('id') == struct_id:
-            old_parent = struct.get('parent')
-            struct['parent'] = new_parent_id
-            found = True
-            print(f"    ✓ Moved from {old_parent} to {new_parent_id}")
-            break
-    
+    found = writer.find_structure(struct_id)
     if not found:
-        print(f"    ⚠️  Structure not found in {filepath}")
+        print(f"    ⚠️  Structure file not found")
         return False
     
-    save_yaml_file(filepath, data)
+    filepath, index = found
+    old_parent = writer.document(filepath)['structures'][index].get('parent')
+    writer.update_structure_parent(filepath, struct_id, new_parent_id)
+    print(f"    ✓ Moved from {old_parent} to {new_parent_id}")
     return True
 
 
-def action_delete_structure(action: dict, context: dict) -> bool:
+def action_delete_structure(action: dict, context: dict, writer: OntologyWriter) -> bool:
     """DELETE action handler."""
     struct_name = action.get('structure_name')
     struct_id = action.get('structure_id')
@@ -197,37 +147,26 @@ def action_delete_structure(action: dict, context: dict) -> bool:
             print(f"    ⚠️  Structure '{struct_name}' not found")
             return False
     
-    # Safety check: reload fresh context and ensure no children
-    # (Context may be stale if structures were moved earlier)
-    fresh_structures = load_all_structures()
-    fresh_context = build_hierarchy_context(fresh_structures)
-    children = fresh_context['parent_child_map'].get(struct_id, [])
+    # Safety check: ensure no children, counting moves made earlier in this
+    # batch (the context was built before any action ran)
+    children = writer.children_of(struct_id)
     if children:
         print(f"    ⚠️  Structure has {len(children)} children - cannot delete")
         return False
     
     # Find which file contains the structure
-    filepath = find_structure_file(struct_id)
-    if not filepath:
+    found = writer.find_structure(struct_id)
+    if not found:
         print(f"    ⚠️  Structure file not found")
         return False
     
-    # Load and delete
-    data = load_yaml_file(filepath)
-    structures = data.get('structures', [])
-    
-    for i, struct in enumerate(structures):
-        if struct.get('id') == struct_id:
-            del structures[i]
-            save_yaml_file(filepath, data)
-            print(f"    ✓ Deleted from {filepath.name}")
-            return True
-    
-    print(f"    ⚠️  Structure not found in {filepath}")
-    return False
+    filepath, index = found
+    writer.remove_structure_by_index(filepath, index)
+    print(f"    ✓ Deleted from {filepath.name}")
+    return True
 
 
-def action_update_structure(action: dict, context: dict) -> bool:
+def action_update_structure(action: dict, context: dict, writer: OntologyWriter) -> bool:
     """UPDATE action handler."""
     struct_name = action.get('structure_name')
     struct_id = action.get('structure_id')
@@ -243,31 +182,17 @@ def action_update_structure(action: dict, context: dict) -> bool:
             return False
     
     # Find which file contains the structure
-    filepath = find_structure_file(struct_id)
+    filepath = find_structure_file(struct_id, writer)
     if not filepath:
         print(f"    ⚠️  Structure file not found")
         return False
     
-    # Load and update
-    data = load_yaml_file(filepath)
-    found = False
-    
-    for struct in data.get('structures', []):
-        if struct.get('id') == struct_id:
-            struct.update(changes)
-            found = True
-            print(f"    ✓ Updated: {', '.join(changes.keys())}")
-            break
-    
-    if not found:
-        print(f"    ⚠️  Structure not found in {filepath}")
-        return False
-    
-    save_yaml_file(filepath, data)
+    writer.update_structure(filepath, struct_id, changes)
+    print(f"    ✓ Updated: {', '.join(changes.keys())}")
     return True
 
 
-def action_add_relationship(action: dict, context: dict) -> bool:
+def action_add_relationship(action: dict, context: dict, writer: OntologyWriter) -> bool:
     """ADD RELATIONSHIP action handler."""
     subject_name = action.get('subject_name')
     predicate = action.get('predicate')
@@ -302,19 +227,13 @@ def action_add_relationship(action: dict, context: dict) -> bool:
         print(f"    ⚠️  Object '{object_name}' not found")
         return False
     
-    # Load and add
-    data = load_yaml_file(filepath)
-    if 'relationships' not in data or data['relationships'] is None:
-        data['relationships'] = []
-    
     new_rel = {
         'subject': subject_id,
         'predicate': predicate,
         'object': object_id,
     }
     
-    data['relationships'].append(new_rel)
-    save_yaml_file(filepath, data)
+    writer.add_relationship(filepath, new_rel)
     
     print(f"    ✓ Added to {filepath.name}")
     return True
@@ -334,6 +253,9 @@ def execute_actions_with_context(actions: list, structures: Dict, context: dict)
     success_count = 0
     failure_count = 0
     
+    # Edits accumulate in memory; each touched file is written once at the end
+    writer = OntologyWriter(yaml=get_yaml())
+    
     for i, action in enumerate(actions):
         action_type = action.get('type')
         
@@ -346,7 +268,7 @@ def execute_actions_with_context(actions: list, structures: Dict, context: dict)
             continue
         
         try:
-            success = handler(action, context)
+            success = handler(action, context, writer)
             if success:
                 success_count += 1
             else:
@@ -355,6 +277,10 @@ def execute_actions_with_context(actions: list, structures: Dict, context: dict)
             print(f"  ✗ Error: {e}")
             failure_count += 1
     
+    written = writer.commit()
+    if written:
+        print(f"\n💾 Wrote {len(written)} file(s): {', '.join(p.name for p in written)}")
+    
     return success_count, failure_count
 
 
@@ -17,7 +17,18 @@ except ImportError:
     HAS_GROQ = False
     print("Warning: groq not installed, using mock mode")
 
-import yaml
+from ontology import load_ontology
+from name_index import TrigramIndex
+
+# Semantic name resolution needs numpy (and sentence-transformers for the model)
+try:
+    from semantic_search import find_similar_structures_batch, load_embeddings
+    HAS_SEMANTIC = True
+except ImportError:
+    HAS_SEMANTIC = False
+
+# Minimum embedding similarity to accept a structure for an unmatched name
+SEMANTIC_MATCH_THRESHOLD = 0.8
 
 # Import enhanced prompt if available
 try:
@@ -35,23 +46,12 @@ except ImportError:
 def load_current_structures() -> list[str]:
     """Load ALL current structure names for context."""
     structures = []
-    structures_dir = Path('structures')
-    
-    if not structures_dir.exists():
-        return structures
-    
-    for yaml_file in structures_dir.glob('*.yaml'):
-        try:
-            with open(yaml_file) as f:
-                data = yaml.safe_load(f)
-                if data and 'structures' in data:
-                    for struct in data['structures']:
-                        name = struct.get('name', '')
-                        struct_id = struct.get('id', '')
-                        if name and struct_id:
-                            structures.append(f"{name} ({struct_id})")
-        except Exception:
-            pass
+    
+    for struct in load_ontology(Path('.')).structure_records:
+        name = struct.get('name', '')
+        struct_id = struct.get('id', '')
+        if name and struct_id:
+            structures.append(f"{name} ({struct_id})")
     
     return structures
 
@@ -59,29 +59,32 @@ def load_current_structures() -> list[str]:
 def load_structure_lookup() -> dict[str, str]:
     """Load a name->ID lookup dictionary for all structures."""
     lookup = {}
-    structures_dir = Path('structures')
-    
-    if not structures_dir.exists():
-        return lookup
-    
-    for yaml_file in structures_dir.glob('*.yaml'):
-        try:
-            with open(yaml_file) as f:
-                data = yaml.safe_load(f)
-                if data and 'structures' in data:
-                    for struct in data['structures']:
-                        name = struct.get('name', '')
-                        struct_id = struct.get('id', '')
-                        if name and struct_id:
-                            # Store multiple lookup keys
-                            lookup[name.lower()] = struct_id
-                            lookup[name.lower().replace(' ', '')] = struct_id
-        except Exception:
-            pass
+    
+    for struct in load_ontology(Path('.')).structure_records:
+        name = struct.get('name', '')
+        struct_id = struct.get('id', '')
+        if name and struct_id:
+            # Store multiple lookup keys
+            lookup[name.lower()] = struct_id
+            lookup[name.lower().replace(' ', '')] = struct_id
     
     return lookup
 
 
+# Trigram index of the last lookup passed to find_existing_structure
+_lookup_index: tuple = (None, 0, None)
+
+
+def name_index_for(lookup: dict[str, str]) -> TrigramIndex:
+    """Trigram index over a lookup's keys, built once per lookup dictionary."""
+    global _lookup_index
+    indexed, size, index = _lookup_index
+    if indexed is not lookup or size != len(lookup):
+        index = TrigramIndex.from_lookup(lookup)
+        _lookup_index = (lookup, len(lookup), index)
+    return index
+
+
 def find_existing_structure(name: str, lookup: dict[str, str]) -> str | None:
     """Find an existing structure ID by name (fuzzy match)."""
     name_lower = name.lower()
@@ -94,12 +97,42 @@ def find_existing_structure(name: str, lookup: dict[str, str]) -> str | None:
     if name_lower.replace(' ', '') in lookup:
         return lookup[name_lower.replace(' ', '')]
     
-    # Partial match
-    for key, struct_id in lookup.items():
-        if name_lower in key or key in name_lower:
-            return struct_id
+    # Partial match, best trigram similarity first
+    matches = name_index_for(lookup).partial(name_lower)
+    return matches[0].value if matches else None
+
+
+def resolve_structure_names(names: list[str], lookup: dict[str, str], embeddings_data: dict | None = None) -> dict[str, str | None]:
+    """
+    Resolve many names to structure IDs at once.
+    
+    Exact matches come straight from the lookup. Whatever is left is embedded
+    in a single batch (when embeddings are available) and only names with no
+    close semantic match fall back to partial matching.
+    """
+    resolved = {}
+    pending = []
+    for name in dict.fromkeys(n for n in names if n):
+        name_lower = name.lower()
+        struct_id = lookup.get(name_lower) or lookup.get(name_lower.replace(' ', ''))
+        if struct_id:
+            resolved[name] = struct_id
+        else:
+            pending.append(name)
+    
+    if pending and embeddings_data is None and HAS_SEMANTIC:
+        embeddings_data = load_embeddings()
+    if pending and embeddings_data is not None and embeddings_data.get('matrix') is not None:
+        matches = find_similar_structures_batch(pending, embeddings_data, top_k=1, threshold=SEMANTIC_MATCH_THRESHOLD)
+        for name, best in zip(pending, matches):
+            if best:
+                resolved[name] = best[0]['id']
+    
+    for name in pending:
+        if name not in resolved:
+            resolved[name] = find_existing_structure(name, lookup)
     
-    return None
+    return resolved
 
 
 def find_ambiguous_names(structures: list[str]) -> dict[str, list[str]]:
@@ -123,24 +156,7 @@ def find_ambiguous_names(structures: list[str]) -> dict[str, list[str]]:
 
 def load_existing_relationships() -> list[dict]:
     """Load all existing relationships from YAML files."""
-    relationships = []
-    rel_dir = Path('relationships')
-    
-    if not rel_dir.exists():
-        return relationships
-    
-    for yaml_file in rel_dir.glob('*.yaml'):
-        try:
-            with open(yaml_file) as f:
-                data = yaml.safe_load(f)
-                if data and 'relationships' in data and data['relationships']:
-                    for rel in data['relationships']:
-                        rel['_file'] = yaml_file.name
-                        relationships.append(rel)
-        except Exception:
-            pass
-    
-    return relationships
+    return list(load_ontology(Path('.')).relationships)
 
 
 def check_duplicate_relationship(subject_id: str, predicate: str, object_id: str, existing_rels: list[dict]) -> bool:
@@ -164,29 +180,8 @@ def find_conflicting_relationships(subject_id: str, predicate: str, existing_rel
 
 def get_next_available_id() -> int:
     """Find the next available BAP ID number."""
-    max_id = 21700  # Start from here for AI-generated
-    structures_dir = Path('structures')
-    
-    if not structures_dir.exists():
-        return max_id
-    
-    for yaml_file in structures_dir.glob('*.yaml'):
-        try:
-            with open(yaml_file) as f:
-                data = yaml.safe_load(f)
-                if data and 'structures' in data:
-                    for struct in data['structures']:
-                        struct_id = struct.get('id', '')
-                        if struct_id.startswith('BAP_'):
-                            try:
-                                num = int(struct_id.split('_')[1])
-                                max_id = max(max_id, num)
-                            except:
-                                pass
-        except Exception:
-            pass
-    
-    return max_id + 1
+    # Start from 21700 for AI-generated
+    return load_ontology(Path('.')).max_id_number(default=21700) + 1
 
 
 # ============================================================================
@@ -300,11 +295,19 @@ def validate_and_enrich(parsed: dict) -> dict:
     existing_rels = load_existing_relationships()
     lookup = load_structure_lookup()
     warnings = parsed.get('warnings', [])
+    relationships = parsed.get('relationships', [])
+    
+    # Resolve every name without an ID in one batch
+    names = resolve_structure_names(
+        [rel.get(f'{role}_name', '') for rel in relationships for role in ('subject', 'object')
+         if not rel.get(f'{role}_id')],
+        lookup
+    )
     
     # Check each proposed relationship
-    for rel in parsed.get('relationships', []):
-        subject_id = rel.get('subject_id') or find_existing_structure(rel.get('subject_name', ''), lookup)
-        object_id = rel.get('object_id') or find_existing_structure(rel.get('object_name', ''), lookup)
+    for rel in relationships:
+        subject_id = rel.get('subject_id') or names.get(rel.get('subject_name', ''))
+        object_id = rel.get('object_id') or names.get(rel.get('object_name', ''))
         predicate = rel.get('predicate', '')
         
         if subject_id and object_id and predicate:
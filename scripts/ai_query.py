@@ -15,7 +15,7 @@ try:
 except ImportError:
     HAS_GROQ = False
 
-import yaml
+from ontology import load_ontology
 
 
 def load_ontology_summary() -> dict:
@@ -31,42 +31,32 @@ def load_ontology_summary() -> dict:
         }
     }
     
-    # Load structures
-    structures_dir = Path('structures')
-    if structures_dir.exists():
-        for yaml_file in structures_dir.glob('*.yaml'):
-            with open(yaml_file) as f:
-                data = yaml.safe_load(f)
-                if data and 'structures' in data:
-                    for struct in data['structures']:
-                        summary['structures'].append({
-                            'id': struct.get('id'),
-                            'name': struct.get('name'),
-                            'parent': struct.get('parent'),
-                            'definition': struct.get('definition', '')[:100],
-                        })
-                        summary['stats']['total_structures'] += 1
-                        
-                        # Track by file/type
-                        file_type = yaml_file.stem
-                        summary['stats']['structures_by_type'][file_type] = \
-                            summary['stats']['structures_by_type'].get(file_type, 0) + 1
-    
-    # Load relationships
-    rel_dir = Path('relationships')
-    if rel_dir.exists():
-        for yaml_file in rel_dir.glob('*.yaml'):
-            with open(yaml_file) as f:
-                data = yaml.safe_load(f)
-                if data and 'relationships' in data and data['relationships']:
-                    for rel in data['relationships']:
-                        summary['relationships'].append({
-                            'subject': rel.get('subject'),
-                            'predicate': rel.get('predicate'),
-                            'object': rel.get('object'),
-                            'type': yaml_file.stem,
-                        })
-                        summary['stats']['total_relationships'] += 1
+    onto = load_ontology(Path('.'))
+    
+    # Structures
+    for struct in onto.structure_records:
+        summary['structures'].append({
+            'id': struct.get('id'),
+            'name': struct.get('name'),
+            'parent': struct.get('parent'),
+            'definition': struct.get('definition', '')[:100],
+        })
+        summary['stats']['total_structures'] += 1
+        
+        # Track by file/type
+        file_type = Path(struct['_source_file']).stem
+        summary['stats']['structures_by_type'][file_type] = \
+            summary['stats']['structures_by_type'].get(file_type, 0) + 1
+    
+    # Relationships
+    for rel in onto.relationships:
+        summary['relationships'].append({
+            'subject': rel.get('subject'),
+            'predicate': rel.get('predicate'),
+            'object': rel.get('object'),
+            'type': Path(rel['_source_file']).stem,
+        })
+        summary['stats']['total_relationships'] += 1
     
     # Build ID to name lookup
     id_to_name = {s['id']: s['name'] for s in summary['structures']}
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Approximate nearest-neighbour index for the structure embeddings.
+
+An inverted-file (IVF) index in plain NumPy: the normalised embedding rows
+are clustered with spherical k-means into nlist lists, and a query is
+scored exactly against the rows of its nprobe closest lists only. nprobe
+trades recall for speed (nprobe = nlist is exact search).
+
+The index stores row numbers, not vectors, so it is searched together with
+the memory-mapped matrix it was built from. It is saved next to the store
+as data/embeddings.ivf.npz and records which matrix file it belongs to;
+load_embeddings() ignores an index built for a different matrix.
+
+Usage:
+    python scripts/generate_embeddings.py --ann
+
+    index = IVFIndex.build(matrix)
+    index.search_batch(matrix, query_vectors, top_k=5, nprobe=16)
+"""
+
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from semantic_search import ANN_INDEX_FILE, normalize, top_k_indices
+
+
+DEFAULT_NPROBE = 16
+
+# Rows scored per block while assigning rows to lists (bounds memory on 1M+ rows)
+ASSIGN_BLOCK = 65536
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Closest centroid (by cosine) for every row."""
+    labels = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), ASSIGN_BLOCK):
+        block = np.asarray(matrix[start:start + ASSIGN_BLOCK], dtype=np.float32)
+        labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+@dataclass
+class IVFIndex:
+    """Inverted lists over the rows of a normalised embedding matrix."""
+    centroids: np.ndarray  # (nlist, dim) unit vectors
+    order: np.ndarray      # row numbers, grouped by list
+    offsets: np.ndarray    # list i is order[offsets[i]:offsets[i + 1]]
+    matrix_file: str = ''
+    nprobe: int = DEFAULT_NPROBE
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        nlist: Optional[int] = None,
+        iterations: int = 10,
+        sample_size: int = 64,
+        seed: int = 0,
+        matrix_file: str = ''
+    ) -> 'IVFIndex':
+        """
+        Cluster matrix rows into nlist lists (default: about sqrt(rows)).
+        Centroids are trained on up to sample_size rows per list.
+        """
+        rows = len(matrix)
+        nlist = max(1, min(nlist or int(round(np.sqrt(rows))), rows))
+        rng = np.random.default_rng(seed)
+
+        sample_rows = np.sort(rng.choice(rows, size=min(rows, nlist * sample_size), replace=False))
+        sample = np.asarray(matrix[sample_rows], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+
+        for _ in range(iterations):
+            labels = _assign(sample, centroids)
+            # Sum each list's rows in one pass over the sample sorted by list;
+            # an emptied list keeps its old centroid
+            by_list = np.argsort(labels, kind='stable')
+            filled, starts = np.unique(labels[by_list], return_index=True)
+            centroids[filled] = normalize(np.add.reduceat(sample[by_list], starts, axis=0))
+
+        labels = _assign(matrix, centroids)
+        order = np.argsort(labels, kind='stable').astype(np.int64)
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength=nlist)))).astype(np.int64)
+        return cls(centroids, order, offsets, matrix_file)
+
+    def search_batch(
+        self,
+        matrix: np.ndarray,
+        query_vectors: np.ndarray,
+        top_k: int = 5,
+        threshold: float = -1.0,
+        nprobe: Optional[int] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """(row, similarity) of the best rows per query, scoring only the nprobe closest lists."""
+        query_vectors = normalize(np.atleast_2d(query_vectors))
+        nprobe = max(1, min(nprobe or self.nprobe, self.nlist))
+        if top_k <= 0:
+            return [[] for _ in query_vectors]
+
+        list_scores = query_vectors @ self.centroids.T
+        results = []
+        for query, scores in zip(query_vectors, list_scores):
+            probes = top_k_indices(scores, nprobe)
+            candidates = np.concatenate([self.order[self.offsets[p]:self.offsets[p + 1]] for p in probes])
+            # Ascending row order keeps memory-mapped reads sequential and ties stable
+            candidates.sort()
+            similarity = np.asarray(matrix[candidates], dtype=np.float32) @ query
+            results.append([
+                (int(candidates[i]), float(similarity[i]))
+                for i in top_k_indices(similarity, top_k)
+                if similarity[i] >= threshold
+            ])
+        return results
+
+    def save(self, path: Path = ANN_INDEX_FILE):
+        """Write the index atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, centroids=self.centroids, order=self.order, offsets=self.offsets,
+                         matrix_file=np.array(self.matrix_file), nprobe=np.array(self.nprobe))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: Path = ANN_INDEX_FILE) -> Optional['IVFIndex']:
+        """Read a saved index, or None if there is none (or it is unreadable)."""
+        try:
+            with np.load(path) as f:
+                return cls(f['centroids'], f['order'], f['offsets'], str(f['matrix_file']), int(f['nprobe']))
+        except (OSError, KeyError, ValueError):
+            return None
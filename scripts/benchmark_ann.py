@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+ANN Search Benchmark
+
+Compares the IVF index (ann_index.py) against exact matrix search on
+synthetic clustered embeddings, reporting recall@k against the exact
+results and per-query latency:
+1. exact: one matrix-vector product over every row (semantic_search.py)
+2. ivf: the nprobe closest lists only, for several nprobe values
+
+Vectors are generated in float32 blocks; 1M x 384 needs about 1.5 GB.
+
+Usage:
+    python scripts/benchmark_ann.py
+    python scripts/benchmark_ann.py --sizes 10000,100000 --nprobe 4,16,64 --dim 384
+"""
+
+import sys
+import time
+import argparse
+from typing import Callable
+
+import numpy as np
+
+from ann_index import IVFIndex
+from semantic_search import normalize, search_matrix
+
+
+def synthetic_embeddings(rows: int, dim: int, seed: int = 0, block: int = 65536) -> np.ndarray:
+    """Normalised vectors scattered around ~sqrt(rows) topic centres, like a real atlas."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, int(np.sqrt(rows))), dim), dtype=np.float32)
+    matrix = np.empty((rows, dim), dtype=np.float32)
+    for start in range(0, rows, block):
+        count = min(block, rows - start)
+        topics = rng.integers(len(centres), size=count)
+        matrix[start:start + count] = normalize(
+            0.5 * centres[topics] + rng.standard_normal((count, dim), dtype=np.float32)
+        )
+    return matrix
+
+
+def per_query(func: Callable[[np.ndarray], list], queries: np.ndarray) -> tuple[float, list]:
+    """Mean seconds per query, and the results."""
+    start = time.perf_counter()
+    results = [func(q) for q in queries]
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def recall(approx: list, exact: list) -> float:
+    hits = sum(len({r for r, _ in a} & {r for r, _ in e}) for a, e in zip(approx, exact))
+    return hits / max(1, sum(len(e) for e in exact))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ANN against exact embedding search")
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma-separated vector counts (default: 10k, 100k, 1M)")
+    parser.add_argument("--dim", type=int, default=384, help="Vector size (default: 384, all-MiniLM-L6-v2)")
+    parser.add_argument("--nprobe", default="1,4,16,64", help="Comma-separated nprobe values")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per size")
+    parser.add_argument("--top-k", type=int, default=5, help="k for recall@k (default: 5)")
+    args = parser.parse_args()
+
+    nprobes = [int(n) for n in args.nprobe.split(",")]
+    k = args.top_k
+
+    print(f"{'Vectors':>10} {'Search':<12} {'Build':>8} {'Latency':>10} {f'Recall@{k}':>9} {'Speedup':>8}")
+    print("-" * 62)
+    for size in (int(s) for s in args.sizes.split(",")):
+        matrix = synthetic_embeddings(size, args.dim)
+        rng = np.random.default_rng(1)
+        # Queries near existing rows, as when looking up a slightly different name
+        picks = rng.integers(size, size=args.queries)
+        queries = normalize(matrix[picks] + 0.5 * rng.standard_normal((args.queries, args.dim), dtype=np.float32) / np.sqrt(args.dim))
+
+        exact_time, exact = per_query(lambda q: search_matrix(matrix, q, k, threshold=-1), queries)
+        print(f"{size:>10,} {'exact':<12} {'':>8} {exact_time * 1000:>8.2f}ms {1.0:>9.3f} {1.0:>7.1f}x")
+
+        start = time.perf_counter()
+        index = IVFIndex.build(matrix)
+        build = time.perf_counter() - start
+
+        for nprobe in nprobes:
+            ivf_time, approx = per_query(lambda q: index.search_batch(matrix, q, k, nprobe=nprobe)[0], queries)
+            label = f"ivf/{nprobe}"
+            print(f"{size:>10,} {label:<12} {build:>7.1f}s {ivf_time * 1000:>8.2f}ms "
+                  f"{recall(approx, exact):>9.3f} {exact_time / ivf_time:>7.1f}x")
+        del matrix
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+OWL Generation Benchmark
+
+Times generate_owl.py's writer on synthetic ontologies of increasing size
+(a multi-species build is 100k+ classes), serially and with --jobs worker
+processes, and checks every parallel run is byte-identical to the serial
+one. Output goes to a temporary directory.
+
+With --cache it also times the fragment cache: a cold build that fills
+it, a rebuild with nothing changed, and a rebuild after editing one
+structure (cache load and save included).
+
+Usage:
+    python scripts/benchmark_generate_owl.py
+    python scripts/benchmark_generate_owl.py --sizes 100000,500000 --jobs 2,4,8 --formats owl,ntriples
+    python scripts/benchmark_generate_owl.py --cache --jobs 1
+"""
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from generate_owl import SINKS, OwlXmlSink, FragmentCache, export, output_paths
+
+
+PREDICATES = ["part_of", "innervated_by", "supplied_by", "develops_from"]
+
+
+def synthetic_ontology(size: int, fanout: int = 10) -> Tuple[Dict[str, dict], List[dict]]:
+    """A fanout-ary tree of size structures, most with a definition, every third with two relationships."""
+    structures = {}
+    relationships = []
+    for i in range(1, size + 1):
+        bap_id = f"BAP_{i:07d}"
+        structures[bap_id] = {
+            'id': bap_id,
+            'name': f"Structure {i} (L)" if i % 2 else f"Structure {i} (R)",
+            'abbreviation': f"S{i}",
+            'parent': f"BAP_{(i - 2) // fanout + 1:07d}" if i > 1 else None,
+            'definition': f"Synthetic structure number {i} & <friends>" if i % 5 else None,
+        }
+        if i % 3 == 0:
+            for k in range(2):
+                relationships.append({
+                    'subject': bap_id,
+                    'predicate': PREDICATES[(i + k) % len(PREDICATES)],
+                    'object': f"BAP_{(i * 7919 + k) % size + 1:07d}",
+                })
+    return structures, relationships
+
+
+def run(structures: Dict[str, dict], relationships: List[dict], output: Path,
+        formats: List[str], jobs: int, validate: bool,
+        cache_dir: Optional[Path] = None) -> Tuple[float, Dict[str, str]]:
+    """Seconds to write every format, and the sha256 of each output."""
+    paths = output_paths(output, formats)
+    start = time.perf_counter()
+    files = [open(path, 'w', encoding='utf-8') for path in paths.values()]
+    try:
+        sinks = [
+            OwlXmlSink(f, validate=validate) if name == "owl" else SINKS[name](f)
+            for name, f in zip(paths, files)
+        ]
+        caches = None
+        if cache_dir is not None:
+            caches = [FragmentCache.for_sink(sink, cache_dir) for sink in sinks]
+        export(structures, relationships, sinks, jobs=jobs, caches=caches)
+        for cache in caches or ():
+            cache.save()
+    finally:
+        for f in files:
+            f.close()
+    elapsed = time.perf_counter() - start
+    digests = {name: hashlib.sha256(path.read_bytes()).hexdigest() for name, path in paths.items()}
+    return elapsed, digests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial and parallel OWL generation")
+    parser.add_argument("--sizes", default="100000,300000",
+                        help="Comma-separated class counts (default: 100k, 300k)")
+    parser.add_argument("--jobs", default=f"2,{os.cpu_count() or 1}",
+                        help="Comma-separated worker counts to compare with serial (default: 2 and CPU count)")
+    parser.add_argument("--formats", default="owl", help=f"Comma-separated formats from {', '.join(SINKS)}")
+    parser.add_argument("--validate", action="store_true", help="Validate the RDF/XML while writing")
+    parser.add_argument("--cache", action="store_true", help="Also time cold and incremental cached builds")
+    args = parser.parse_args()
+
+    formats = args.formats.split(",")
+    job_counts = sorted({int(j) for j in args.jobs.split(",") if int(j) > 1})
+    print(f"CPUs: {os.cpu_count()}  formats: {', '.join(formats)}")
+    print(f"{'Classes':>10} {'Jobs':>5} {'Time':>8} {'Classes/s':>11} {'Speedup':>8} {'Identical':>10}")
+    print("-" * 57)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output = Path(tmpdir) / "bench.owl"
+        for size in (int(s) for s in args.sizes.split(",")):
+            structures, relationships = synthetic_ontology(size)
+            serial, expected = run(structures, relationships, output, formats, 1, args.validate)
+            print(f"{size:>10,} {1:>5} {serial:>7.2f}s {size / serial:>11,.0f} {1.0:>7.1f}x {'-':>10}")
+            for jobs in job_counts:
+                elapsed, digests = run(structures, relationships, output, formats, jobs, args.validate)
+                same = "yes" if digests == expected else "NO"
+                print(f"{size:>10,} {jobs:>5} {elapsed:>7.2f}s {size / elapsed:>11,.0f} "
+                      f"{serial / elapsed:>7.1f}x {same:>10}")
+                if digests != expected:
+                    return 1
+            if args.cache:
+                cache_dir = Path(tmpdir) / f"cache-{size}"
+                edited = dict(structures, BAP_0000002={**structures["BAP_0000002"], "name": "Edited"})
+                _, edited_expected = run(edited, relationships, output, formats, 1, args.validate)
+                for label, data, want in (("cold", structures, expected), ("warm", structures, expected),
+                                          ("1 edit", edited, edited_expected)):
+                    elapsed, digests = run(data, relationships, output, formats, 1, args.validate, cache_dir)
+                    same = "yes" if digests == want else "NO"
+                    print(f"{size:>10,} {label:>5} {elapsed:>7.2f}s {size / elapsed:>11,.0f} "
+                          f"{serial / elapsed:>7.1f}x {same:>10}")
+                    if digests != want:
+                        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Hierarchy Tree Benchmark
+
+Times generate_tree.py on synthetic hierarchies: the streaming tree
+renderer (written to a temporary file) and the one-pass depth histogram,
+against the previous recursive versions, which copy every subtree's lines
+into its parent's list and merge one dict per node. Two shapes:
+1. bushy: a fanout-ary tree per --sizes (1M nodes is 7 levels at fanout 10)
+2. chain: a single path of --chain nodes, past Python's default recursion
+   limit (the rendered tree grows with the square of its depth)
+
+The recursive versions are skipped where they would exceed the recursion
+limit.
+
+Usage:
+    python scripts/benchmark_generate_tree.py
+    python scripts/benchmark_generate_tree.py --sizes 100000,1000000 --fanout 4 --chain 20000
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from generate_tree import TREE_CHARS, build_children_map, count_at_depth, iter_full_tree, write_lines
+
+
+def synthetic_tree(size: int, fanout: int) -> Dict[str, dict]:
+    """size structures, each the child of node (i - 1) // fanout; fanout 1 is a chain."""
+    structures = {}
+    for i in range(size):
+        struct_id = f"BAP_{i:07d}"
+        structures[struct_id] = {
+            'id': struct_id,
+            'name': f"Structure {i:07d}",
+            'parent': f"BAP_{(i - 1) // fanout:07d}" if i else None,
+        }
+    return structures
+
+
+def recursive_tree_lines(structures, children_map, node_id, prefix="", is_last=True,
+                         max_depth=10, depth=0) -> List[str]:
+    """The previous renderer: one new list per node, extended into its parent's."""
+    if depth > max_depth:
+        return []
+    lines = []
+    name = structures.get(node_id, {}).get('name', node_id)
+    if depth == 0:
+        connector, new_prefix = "", ""
+    else:
+        connector = TREE_CHARS['last'] if is_last else TREE_CHARS['branch']
+        new_prefix = prefix + (TREE_CHARS['space'] if is_last else TREE_CHARS['pipe'])
+    lines.append(f"{prefix}{connector}{name}")
+    child_ids = [c for c in children_map.get(node_id, []) if not structures.get(c, {}).get('deprecated', False)]
+    for i, child_id in enumerate(child_ids):
+        lines.extend(recursive_tree_lines(structures, children_map, child_id, new_prefix,
+                                          i == len(child_ids) - 1, max_depth, depth + 1))
+    return lines
+
+
+def recursive_count_at_depth(children_map) -> Dict[int, int]:
+    """The previous histogram: one dict per node, merged into its parent's."""
+    def count(node_id, depth=0):
+        counts = {depth: 1}
+        for child_id in children_map.get(node_id, []):
+            for d, c in count(child_id, depth + 1).items():
+                counts[d] = counts.get(d, 0) + c
+        return counts
+
+    total = defaultdict(int)
+    for root_id in children_map.get(None, []):
+        for d, c in count(root_id).items():
+            total[d] += c
+    return dict(total)
+
+
+def timed(func: Callable) -> tuple:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hierarchy tree rendering")
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma-separated node counts (default: 10k, 100k, 1M)")
+    parser.add_argument("--fanout", type=int, default=10, help="Children per node in the bushy tree")
+    parser.add_argument("--chain", type=int, default=5000, help="Depth of the chain (0 to skip)")
+    args = parser.parse_args()
+
+    print(f"{'Nodes':>10} {'Shape':<6} {'Depth':>8} {'Tree':>8} {'(recursive)':>12} "
+          f"{'Histogram':>10} {'(recursive)':>12}")
+    print("-" * 72)
+    runs = [(int(s), "bushy", args.fanout) for s in args.sizes.split(",")]
+    if args.chain:
+        runs.append((args.chain, "chain", 1))
+    for size, shape, fanout in runs:
+        structures = synthetic_tree(size, fanout)
+        children_map = build_children_map(structures)
+
+        with tempfile.TemporaryFile('w', encoding='utf-8') as out:
+            tree_time, _ = timed(lambda: write_lines(iter_full_tree(structures, max_depth=size,
+                                                                    children_map=children_map), out))
+        hist_time, counts = timed(lambda: count_at_depth(children_map))
+        depth = max(counts)
+
+        old_tree: Optional[float] = None
+        old_hist: Optional[float] = None
+        if depth < sys.getrecursionlimit() - 100:
+            old_tree, lines = timed(lambda: recursive_tree_lines(structures, children_map, "BAP_0000000", max_depth=size))
+            del lines
+            old_hist, old_counts = timed(lambda: recursive_count_at_depth(children_map))
+            assert old_counts == counts
+
+        def fmt(seconds: Optional[float]) -> str:
+            return f"{seconds:.2f}s" if seconds is not None else "too deep"
+
+        print(f"{size:>10,} {shape:<6} {depth:>8,} {fmt(tree_time):>8} {fmt(old_tree):>12} "
+              f"{fmt(hist_time):>10} {fmt(old_hist):>12}")
+        del structures, children_map
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
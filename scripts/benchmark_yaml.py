@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+YAML Load Benchmark
+
+Times the ways the scripts can read a structure file:
+1. yaml.safe_load (pure-Python parser)
+2. yaml_fast.safe_load (libyaml CSafeLoader when available)
+3. ruamel.yaml round-trip load (used only for formatting-preserving writes)
+4. Warm hit on the parsed-file cache in .cache/
+
+Usage:
+    python scripts/benchmark_yaml.py
+    python scripts/benchmark_yaml.py --file structures/muscles.yaml --repeat 10
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+import yaml
+
+import yaml_fast
+from ontology import ROOT_DIR, ParseCache
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    """Best wall-clock time of several runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark YAML loading")
+    parser.add_argument("--file", default=str(ROOT_DIR / "structures" / "brain.yaml"),
+                        help="YAML file to load (default: structures/brain.yaml)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per loader (best is reported)")
+    args = parser.parse_args()
+
+    path = Path(args.file)
+    text = path.read_text(encoding="utf-8")
+    print(f"File: {path} ({len(text.splitlines()):,} lines, {len(text) / 1024:.0f} KB)")
+    print(f"libyaml available: {yaml_fast.HAS_LIBYAML}\n")
+
+    results = []
+
+    baseline = best_of(lambda: yaml.safe_load(text), args.repeat)
+    results.append(("yaml.safe_load", baseline))
+
+    fast = best_of(lambda: yaml_fast.safe_load(text), args.repeat)
+    results.append(("yaml_fast.safe_load", fast))
+
+    if yaml_fast.safe_load(text) != yaml.safe_load(text):
+        print("❌ Fast loader returned different data")
+        return 1
+
+    try:
+        from yaml_utils import get_yaml
+        ruamel_yaml = get_yaml()
+        results.append(("ruamel.yaml (round-trip)", best_of(lambda: ruamel_yaml.load(text), args.repeat)))
+    except ImportError:
+        pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ParseCache(Path(tmp))
+        cache.load(path)
+        results.append(("parsed-file cache (warm)", best_of(lambda: cache.load(path), args.repeat)))
+
+    print(f"{'Loader':<28} {'Time':>10} {'Speedup':>9}")
+    print("-" * 49)
+    for name, seconds in results:
+        print(f"{name:<28} {seconds * 1000:>8.1f}ms {baseline / seconds:>8.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,885 @@
+#!/usr/bin/env python3
+"""
+BAP Bulk Database Sync
+
+Set-based engine behind `sync_to_db.py` (the default; --rowwise selects
+the older row-by-row engine). Instead of one query per row, the YAML state
+is staged into temporary tables (COPY on PostgreSQL, executemany
+elsewhere) and diffed against the live tables with a few set-based
+statements, all inside the caller's transaction. A sync costs
+the same handful of round trips whether 1 or 10,000 rows changed.
+
+The engine only needs a DB-API connection: psycopg2 against PostgreSQL in
+production, sqlite3 in the tests.
+
+Surrogate IDs for new hierarchy and relationship rows come from database
+sequences (IdAllocator), never from MAX(id) + 1, so concurrent syncs can't
+hand out the same ID. ensure_sync_tables() creates the sequences on first
+use and moves them past any IDs already in the tables.
+
+What was synced is remembered as content digests in the bap_sync_digest
+table: one per structure and relationship, plus a rollup per YAML file
+(a digest of its rows' digests). The next sync compares file rollups
+first, then row digests within changed files, and only stages rows whose
+content changed; when no rollup changed it stops after one query. Rows
+that failed to sync (e.g. missing parent) get no digest, so they are
+retried every time. Use full=True (--full) to re-check every row, e.g.
+after editing the database by hand.
+
+File rollups are never updated in place inside the sync transaction: a
+sync appends its new rollups to bap_sync_digest_journal, committed
+together with its changes, and the next sync folds the committed entries
+into bap_sync_digest in a short transaction of its own before it starts.
+Appends don't conflict, so concurrent syncs of the same YAML file only
+wait for each other where they change the same rows.
+
+With reconcile=True (--reconcile) the database is made to match the YAML
+exactly: structures and relationships that are no longer in the YAML are
+soft-deleted (deprecated = TRUE) or, with hard_delete, removed together
+with their hierarchy rows; `deprecated: true` in the YAML sets the same
+tombstone column; relationship notes are updated. Run it with dry_run
+first for a report of everything it would change.
+
+Usage:
+    from db_sync import run_bulk_sync, SyncStats
+
+    stats = SyncStats()
+    run_bulk_sync(conn, yaml_structures, yaml_relationships, stats, dry_run=True)
+    stats.print_summary()
+"""
+
+import io
+import json
+import hashlib
+from typing import Dict, List, Set, Tuple, Optional, Sequence
+from dataclasses import dataclass
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+
+IRI_BASE = "http://purl.obolibrary.org/obo/"
+
+# (column, type) of each staging table
+STRUCTURE_COLUMNS = [
+    ("id", "BIGINT"), ("name", "TEXT"), ("abbreviation", "TEXT"),
+    ("description", "TEXT"), ("external_id", "TEXT"), ("iri", "TEXT"),
+    ("deprecated", "BOOLEAN"),
+]
+HIERARCHY_COLUMNS = [("child_id", "BIGINT"), ("parent_id", "BIGINT")]
+RELATIONSHIP_COLUMNS = [
+    ("ord", "INTEGER"), ("entity1_id", "BIGINT"), ("entity2_id", "BIGINT"),
+    ("relationship_type_id", "BIGINT"), ("notes", "TEXT"),
+]
+
+# Tables that get a `deprecated` tombstone column for --reconcile
+TOMBSTONE_TABLES = ["anatomical_structure", "anatomical_structure_relationship"]
+
+# Tables whose surrogate IDs come from a sequence named <table>_id_seq
+SEQUENCE_TABLES = ["anatomical_structure_hierarchy", "anatomical_structure_relationship"]
+SEQUENCE_LOCK_KEY = 0x424150  # pg advisory lock held while bootstrapping sequences
+SQLITE_SEQUENCE_TABLE = "bap_id_sequence"  # SQLite has no sequences; emulated here
+
+DIGEST_TABLE = "bap_sync_digest"
+DIGEST_COLUMNS = [("kind", "TEXT"), ("key", "TEXT"), ("file", "TEXT"), ("digest", "TEXT")]
+DIGEST_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {DIGEST_TABLE} (
+        kind TEXT NOT NULL, key TEXT NOT NULL, file TEXT NOT NULL, digest TEXT NOT NULL,
+        PRIMARY KEY (kind, key)
+    )
+"""
+DIGEST_JOURNAL_TABLE = "bap_sync_digest_journal"  # file rollups written by syncs not folded in yet
+DIGEST_TABLES = [DIGEST_TABLE, DIGEST_JOURNAL_TABLE]
+
+
+# ============================================================================
+# Data Classes
+# ============================================================================
+
+@dataclass
+class SyncStats:
+    structures_added: int = 0
+    structures_updated: int = 0
+    structures_unchanged: int = 0
+    structures_orphaned: int = 0
+    structures_deprecated: int = 0
+    structures_restored: int = 0
+    structures_removed: int = 0
+    hierarchies_added: int = 0
+    hierarchies_updated: int = 0
+    hierarchies_removed: int = 0
+    relationships_added: int = 0
+    relationships_updated: int = 0
+    relationships_removed: int = 0
+    errors: List[str] = None
+
+    def __post_init__(self):
+        if self.errors is None:
+            self.errors = []
+
+    def print_summary(self):
+        print("\n" + "=" * 50)
+        print("📊 SYNC SUMMARY")
+        print("=" * 50)
+        print(f"  Structures added:    {self.structures_added}")
+        print(f"  Structures updated:  {self.structures_updated}")
+        print(f"  Structures unchanged:{self.structures_unchanged}")
+        if self.structures_orphaned:
+            print(f"  Structures not in YAML:{self.structures_orphaned}")
+        if self.structures_deprecated or self.structures_restored:
+            print(f"  Structures deprecated:{self.structures_deprecated}")
+            print(f"  Structures restored: {self.structures_restored}")
+        if self.structures_removed:
+            print(f"  Structures removed:  {self.structures_removed}")
+        print(f"  Hierarchies added:   {self.hierarchies_added}")
+        print(f"  Hierarchies updated: {self.hierarchies_updated}")
+        if self.hierarchies_removed:
+            print(f"  Hierarchies removed: {self.hierarchies_removed}")
+        print(f"  Relationships added: {self.relationships_added}")
+        print(f"  Relationships updated:{self.relationships_updated}")
+        if self.relationships_removed:
+            print(f"  Relationships removed:{self.relationships_removed}")
+
+        if self.errors:
+            print(f"\n❌ ERRORS ({len(self.errors)}):")
+            for err in self.errors[:10]:
+                print(f"  - {err}")
+        else:
+            print("\n✅ No errors!")
+        print("=" * 50)
+
+
+@dataclass(frozen=True)
+class Dialect:
+    """The few places where PostgreSQL and SQLite SQL differ."""
+    name: str
+    placeholder: str
+    is_distinct: str  # null-safe "!="
+    temp_schema: str
+    use_copy: bool
+
+
+POSTGRES = Dialect("postgresql", "%s", "IS DISTINCT FROM", "pg_temp", True)
+SQLITE = Dialect("sqlite", "?", "IS NOT", "temp", False)
+
+
+def dialect_for(conn) -> Dialect:
+    """Guess the dialect from the connection's driver module."""
+    return SQLITE if type(conn).__module__.startswith("sqlite3") else POSTGRES
+
+
+# ============================================================================
+# YAML -> Rows
+# ============================================================================
+
+def bap_id_to_db_id(bap_id: str) -> int:
+    """Extract numeric ID from BAP ID (BAP_0000015 -> 15)."""
+    # Remove BAP_ prefix and leading zeros, convert to int
+    numeric_part = bap_id.replace("BAP_", "")
+    return int(numeric_part)  # int() handles leading zeros automatically
+
+
+def structure_rows(yaml_structures: Dict[str, dict]) -> List[tuple]:
+    """anatomical_structure rows (without nomenclature) for every structure."""
+    return [
+        (
+            bap_id_to_db_id(bap_id),
+            struct.get('name', ''),
+            struct.get('abbreviation'),
+            struct.get('definition'),
+            struct.get('external_id'),
+            f"{IRI_BASE}{bap_id}",
+            bool(struct.get('deprecated', False)),
+        )
+        for bap_id, struct in yaml_structures.items()
+    ]
+
+
+def hierarchy_rows(yaml_structures: Dict[str, dict], stats: SyncStats) -> List[tuple]:
+    """(child_id, parent_id) per structure; roots get a NULL parent."""
+    rows = []
+    for bap_id, struct in yaml_structures.items():
+        parent_bap_id = struct.get('parent')
+        if parent_bap_id is None:
+            rows.append((bap_id_to_db_id(bap_id), None))
+        elif parent_bap_id in yaml_structures:
+            rows.append((bap_id_to_db_id(bap_id), bap_id_to_db_id(parent_bap_id)))
+        else:
+            stats.errors.append(f"Parent not found for {bap_id}: {parent_bap_id}")
+    return rows
+
+
+def relationship_rows(
+    yaml_relationships: List[dict],
+    yaml_structures: Dict[str, dict],
+    rel_type_map: Dict[str, int],
+    stats: SyncStats
+) -> List[tuple]:
+    """(ord, entity1_id, entity2_id, type_id, notes), first of any duplicates kept."""
+    rows = []
+    seen = set()
+    for rel in yaml_relationships:
+        subject_bap = rel.get('subject')
+        predicate = rel.get('predicate')
+        object_bap = rel.get('object')
+
+        if not all([subject_bap, predicate, object_bap]):
+            continue
+
+        if subject_bap not in yaml_structures:
+            stats.errors.append(f"Subject not found: {subject_bap}")
+            continue
+        if object_bap not in yaml_structures:
+            stats.errors.append(f"Object not found: {object_bap}")
+            continue
+        rel_type_id = rel_type_map.get(predicate.lower())
+        if rel_type_id is None:
+            stats.errors.append(f"Relationship type not found: {predicate}")
+            continue
+
+        key = (bap_id_to_db_id(subject_bap), bap_id_to_db_id(object_bap), rel_type_id)
+        if key not in seen:
+            seen.add(key)
+            rows.append((len(rows), *key, rel.get('notes')))
+    return rows
+
+
+def structure_names(yaml_structures: Dict[str, dict]) -> Dict[int, str]:
+    """db_id -> name, for log lines."""
+    return {bap_id_to_db_id(bap_id): s.get('name', bap_id) for bap_id, s in yaml_structures.items()}
+
+
+def relationship_labels(rows: List[tuple], names: Dict[int, str], rel_type_map: Dict[str, int]) -> List[str]:
+    """'Subject --[predicate]--> Object' for each relationship row, by ord."""
+    type_names = {type_id: name for name, type_id in rel_type_map.items()}
+    return [f"{names[e1]} --[{type_names[type_id]}]--> {names[e2]}" for _, e1, e2, type_id, _ in rows]
+
+
+# ============================================================================
+# ID Allocation
+# ============================================================================
+
+def digest_journal_sql(dialect: Dialect) -> str:
+    seq = "BIGSERIAL PRIMARY KEY" if dialect.name == POSTGRES.name else "INTEGER PRIMARY KEY AUTOINCREMENT"
+    return f"CREATE TABLE IF NOT EXISTS {DIGEST_JOURNAL_TABLE} (seq {seq}, file TEXT NOT NULL, digest TEXT)"
+
+
+def pg_setup_statements() -> List[str]:
+    """PostgreSQL DDL/setval statements behind ensure_sync_tables (no parameters)."""
+    statements = [DIGEST_TABLE_SQL, digest_journal_sql(POSTGRES)]
+    for table in SEQUENCE_TABLES:
+        seq = f"{table}_id_seq"
+        statements.append(f"CREATE SEQUENCE IF NOT EXISTS {seq}")
+        statements.append(f"""
+            SELECT setval('{seq}', m)
+            FROM (SELECT MAX(id) AS m FROM {table}) t
+            WHERE m > (SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END FROM {seq})
+        """)
+    return statements
+
+
+def ensure_sync_tables(conn, dialect: Optional[Dialect] = None):
+    """
+    Create the ID sequences and the digest tables if needed, and move each
+    sequence past its table's MAX(id) (rows may have been inserted without
+    it). Commits, so call it before starting the sync transaction.
+    """
+    dialect = dialect or dialect_for(conn)
+    cur = conn.cursor()
+
+    if dialect.name == POSTGRES.name:
+        # Session lock, released after the commit: a second sync waits here
+        # instead of racing CREATE SEQUENCE
+        cur.execute("SELECT pg_advisory_lock(%s)", (SEQUENCE_LOCK_KEY,))
+        try:
+            for sql in pg_setup_statements():
+                cur.execute(sql)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (SEQUENCE_LOCK_KEY,))
+            conn.commit()
+    else:
+        cur.execute(DIGEST_TABLE_SQL)
+        cur.execute(digest_journal_sql(SQLITE))
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {SQLITE_SEQUENCE_TABLE} (name TEXT PRIMARY KEY, last_value BIGINT)")
+        for table in SEQUENCE_TABLES:
+            cur.execute(f"INSERT OR IGNORE INTO {SQLITE_SEQUENCE_TABLE} VALUES (?, 0)", (f"{table}_id_seq",))
+            cur.execute(f"""
+                UPDATE {SQLITE_SEQUENCE_TABLE}
+                SET last_value = MAX(last_value, (SELECT COALESCE(MAX(id), 0) FROM {table}))
+                WHERE name = ?
+            """, (f"{table}_id_seq",))
+        conn.commit()
+
+
+def ensure_tombstone_columns(conn, dialect: Optional[Dialect] = None):
+    """Add the `deprecated` column used by reconcile, if missing. Commits."""
+    dialect = dialect or dialect_for(conn)
+    cur = conn.cursor()
+    for table in TOMBSTONE_TABLES:
+        if dialect.name == POSTGRES.name:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS deprecated BOOLEAN NOT NULL DEFAULT FALSE")
+        else:
+            cur.execute(f"PRAGMA table_info({table})")
+            if "deprecated" not in [row[1] for row in cur.fetchall()]:
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN deprecated BOOLEAN NOT NULL DEFAULT FALSE")
+    conn.commit()
+
+
+class IdAllocator:
+    """Hands out surrogate IDs for one table from its sequence, in bulk."""
+
+    def __init__(self, conn, table: str, dialect: Optional[Dialect] = None):
+        self.conn = conn
+        self.sequence = f"{table}_id_seq"
+        self.dialect = dialect or dialect_for(conn)
+
+    def _reserve_block(self, count: int) -> int:
+        """First ID of a contiguous block of count IDs (SQLite)."""
+        cur = self.conn.cursor()
+        cur.execute(
+            f"UPDATE {SQLITE_SEQUENCE_TABLE} SET last_value = last_value + ? WHERE name = ? RETURNING last_value",
+            (count, self.sequence)
+        )
+        return cur.fetchone()[0] - count + 1
+
+    def take(self, count: int) -> List[int]:
+        """count fresh IDs in one round trip."""
+        if count <= 0:
+            return []
+        if self.dialect.name == POSTGRES.name:
+            cur = self.conn.cursor()
+            cur.execute("SELECT nextval(%s) FROM generate_series(1, %s)", (self.sequence, count))
+            return [row[0] for row in cur.fetchall()]
+        start = self._reserve_block(count)
+        return list(range(start, start + count))
+
+    def sql_expr(self, count: int, order_by: str) -> str:
+        """ID expression for an INSERT ... SELECT producing count rows."""
+        if self.dialect.name == POSTGRES.name:
+            return f"nextval('{self.sequence}')"
+        start = self._reserve_block(count)
+        return f"{start - 1} + ROW_NUMBER() OVER (ORDER BY {order_by})"
+
+
+# ============================================================================
+# Content Digests
+# ============================================================================
+
+@dataclass
+class ContentDigests:
+    """Digests of the YAML side: (kind, key) -> (file, digest) and file -> rollup."""
+    rows: Dict[Tuple[str, str], Tuple[str, str]]
+    files: Dict[str, str]
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def relationship_key(rel: dict) -> Optional[str]:
+    """Identity of a relationship row: subject, predicate (any case), object."""
+    if not all([rel.get('subject'), rel.get('predicate'), rel.get('object')]):
+        return None
+    return f"{rel['subject']} {rel['predicate'].lower()} {rel['object']}"
+
+
+def compute_digests(yaml_structures: Dict[str, dict], yaml_relationships: List[dict]) -> ContentDigests:
+    """Digest every synced field of every row, rolled up per source file."""
+    rows = {}
+    for bap_id, struct in yaml_structures.items():
+        fields = [struct.get(f) for f in ('name', 'abbreviation', 'definition', 'external_id', 'parent')]
+        rows[("structure", bap_id)] = (f"structures/{struct.get('_source_file', '')}", _digest(fields))
+    for rel in yaml_relationships:
+        key = relationship_key(rel)
+        if key and ("relationship", key) not in rows:
+            rows[("relationship", key)] = (f"relationships/{rel.get('_source_file', '')}", _digest(rel.get('notes')))
+
+    by_file: Dict[str, List[str]] = {}
+    for (kind, key), (file, digest) in rows.items():
+        by_file.setdefault(file, []).append(f"{kind} {key} {digest}")
+    files = {file: _digest(sorted(lines)) for file, lines in by_file.items()}
+    return ContentDigests(rows, files)
+
+
+# ============================================================================
+# Bulk Sync
+# ============================================================================
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+class BulkSync:
+    """Stages YAML rows and applies the difference with set-based SQL."""
+
+    def __init__(self, conn, nomenclature_id: int, dialect: Optional[Dialect] = None):
+        self.conn = conn
+        self.nomenclature_id = nomenclature_id
+        self.dialect = dialect or dialect_for(conn)
+        self.cur = conn.cursor()
+        self.ids = {table: IdAllocator(conn, table, self.dialect) for table in SEQUENCE_TABLES}
+
+    def execute(self, sql: str, params: Sequence = ()):
+        self.cur.execute(sql.replace("%s", self.dialect.placeholder), params)
+
+    def query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        self.execute(sql, params)
+        return self.cur.fetchall()
+
+    def stage(self, table: str, columns: List[Tuple[str, str]], rows: List[tuple]):
+        """Load rows into a fresh temporary table."""
+        d = self.dialect
+        self.execute(f"DROP TABLE IF EXISTS {d.temp_schema}.{table}")
+        self.execute(
+            f"CREATE TEMP TABLE {table} ({', '.join(f'{c} {t}' for c, t in columns)})"
+            + (" ON COMMIT DROP" if d.name == POSTGRES.name else "")
+        )
+        names = ", ".join(c for c, _ in columns)
+        if d.use_copy:
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write("\t".join(_copy_value(v) for v in row) + "\n")
+            buffer.seek(0)
+            self.cur.copy_expert(f"COPY {table} ({names}) FROM STDIN", buffer)
+        elif rows:
+            marks = ", ".join(d.placeholder for _ in columns)
+            self.cur.executemany(f"INSERT INTO {table} ({names}) VALUES ({marks})", rows)
+
+    def table_exists(self, table: str) -> bool:
+        if self.dialect.name == POSTGRES.name:
+            return self.query("SELECT to_regclass(%s)", (table,))[0][0] is not None
+        return bool(self.query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", (table,)))
+
+    def column_exists(self, table: str, column: str) -> bool:
+        if self.dialect.name == POSTGRES.name:
+            return bool(self.query(
+                "SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = %s",
+                (table, column)
+            ))
+        return column in [row[1] for row in self.query(f"PRAGMA table_info({table})")]
+
+    # ------------------------------------------------------------------------
+    # Digests
+    # ------------------------------------------------------------------------
+
+    def stored_rollups(self) -> Dict[str, str]:
+        """file -> rollup digest as of the last sync, journal entries applied in order."""
+        if self.table_exists(DIGEST_JOURNAL_TABLE):
+            entries = self.query(f"""
+                SELECT 0, key, digest FROM {DIGEST_TABLE} WHERE kind = 'file'
+                UNION ALL
+                SELECT seq, file, digest FROM {DIGEST_JOURNAL_TABLE}
+                ORDER BY 1
+            """)
+        elif self.table_exists(DIGEST_TABLE):
+            entries = self.query(f"SELECT 0, key, digest FROM {DIGEST_TABLE} WHERE kind = 'file'")
+        else:
+            return {}
+        rollups = {}
+        for _, file, digest in entries:
+            if digest is None:
+                rollups.pop(file, None)
+            else:
+                rollups[file] = digest
+        return rollups
+
+    def stored_rows(self, files: Set[str]) -> Dict[Tuple[str, str], str]:
+        """(kind, key) -> digest for the rows last synced from these files."""
+        if not files or not self.table_exists(DIGEST_TABLE):
+            return {}
+        marks = ", ".join("%s" for _ in files)
+        return {
+            (kind, key): digest
+            for kind, key, digest in self.query(
+                f"SELECT kind, key, digest FROM {DIGEST_TABLE} WHERE kind <> 'file' AND file IN ({marks})",
+                sorted(files)
+            )
+        }
+
+    def journal_rollups(self, rollups: List[Tuple[str, Optional[str]]]):
+        """Append (file, rollup) entries, None for a file that has no rollup any more."""
+        if rollups:
+            marks = ", ".join([self.dialect.placeholder] * 2)
+            self.cur.executemany(f"INSERT INTO {DIGEST_JOURNAL_TABLE} (file, digest) VALUES ({marks})", rollups)
+
+    def fold_journal(self):
+        """Move committed journal entries into the digest table. The caller commits."""
+        entries = self.query(f"SELECT seq, file, digest FROM {DIGEST_JOURNAL_TABLE} ORDER BY seq")
+        if not entries:
+            return
+        latest = {file: digest for _, file, digest in entries}
+        self.save_digests(
+            [("file", file, file, digest) for file, digest in sorted(latest.items()) if digest is not None],
+            [("file", file) for file, digest in sorted(latest.items()) if digest is None]
+        )
+        self.execute(f"DELETE FROM {DIGEST_JOURNAL_TABLE} WHERE seq <= %s", (entries[-1][0],))
+
+    def save_digests(self, upserts: List[tuple], removed: List[Tuple[str, str]]):
+        """Upsert (kind, key, file, digest) rows and drop removed (kind, key)s."""
+        if removed:
+            self.stage("bap_stage_digest_removed", DIGEST_COLUMNS[:2], removed)
+            self.execute(f"""
+                DELETE FROM {DIGEST_TABLE}
+                WHERE EXISTS (
+                    SELECT 1 FROM bap_stage_digest_removed r
+                    WHERE r.kind = {DIGEST_TABLE}.kind AND r.key = {DIGEST_TABLE}.key
+                )
+            """)
+        if upserts:
+            self.stage("bap_stage_digest", DIGEST_COLUMNS, upserts)
+            self.execute(f"""
+                INSERT INTO {DIGEST_TABLE} (kind, key, file, digest)
+                SELECT kind, key, file, digest FROM bap_stage_digest WHERE true
+                ON CONFLICT (kind, key) DO UPDATE SET file = EXCLUDED.file, digest = EXCLUDED.digest
+            """)
+
+    # ------------------------------------------------------------------------
+    # Phases
+    # ------------------------------------------------------------------------
+
+    def sync_structures(self, rows: List[tuple], stats: SyncStats, dry_run: bool = False,
+                        count_orphans: bool = True):
+        """Upsert new and changed structures."""
+        ne = self.dialect.is_distinct
+        self.stage("bap_stage_structure", STRUCTURE_COLUMNS, rows)
+        changed = f"""
+            FROM bap_stage_structure s
+            LEFT JOIN anatomical_structure a ON a.id = s.id AND a.nomenclature_id = %s
+            WHERE a.id IS NULL
+               OR a.name {ne} s.name OR a.abbreviation {ne} s.abbreviation
+               OR a.description {ne} s.description OR a.external_id {ne} s.external_id
+        """
+        nid = self.nomenclature_id
+
+        diff = self.query(f"SELECT s.id, s.name, a.id IS NULL {changed} ORDER BY s.id", (nid,))
+        for db_id, name, is_new in diff:
+            if is_new:
+                print(f"    + ADD structure: {name} (ID:{db_id})")
+                stats.structures_added += 1
+            else:
+                print(f"    ~ UPDATE structure: {name} (ID:{db_id})")
+                stats.structures_updated += 1
+        stats.structures_unchanged += len(rows) - len(diff)
+
+        # Reported only; the sync never removes structures
+        if count_orphans:
+            stats.structures_orphaned += self.query("""
+                SELECT COUNT(*) FROM anatomical_structure a
+                WHERE a.nomenclature_id = %s
+                  AND NOT EXISTS (SELECT 1 FROM bap_stage_structure s WHERE s.id = a.id)
+            """, (nid,))[0][0]
+
+        if not dry_run and diff:
+            self.execute(f"""
+                INSERT INTO anatomical_structure
+                (id, nomenclature_id, name, abbreviation, description, external_id, iri)
+                SELECT s.id, %s, s.name, s.abbreviation, s.description, s.external_id, s.iri
+                {changed}
+                ON CONFLICT (id) DO UPDATE SET
+                    name = EXCLUDED.name,
+                    abbreviation = EXCLUDED.abbreviation,
+                    description = EXCLUDED.description,
+                    external_id = EXCLUDED.external_id,
+                    iri = EXCLUDED.iri
+            """, (nid, nid))
+
+    def sync_hierarchies(self, rows: List[tuple], names: Dict[int, str], stats: SyncStats, dry_run: bool = False):
+        """Insert missing hierarchy rows and re-point moved children."""
+        ne = self.dialect.is_distinct
+        self.stage("bap_stage_hierarchy", HIERARCHY_COLUMNS, rows)
+
+        diff = self.query(f"""
+            SELECT s.child_id, s.parent_id, h.parent_entity_id, h.id IS NULL
+            FROM bap_stage_hierarchy s
+            LEFT JOIN anatomical_structure_hierarchy h ON h.anatomical_entity_id = s.child_id
+            WHERE h.id IS NULL OR h.parent_entity_id {ne} s.parent_id
+            ORDER BY s.child_id
+        """)
+        for child_id, parent_id, old_parent, is_new in diff:
+            parent_name = names.get(parent_id, parent_id) if parent_id is not None else "(NULL - root node)"
+            if is_new:
+                print(f"    + ADD hierarchy: {names.get(child_id, child_id)} (ID:{child_id}) -> parent: {parent_name} (ID:{parent_id})")
+                stats.hierarchies_added += 1
+            else:
+                print(f"    ~ UPDATE hierarchy: {names.get(child_id, child_id)} (ID:{child_id}) -> parent: {parent_name} (ID:{parent_id}) [was: {old_parent}]")
+                stats.hierarchies_updated += 1
+
+        if dry_run:
+            return
+        if any(not is_new for *_, is_new in diff):
+            self.execute(f"""
+                UPDATE anatomical_structure_hierarchy SET parent_entity_id = s.parent_id
+                FROM bap_stage_hierarchy s
+                WHERE anatomical_structure_hierarchy.anatomical_entity_id = s.child_id
+                  AND anatomical_structure_hierarchy.parent_entity_id {ne} s.parent_id
+            """)
+        added = sum(1 for *_, is_new in diff if is_new)
+        if added:
+            new_id = self.ids["anatomical_structure_hierarchy"].sql_expr(added, "s.child_id")
+            self.execute(f"""
+                INSERT INTO anatomical_structure_hierarchy (id, anatomical_entity_id, parent_entity_id)
+                SELECT {new_id}, s.child_id, s.parent_id
+                FROM bap_stage_hierarchy s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM anatomical_structure_hierarchy h WHERE h.anatomical_entity_id = s.child_id
+                )
+            """)
+
+    def sync_relationships(self, rows: List[tuple], labels: List[str], stats: SyncStats, dry_run: bool = False):
+        """Insert relationships the database doesn't have yet."""
+        self.stage("bap_stage_relationship", RELATIONSHIP_COLUMNS, rows)
+        missing = """
+            FROM bap_stage_relationship s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM anatomical_structure_relationship r
+                WHERE r.entity1_id = s.entity1_id AND r.entity2_id = s.entity2_id
+                  AND r.relationship_type_id = s.relationship_type_id
+            )
+        """
+        added = self.query(f"SELECT s.ord {missing} ORDER BY s.ord")
+        for (ord_,) in added:
+            print(f"    + ADD relationship: {labels[ord_]}")
+        stats.relationships_added += len(added)
+        # Existing relationships are only updated by reconcile()
+
+        if not dry_run and added:
+            new_id = self.ids["anatomical_structure_relationship"].sql_expr(len(added), "s.ord")
+            self.execute(f"""
+                INSERT INTO anatomical_structure_relationship
+                (id, entity1_id, entity2_id, relationship_type_id, notes)
+                SELECT {new_id}, s.entity1_id, s.entity2_id, s.relationship_type_id, s.notes
+                {missing}
+            """)
+
+    def reconcile(self, stats: SyncStats, dry_run: bool = False, hard_delete: bool = False):
+        """
+        Remove what the YAML no longer has and sync tombstones and notes.
+        Needs every structure and relationship staged by the phases above.
+        """
+        ne = self.dialect.is_distinct
+        nid = self.nomenclature_id
+        # Before the first real reconcile the columns may not exist yet (dry run)
+        has_tombstones = all(self.column_exists(t, "deprecated") for t in TOMBSTONE_TABLES)
+        tomb = "a.deprecated" if has_tombstones else "FALSE"
+        rel_tomb = "r.deprecated" if has_tombstones else "FALSE"
+
+        # Tombstones from `deprecated: true`, and structures brought back
+        for db_id, name, deprecated in self.query(f"""
+            SELECT s.id, s.name, s.deprecated FROM bap_stage_structure s
+            LEFT JOIN anatomical_structure a ON a.id = s.id AND a.nomenclature_id = %s
+            WHERE COALESCE({tomb}, FALSE) {ne} s.deprecated
+            ORDER BY s.id
+        """, (nid,)):
+            if deprecated:
+                print(f"    † DEPRECATE structure: {name} (ID:{db_id})")
+                stats.structures_deprecated += 1
+            else:
+                print(f"    ~ RESTORE structure: {name} (ID:{db_id})")
+                stats.structures_restored += 1
+
+        orphans = self.query(f"""
+            SELECT a.id, a.name FROM anatomical_structure a
+            WHERE a.nomenclature_id = %s
+              AND NOT EXISTS (SELECT 1 FROM bap_stage_structure s WHERE s.id = a.id)
+              {"" if hard_delete else f"AND NOT {tomb}"}
+            ORDER BY a.id
+        """, (nid,))
+        for db_id, name in orphans:
+            print(f"    - REMOVE structure: {name} (ID:{db_id})")
+        stats.structures_removed += len(orphans)
+
+        same_triple = """
+            s.entity1_id = r.entity1_id AND s.entity2_id = r.entity2_id
+            AND s.relationship_type_id = r.relationship_type_id
+        """
+        ours = "JOIN anatomical_structure a ON a.id = r.entity1_id AND a.nomenclature_id = %s"
+        stale_rels = self.query(f"""
+            SELECT r.id, a.name, t.name, b.name FROM anatomical_structure_relationship r
+            {ours}
+            LEFT JOIN anatomical_structure b ON b.id = r.entity2_id
+            LEFT JOIN relationship_type t ON t.id = r.relationship_type_id
+            WHERE NOT EXISTS (SELECT 1 FROM bap_stage_relationship s WHERE {same_triple})
+              {"" if hard_delete else f"AND NOT {rel_tomb}"}
+            ORDER BY r.id
+        """, (nid,))
+        for _, subject, predicate, obj in stale_rels:
+            print(f"    - REMOVE relationship: {subject} --[{predicate}]--> {obj}")
+        stats.relationships_removed += len(stale_rels)
+
+        notes = self.query(f"""
+            SELECT r.id, a.name, b.name FROM anatomical_structure_relationship r
+            {ours}
+            JOIN bap_stage_relationship s ON {same_triple}
+            LEFT JOIN anatomical_structure b ON b.id = r.entity2_id
+            WHERE r.notes {ne} s.notes OR {rel_tomb}
+            ORDER BY r.id
+        """, (nid,))
+        for _, subject, obj in notes:
+            print(f"    ~ UPDATE relationship: {subject} -> {obj}")
+        stats.relationships_updated += len(notes)
+
+        orphan_ids = [(db_id,) for db_id, _ in orphans]
+        if hard_delete:
+            self.stage("bap_stage_orphan", [("id", "BIGINT")], orphan_ids)
+            in_orphans = "IN (SELECT id FROM bap_stage_orphan)"
+            stats.hierarchies_removed += self.query(f"""
+                SELECT COUNT(*) FROM anatomical_structure_hierarchy
+                WHERE anatomical_entity_id {in_orphans} OR parent_entity_id {in_orphans}
+            """)[0][0]
+
+        if dry_run:
+            return
+
+        self.execute(f"""
+            UPDATE anatomical_structure SET deprecated = s.deprecated
+            FROM bap_stage_structure s
+            WHERE anatomical_structure.id = s.id AND anatomical_structure.nomenclature_id = %s
+              AND anatomical_structure.deprecated {ne} s.deprecated
+        """, (nid,))
+        self.execute(f"""
+            UPDATE anatomical_structure_relationship SET notes = s.notes, deprecated = FALSE
+            FROM bap_stage_relationship s
+            WHERE s.entity1_id = anatomical_structure_relationship.entity1_id
+              AND s.entity2_id = anatomical_structure_relationship.entity2_id
+              AND s.relationship_type_id = anatomical_structure_relationship.relationship_type_id
+              AND (anatomical_structure_relationship.notes {ne} s.notes
+                   OR anatomical_structure_relationship.deprecated)
+        """)
+
+        stale_ids = [(rel_id,) for rel_id, *_ in stale_rels]
+        self.stage("bap_stage_stale_relationship", [("id", "BIGINT")], stale_ids)
+        if hard_delete:
+            self.execute("""
+                DELETE FROM anatomical_structure_relationship
+                WHERE id IN (SELECT id FROM bap_stage_stale_relationship)
+                   OR entity1_id IN (SELECT id FROM bap_stage_orphan)
+                   OR entity2_id IN (SELECT id FROM bap_stage_orphan)
+            """)
+            self.execute(f"""
+                DELETE FROM anatomical_structure_hierarchy
+                WHERE anatomical_entity_id {in_orphans} OR parent_entity_id {in_orphans}
+            """)
+            self.execute(f"DELETE FROM anatomical_structure WHERE id {in_orphans}")
+        else:
+            self.execute("""
+                UPDATE anatomical_structure_relationship SET deprecated = TRUE
+                WHERE id IN (SELECT id FROM bap_stage_stale_relationship)
+            """)
+            self.stage("bap_stage_orphan", [("id", "BIGINT")], orphan_ids)
+            self.execute("UPDATE anatomical_structure SET deprecated = TRUE WHERE id IN (SELECT id FROM bap_stage_orphan)")
+
+
+def get_relationship_type_map(conn) -> Dict[str, int]:
+    """Get relationship type name -> ID mapping."""
+    cur = conn.cursor()
+    cur.execute("SELECT id, name FROM relationship_type")
+    return {row[1].lower(): row[0] for row in cur.fetchall()}
+
+
+def run_bulk_sync(
+    conn,
+    yaml_structures: Dict[str, dict],
+    yaml_relationships: List[dict],
+    stats: SyncStats,
+    dry_run: bool = False,
+    nomenclature_id: int = 1,
+    full: bool = False,
+    reconcile: bool = False,
+    hard_delete: bool = False
+):
+    """
+    Sync structures, hierarchy and relationships in the caller's transaction.
+    The caller commits (or rolls back for a dry run). Unless dry_run, the
+    sync tables are set up and the digest journal folded first, each in a
+    transaction committed here.
+
+    Only rows whose content digest changed since the last sync are staged,
+    unless full or reconcile is set. reconcile also removes (soft, or hard
+    with hard_delete) what is no longer in the YAML.
+    """
+    full = full or reconcile
+    sync = BulkSync(conn, nomenclature_id)
+    local = compute_digests(yaml_structures, yaml_relationships)
+
+    old_rollups = sync.stored_rollups()
+    changed_files = {f for f in set(local.files) | set(old_rollups) if full or local.files.get(f) != old_rollups.get(f)}
+    if not changed_files:
+        print(f"Nothing changed since the last sync ({len(local.files)} files)")
+        stats.structures_unchanged += len(yaml_structures)
+        return
+
+    old_rows = sync.stored_rows(changed_files)
+    changed = {k for k, (file, digest) in local.rows.items()
+               if file in changed_files and (full or old_rows.get(k) != digest)}
+    removed = [k for k in old_rows if k not in local.rows]
+    print(f"Changed since the last sync: {len(changed_files)} file(s), {len(changed)} row(s)")
+
+    if not dry_run:
+        ensure_sync_tables(conn)
+        sync.fold_journal()
+        conn.commit()
+        if reconcile:
+            ensure_tombstone_columns(conn)
+    names = structure_names(yaml_structures)
+    rel_type_map = get_relationship_type_map(conn)
+
+    # Rows that can't sync keep no digest, so the next run retries them
+    failed = {
+        ("structure", bap_id) for bap_id, s in yaml_structures.items()
+        if s.get('parent') is not None and s['parent'] not in yaml_structures
+    }
+    failed.update(
+        ("relationship", relationship_key(rel)) for rel in yaml_relationships
+        if relationship_key(rel) and (
+            rel['subject'] not in yaml_structures or rel['object'] not in yaml_structures
+            or rel['predicate'].lower() not in rel_type_map
+        )
+    )
+
+    print("Syncing structures...")
+    structures = {bap_id: s for bap_id, s in yaml_structures.items() if ("structure", bap_id) in changed}
+    stats.structures_unchanged += len(yaml_structures) - len(structures)
+    sync.sync_structures(structure_rows(structures), stats, dry_run, count_orphans=full and not reconcile)
+    if not full:
+        stats.structures_orphaned += sum(1 for kind, _ in removed if kind == "structure")
+
+    print("Syncing hierarchies...")
+    changed_ids = {bap_id_to_db_id(bap_id) for bap_id in structures}
+    rows = [row for row in hierarchy_rows(yaml_structures, stats) if row[0] in changed_ids]
+    sync.sync_hierarchies(rows, names, stats, dry_run)
+
+    print("Syncing relationships...")
+    rows = relationship_rows(yaml_relationships, yaml_structures, rel_type_map, stats)
+    labels = relationship_labels(rows, names, rel_type_map)
+    changed_rels = {
+        (bap_id_to_db_id(rel['subject']), bap_id_to_db_id(rel['object']), rel_type_map[rel['predicate'].lower()])
+        for rel in yaml_relationships
+        if ("relationship", relationship_key(rel)) in changed - failed
+    }
+    sync.sync_relationships([row for row in rows if row[1:4] in changed_rels], labels, stats, dry_run)
+
+    if reconcile:
+        print("Reconciling removals and tombstones...")
+        sync.reconcile(stats, dry_run, hard_delete)
+
+    if not dry_run:
+        failed_files = {local.rows[k][0] for k in failed if k in local.rows}
+        upserts = [
+            (kind, key, file, digest) for (kind, key), (file, digest) in local.rows.items()
+            if file in changed_files and (kind, key) not in failed and old_rows.get((kind, key)) != digest
+        ]
+        gone = removed + [k for k in failed if k in old_rows]
+        sync.save_digests(upserts, gone)
+        rollups = [
+            (file, local.files[file] if file in local.files and file not in failed_files else None)
+            for file in sorted(changed_files)
+        ]
+        sync.journal_rollups([(file, digest) for file, digest in rollups if digest != old_rollups.get(file)])
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+BAP Async Database Sync
+
+asyncpg engine behind `sync_to_db.py --async`, for large loads. It gives the
+same result as the bulk sync in db_sync.py with full=True, but overlaps the
+work across a connection pool:
+
+1. The YAML rows are COPYed (binary protocol) into UNLOGGED staging
+   tables over several pooled connections at once: one stream for
+   structures, one for the hierarchy and one per relationship type.
+2. The diff queries that report what will change run concurrently, each
+   relationship type on its own connection.
+3. All changes are applied in a single transaction on one connection, sent
+   as one multi-statement script, i.e. one round trip.
+
+The staging tables have fixed names (bap_async_*) so every pooled
+connection can see them, and a run holds an advisory lock on one extra
+connection from start to finish. Async syncs therefore run one at a time,
+and a run can drop tables left behind by a killed one before creating its
+own: the lock is released when the dead run's connection closes.
+
+A dry run also takes the lock and creates and drops the staging tables,
+since the diff queries read them; it changes no other table.
+
+Every apply empties the digest tables in the same transaction: the digests
+describe the last bulk sync, and a later bulk sync that trusted them could
+skip rows this engine has since rewritten.
+
+The diff is printed before the apply transaction starts. If another
+writer (a psycopg2 sync, a hand edit) changes the tables in between, the
+apply acts on the database as it is then, and the printed diff and
+counts can differ from what was actually written.
+
+Digest skipping and --reconcile stay with the psycopg2 engine.
+
+Requires asyncpg (pip install asyncpg) and PostgreSQL.
+
+Usage:
+    from db_sync_async import sync_async
+
+    stats = SyncStats()
+    sync_async(yaml_structures, yaml_relationships, stats, dsn="postgresql://...")
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+try:
+    import asyncpg
+    HAS_ASYNCPG = True
+except ImportError:
+    asyncpg = None
+    HAS_ASYNCPG = False
+
+from db_sync import (
+    DIGEST_TABLES, HIERARCHY_COLUMNS, RELATIONSHIP_COLUMNS, SEQUENCE_LOCK_KEY, STRUCTURE_COLUMNS,
+    SyncStats, hierarchy_rows, pg_setup_statements, relationship_labels,
+    relationship_rows, structure_names, structure_rows
+)
+
+
+DEFAULT_POOL_SIZE = 4
+STAGING_LOCK_KEY = 0x424151  # pg advisory lock held for a whole async sync
+
+
+# ============================================================================
+# Staging
+# ============================================================================
+
+def _records(rows: List[tuple], columns) -> List[tuple]:
+    """Coerce values to the staging column types (binary COPY is strict)."""
+    text = [t == "TEXT" for _, t in columns]
+    return [
+        tuple(str(v) if is_text and v is not None else v for v, is_text in zip(row, text))
+        for row in rows
+    ]
+
+
+class StagingTables:
+    """UNLOGGED tables visible to every pooled connection; create() needs STAGING_LOCK_KEY held."""
+
+    def __init__(self):
+        self.structure = "bap_async_structure"
+        self.hierarchy = "bap_async_hierarchy"
+        self.relationship = "bap_async_relationship"
+        self.columns = {
+            self.structure: STRUCTURE_COLUMNS,
+            self.hierarchy: HIERARCHY_COLUMNS,
+            self.relationship: RELATIONSHIP_COLUMNS,
+        }
+
+    async def create(self, conn):
+        await self.drop(conn)  # Left over from a run that was killed
+        for table, columns in self.columns.items():
+            await conn.execute(
+                f"CREATE UNLOGGED TABLE {table} ({', '.join(f'{c} {t}' for c, t in columns)})"
+            )
+
+    async def drop(self, conn):
+        await conn.execute(f"DROP TABLE IF EXISTS {', '.join(self.columns)}")
+
+    async def load(self, pool, table: str, rows: List[tuple]):
+        if not rows:
+            return
+        columns = self.columns[table]
+        async with pool.acquire() as conn:
+            await conn.copy_records_to_table(
+                table, records=_records(rows, columns), columns=[c for c, _ in columns]
+            )
+
+
+# ============================================================================
+# Diff and Apply
+# ============================================================================
+
+def structure_changes(stage: str, nid: int) -> str:
+    return f"""
+        FROM {stage} s
+        LEFT JOIN anatomical_structure a ON a.id = s.id AND a.nomenclature_id = {nid}
+        WHERE a.id IS NULL
+           OR a.name IS DISTINCT FROM s.name OR a.abbreviation IS DISTINCT FROM s.abbreviation
+           OR a.description IS DISTINCT FROM s.description OR a.external_id IS DISTINCT FROM s.external_id
+    """
+
+
+def missing_relationships(stage: str) -> str:
+    return f"""
+        FROM {stage} s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM anatomical_structure_relationship r
+            WHERE r.entity1_id = s.entity1_id AND r.entity2_id = s.entity2_id
+              AND r.relationship_type_id = s.relationship_type_id
+        )
+    """
+
+
+def apply_script(tables: StagingTables, nid: int) -> str:
+    """Every write of the sync as one script (structures before the rows that reference them)."""
+    return f"""
+        INSERT INTO anatomical_structure
+        (id, nomenclature_id, name, abbreviation, description, external_id, iri)
+        SELECT s.id, {nid}, s.name, s.abbreviation, s.description, s.external_id, s.iri
+        {structure_changes(tables.structure, nid)}
+        ON CONFLICT (id) DO UPDATE SET
+            name = EXCLUDED.name,
+            abbreviation = EXCLUDED.abbreviation,
+            description = EXCLUDED.description,
+            external_id = EXCLUDED.external_id,
+            iri = EXCLUDED.iri;
+
+        UPDATE anatomical_structure_hierarchy SET parent_entity_id = s.parent_id
+        FROM {tables.hierarchy} s
+        WHERE anatomical_structure_hierarchy.anatomical_entity_id = s.child_id
+          AND anatomical_structure_hierarchy.parent_entity_id IS DISTINCT FROM s.parent_id;
+
+        INSERT INTO anatomical_structure_hierarchy (id, anatomical_entity_id, parent_entity_id)
+        SELECT nextval('anatomical_structure_hierarchy_id_seq'), s.child_id, s.parent_id
+        FROM {tables.hierarchy} s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM anatomical_structure_hierarchy h WHERE h.anatomical_entity_id = s.child_id
+        );
+
+        INSERT INTO anatomical_structure_relationship
+        (id, entity1_id, entity2_id, relationship_type_id, notes)
+        SELECT nextval('anatomical_structure_relationship_id_seq'),
+               s.entity1_id, s.entity2_id, s.relationship_type_id, s.notes
+        {missing_relationships(tables.relationship)}
+        ORDER BY s.ord;
+    """
+
+
+async def fetch(pool, sql: str, *args) -> list:
+    async with pool.acquire() as conn:
+        return await conn.fetch(sql, *args)
+
+
+async def ensure_sync_tables_async(conn):
+    """ensure_sync_tables() for an asyncpg connection (autocommit)."""
+    await conn.execute("SELECT pg_advisory_lock($1)", SEQUENCE_LOCK_KEY)
+    try:
+        for sql in pg_setup_statements():
+            await conn.execute(sql)
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", SEQUENCE_LOCK_KEY)
+
+
+# ============================================================================
+# Main Entry Points
+# ============================================================================
+
+async def run_async_sync(
+    yaml_structures: Dict[str, dict],
+    yaml_relationships: List[dict],
+    stats: SyncStats,
+    dry_run: bool = False,
+    nomenclature_id: int = 1,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    dsn: Optional[str] = None,
+    **connect_kwargs
+):
+    """Sync through a pool of pool_size connections (plus one holding the run lock); commits unless dry_run."""
+    if not HAS_ASYNCPG:
+        raise RuntimeError("asyncpg not installed. Run: pip install asyncpg")
+
+    nid = int(nomenclature_id)
+    names = structure_names(yaml_structures)
+    tables = StagingTables()
+
+    pool = await asyncpg.create_pool(dsn, min_size=1, max_size=max(pool_size, 1) + 1, **connect_kwargs)
+    try:
+        async with pool.acquire() as conn:
+            await conn.execute("SELECT pg_advisory_lock($1)", STAGING_LOCK_KEY)
+            try:
+                await _sync_locked(conn, pool, tables, yaml_structures, yaml_relationships,
+                                   stats, dry_run, nid, names)
+            finally:
+                await tables.drop(conn)
+                await conn.execute("SELECT pg_advisory_unlock($1)", STAGING_LOCK_KEY)
+    finally:
+        await pool.close()
+
+
+async def _sync_locked(conn, pool, tables: StagingTables, yaml_structures: Dict[str, dict],
+                       yaml_relationships: List[dict], stats: SyncStats, dry_run: bool,
+                       nid: int, names: Dict[int, str]):
+    """The body of run_async_sync, on conn while it holds STAGING_LOCK_KEY."""
+    if not dry_run:
+        await ensure_sync_tables_async(conn)
+    rel_type_map = {row["name"].lower(): row["id"] for row in await conn.fetch(
+        "SELECT id, name FROM relationship_type"
+    )}
+    await tables.create(conn)
+
+    rels = relationship_rows(yaml_relationships, yaml_structures, rel_type_map, stats)
+    labels = relationship_labels(rels, names, rel_type_map)
+    by_type: Dict[int, List[tuple]] = {}
+    for row in rels:
+        by_type.setdefault(row[3], []).append(row)
+
+    print("Staging rows...")
+    await asyncio.gather(
+        tables.load(pool, tables.structure, structure_rows(yaml_structures)),
+        tables.load(pool, tables.hierarchy, hierarchy_rows(yaml_structures, stats)),
+        *(tables.load(pool, tables.relationship, rows) for rows in by_type.values()),
+    )
+
+    print("Diffing...")
+    structure_diff, hierarchy_diff, *relationship_diffs = await asyncio.gather(
+        fetch(pool, f"SELECT s.id, s.name, a.id IS NULL AS is_new "
+                    f"{structure_changes(tables.structure, nid)} ORDER BY s.id"),
+        fetch(pool, f"""
+            SELECT s.child_id, s.parent_id, h.parent_entity_id, h.id IS NULL AS is_new
+            FROM {tables.hierarchy} s
+            LEFT JOIN anatomical_structure_hierarchy h ON h.anatomical_entity_id = s.child_id
+            WHERE h.id IS NULL OR h.parent_entity_id IS DISTINCT FROM s.parent_id
+            ORDER BY s.child_id
+        """),
+        *(
+            fetch(pool, f"SELECT s.ord {missing_relationships(tables.relationship)} "
+                        f"AND s.relationship_type_id = $1 ORDER BY s.ord", type_id)
+            for type_id in by_type
+        ),
+    )
+
+    for db_id, name, is_new in structure_diff:
+        if is_new:
+            print(f"    + ADD structure: {name} (ID:{db_id})")
+            stats.structures_added += 1
+        else:
+            print(f"    ~ UPDATE structure: {name} (ID:{db_id})")
+            stats.structures_updated += 1
+    stats.structures_unchanged += len(yaml_structures) - len(structure_diff)
+
+    for child_id, parent_id, old_parent, is_new in hierarchy_diff:
+        parent_name = names.get(parent_id, parent_id) if parent_id is not None else "(NULL - root node)"
+        if is_new:
+            print(f"    + ADD hierarchy: {names.get(child_id, child_id)} (ID:{child_id}) -> parent: {parent_name} (ID:{parent_id})")
+            stats.hierarchies_added += 1
+        else:
+            print(f"    ~ UPDATE hierarchy: {names.get(child_id, child_id)} (ID:{child_id}) -> parent: {parent_name} (ID:{parent_id}) [was: {old_parent}]")
+            stats.hierarchies_updated += 1
+
+    for record in sorted(r["ord"] for diff in relationship_diffs for r in diff):
+        print(f"    + ADD relationship: {labels[record]}")
+        stats.relationships_added += 1
+
+    if not dry_run:
+        print("Applying changes...")
+        async with conn.transaction():
+            await conn.execute(apply_script(tables, nid))
+            for table in DIGEST_TABLES:
+                await conn.execute(f"DELETE FROM {table}")
+
+
+def sync_async(*args, **kwargs):
+    """Blocking wrapper around run_async_sync."""
+    asyncio.run(run_async_sync(*args, **kwargs))
@@ -3,21 +3,35 @@
 Generate embeddings for all structures in the ontology.
 Run this locally whenever structures change.
 
+Runs are incremental: each structure's embedded text is hashed and stored
+with its row, and only new or changed structures are re-encoded. Deleted
+structures drop out of the store. The matrix is written under a
+content-addressed name and the metadata that points at it is replaced last,
+so readers never see a half-written store.
+
 Usage:
     pip install sentence-transformers
     python scripts/generate_embeddings.py
+    python scripts/generate_embeddings.py --full   # re-encode everything
+    python scripts/generate_embeddings.py --ann    # also build the ANN index
 """
 
+import os
 import json
+import hashlib
+import argparse
+import tempfile
+import importlib.util
 from pathlib import Path
-import yaml
-
-# Try to import sentence-transformers
-try:
-    from sentence_transformers import SentenceTransformer
-    HAS_EMBEDDINGS = True
-except ImportError:
-    HAS_EMBEDDINGS = False
+from typing import Callable
+import numpy as np
+import yaml_fast
+from ann_index import DEFAULT_NPROBE, IVFIndex
+from semantic_search import ANN_INDEX_FILE, METADATA_FILE, MODEL_NAME, get_model, load_embeddings, normalize
+
+# sentence-transformers is imported by semantic_search.get_model; only check it is installed
+HAS_EMBEDDINGS = importlib.util.find_spec("sentence_transformers") is not None
+if not HAS_EMBEDDINGS:
     print("Install sentence-transformers: pip install sentence-transformers")
 
 
@@ -26,9 +40,9 @@ def load_all_structures() -> list[dict]:
     structures = []
     structures_dir = Path('structures')
     
-    for yaml_file in structures_dir.glob('*.yaml'):
+    for yaml_file in sorted(structures_dir.glob('*.yaml')):
         with open(yaml_file) as f:
-            data = yaml.safe_load(f)
+            data = yaml_fast.safe_load(f)
             if data and 'structures' in data:
                 for struct in data['structures']:
                     structures.append({
@@ -42,43 +56,137 @@ def load_all_structures() -> list[dict]:
     return structures
 
 
-def generate_embeddings(structures: list[dict]) -> dict:
-    """Generate embeddings for all structures."""
-    if not HAS_EMBEDDINGS:
-        raise RuntimeError("sentence-transformers not installed")
+def embedding_text(struct: dict) -> str:
+    """Text embedded for a structure (name + definition for better matching)."""
+    text = struct['name']
+    if struct.get('definition'):
+        text += f" - {struct['definition']}"
+    return text
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def update_embeddings(
+    structures: list[dict],
+    encode: Callable[[list[str]], np.ndarray],
+    previous: dict | None = None
+) -> tuple[dict, np.ndarray, int]:
+    """
+    Build the store for structures, reusing rows from the previous store
+    whose text hash still matches. encode is only called for the rest.
+    
+    Returns (metadata, normalised matrix, number of structures encoded).
+    """
+    texts = [embedding_text(s) for s in structures]
+    hashes = [text_hash(t) for t in texts]
     
-    # Use a small, fast model
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+    reusable = {}
+    if previous is not None and previous.get('model') == MODEL_NAME and previous.get('matrix') is not None:
+        reusable = {s['hash']: row for row, s in enumerate(previous['structures']) if s.get('hash')}
     
-    # Create text for each structure (name + definition for better matching)
-    texts = []
-    for s in structures:
-        text = s['name']
-        if s.get('definition'):
-            text += f" - {s['definition']}"
-        texts.append(text)
+    rows = [reusable.get(h) for h in hashes]
+    todo = [i for i, row in enumerate(rows) if row is None]
+    kept = [i for i, row in enumerate(rows) if row is not None]
     
-    print(f"Generating embeddings for {len(texts)} structures...")
-    embeddings = model.encode(texts, show_progress_bar=True)
+    vectors = normalize(encode([texts[i] for i in todo])) if todo else None
+    if vectors is not None:
+        dim = vectors.shape[1]
+    elif previous is not None and previous.get('matrix') is not None:
+        dim = previous['matrix'].shape[1]
+    else:
+        dim = 0
     
-    # Build output
+    matrix = np.empty((len(structures), dim), dtype=np.float32)
+    if kept:
+        matrix[kept] = previous['matrix'][[rows[i] for i in kept]]
+    if todo:
+        matrix[todo] = vectors
+    
+    # Build output (row i of the matrix is structures[i])
     result = {
-        'model': 'all-MiniLM-L6-v2',
+        'model': MODEL_NAME,
+        'dim': int(dim),
         'structures': []
     }
     
-    for i, struct in enumerate(structures):
+    for struct, digest in zip(structures, hashes):
         result['structures'].append({
             'id': struct['id'],
             'name': struct['name'],
             'definition': struct.get('definition', ''),
-            'embedding': embeddings[i].tolist()
+            'hash': digest
         })
     
-    return result
+    return result, matrix, len(todo)
+
+
+def generate_embeddings(structures: list[dict], previous: dict | None = None) -> tuple[dict, np.ndarray, int]:
+    """Generate embeddings for new or changed structures. See update_embeddings()."""
+    if not HAS_EMBEDDINGS:
+        raise RuntimeError("sentence-transformers not installed")
+    
+    def encode(texts: list[str]) -> np.ndarray:
+        print(f"Generating embeddings for {len(texts)} structures...")
+        return get_model(MODEL_NAME).encode(texts, show_progress_bar=True)
+    
+    return update_embeddings(structures, encode, previous)
+
+
+def _write_atomic(path: Path, write: Callable):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def save_embeddings(data: dict, matrix: np.ndarray, metadata_file: Path = METADATA_FILE) -> bool:
+    """
+    Write the store. The matrix file name is derived from its content and the
+    metadata (which names it) is replaced last. Returns False if nothing changed.
+    """
+    directory = metadata_file.parent
+    directory.mkdir(exist_ok=True)
+    
+    digest = hashlib.sha256(MODEL_NAME.encode('utf-8'))
+    for struct in data['structures']:
+        digest.update(struct['hash'].encode('ascii'))
+    matrix_file = f"{metadata_file.stem}.{digest.hexdigest()[:12]}.npy"
+    data['matrix_file'] = matrix_file
+    
+    changed = False
+    if not (directory / matrix_file).exists():
+        _write_atomic(directory / matrix_file, lambda f: np.save(f, matrix))
+        changed = True
+    
+    text = json.dumps(data).encode('utf-8')
+    if not metadata_file.exists() or metadata_file.read_bytes() != text:
+        _write_atomic(metadata_file, lambda f: f.write(text))
+        changed = True
+    
+    # Matrices no longer referenced (including a pre-incremental embeddings.npy)
+    for stale in directory.glob(f"{metadata_file.stem}*.npy"):
+        if stale.name != matrix_file:
+            stale.unlink()
+    
+    return changed
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate structure embeddings")
+    parser.add_argument("--full", action="store_true", help="Re-encode every structure")
+    parser.add_argument("--ann", action="store_true",
+                        help=f"Build the IVF index too (kept up to date once {ANN_INDEX_FILE} exists)")
+    parser.add_argument("--nlist", type=int, help="IVF lists (default: about sqrt(structures))")
+    parser.add_argument("--nprobe", type=int,
+                        help=f"Lists searched per query; higher means better recall (default: {DEFAULT_NPROBE})")
+    args = parser.parse_args()
+    
     if not HAS_EMBEDDINGS:
         print("ERROR: Install sentence-transformers first:")
         print("  pip install sentence-transformers")
@@ -88,17 +196,30 @@ def main():
     structures = load_all_structures()
     print(f"Found {len(structures)} structures")
     
-    print("\nGenerating embeddings...")
-    data = generate_embeddings(structures)
+    previous = None if args.full else load_embeddings()
     
-    output_file = Path('data/embeddings.json')
-    output_file.parent.mkdir(exist_ok=True)
+    print("\nGenerating embeddings...")
+    data, matrix, encoded = generate_embeddings(structures, previous)
+    print(f"Encoded {encoded}, reused {len(structures) - encoded}")
     
-    with open(output_file, 'w') as f:
-        json.dump(data, f)
+    if not save_embeddings(data, matrix):
+        print(f"\n✅ {METADATA_FILE} already up to date")
+    else:
+        size = METADATA_FILE.stat().st_size + (METADATA_FILE.parent / data['matrix_file']).stat().st_size
+        print(f"\n✅ Saved to {METADATA_FILE.parent / data['matrix_file']} and {METADATA_FILE}")
+        print(f"   File size: {size / 1024:.1f} KB")
     
-    print(f"\n✅ Saved to {output_file}")
-    print(f"   File size: {output_file.stat().st_size / 1024:.1f} KB")
+    if (args.ann or ANN_INDEX_FILE.exists()) and len(matrix):
+        index = IVFIndex.load(ANN_INDEX_FILE)
+        if index is None or index.matrix_file != data['matrix_file'] or args.nlist:
+            print("\nBuilding ANN index...")
+            index = IVFIndex.build(matrix, nlist=args.nlist, matrix_file=data['matrix_file'])
+        elif args.nprobe in (None, index.nprobe):
+            return
+        if args.nprobe:
+            index.nprobe = args.nprobe
+        index.save(ANN_INDEX_FILE)
+        print(f"✅ Saved {index.nlist} lists (nprobe {index.nprobe}) to {ANN_INDEX_FILE}")
 
 
 if __name__ == '__main__':
@@ -2,19 +2,39 @@
 """
 BAP OWL Generator
 
-Generates OWL/RDF XML files from YAML structure and relationship definitions.
+Generates OWL/RDF XML files from YAML structure and relationship definitions,
+and optionally OBO 1.4, OBOGraph JSON, JSON-LD, Turtle and N-Triples from the
+same pass over the classes.
 
 Usage:
     python scripts/generate_owl.py --output bap-mousehead.owl
+    python scripts/generate_owl.py --validate -f owl -f turtle -f ntriples
+    python scripts/generate_owl.py --jobs 8
+    python scripts/generate_owl.py -f owl -f obo -f obograph -f jsonld
+
+Rendered class blocks are cached per format under .cache/owl/, keyed by a
+hash of each structure record and its outgoing relationships, so a rebuild
+only renders the classes that changed. --no-cache (or BAP_NO_CACHE=1)
+renders everything.
 """
 
+import io
+import os
 import sys
+import json
+import pickle
+import shutil
+import hashlib
 import argparse
+import tempfile
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from dataclasses import dataclass, field
+from xml.etree import ElementTree as ET
 
-import yaml
+from ontology import load_ontology, CACHE_DIRNAME, CACHE_ENABLED
 
 
 # ============================================================================
@@ -54,52 +74,33 @@ OBO_RELATIONS = {
 # IAO annotation property
 IAO_DEFINITION = 'http://purl.obolibrary.org/obo/IAO_0000115'
 
+ANNOTATION_PROPERTIES = [
+    IAO_DEFINITION,
+    'http://purl.org/dc/terms/description',
+    'http://purl.org/dc/terms/title',
+    'http://purl.org/dc/terms/license',
+]
+
 # Ontology metadata
 BASE_IRI = "http://purl.obolibrary.org/obo/bap.owl"
 TITLE = "BAP Mouse Head Atlas"
 DESCRIPTION = "Brain Architecture Project Mouse Head Anatomical Atlas"
 VERSION = "1.0.0"
+LICENSE = "https://creativecommons.org/licenses/by/4.0/"
 
 
 # ============================================================================
 # Data Loading
 # ============================================================================
 
-def load_yaml_files(directory: Path) -> List[dict]:
-    """Load all YAML files from a directory."""
-    data = []
-    if not directory.exists():
-        return data
-    
-    for filepath in sorted(directory.glob("*.yaml")):
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
-                if content:
-                    data.append(content)
-        except Exception as e:
-            print(f"Warning: Failed to load {filepath}: {e}")
-    
-    return data
-
-
 def load_all_structures() -> Dict[str, dict]:
     """Load all structures from YAML files."""
-    structures = {}
-    for data in load_yaml_files(STRUCTURES_DIR):
-        for struct in data.get("structures", []):
-            if "id" in struct:
-                structures[struct["id"]] = struct
-    return structures
+    return dict(load_ontology(ROOT_DIR).structures)
 
 
 def load_all_relationships() -> List[dict]:
     """Load all relationships from YAML files."""
-    relationships = []
-    for data in load_yaml_files(RELATIONSHIPS_DIR):
-        rels = data.get("relationships") or []  # Handle None case
-        relationships.extend([r for r in rels if r is not None])
-    return relationships
+    return list(load_ontology(ROOT_DIR).relationships)
 
 
 # ============================================================================
@@ -129,8 +130,71 @@ def get_relation_iri(predicate: str) -> str:
     return OBO_RELATIONS.get(predicate, f"{BASE_IRI}#{predicate}")
 
 
-def generate_owl(structures: Dict[str, dict], relationships: List[dict]) -> str:
-    """Generate complete OWL/RDF XML document."""
+# ============================================================================
+# Class Records
+# ============================================================================
+
+@dataclass
+class OwlClass:
+    """Everything the writers need for one structure, resolved once."""
+    id: str
+    label: str
+    parent: Optional[str] = None
+    definition: Optional[str] = None
+    abbreviation: Optional[str] = None
+    # (predicate, object ID) existential restrictions, in relationship file order
+    restrictions: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def iri(self) -> str:
+        return bap_id_to_iri(self.id)
+
+
+def build_rel_lookup(relationships: List[dict]) -> Dict[str, List[dict]]:
+    """Relationships grouped by subject."""
+    rel_lookup: Dict[str, List[dict]] = {}
+    for rel in relationships:
+        subject = rel.get("subject")
+        if subject:
+            if subject not in rel_lookup:
+                rel_lookup[subject] = []
+            rel_lookup[subject].append(rel)
+    return rel_lookup
+
+
+def make_class(struct_id: str, structures: Dict[str, dict], rel_lookup: Dict[str, List[dict]]) -> OwlClass:
+    """Resolve a structure's parent and restrictions against the loaded ontology."""
+    struct = structures[struct_id]
+    parent = struct.get("parent")
+    restrictions = []
+    for rel in rel_lookup.get(struct_id, ()):
+        predicate = rel.get("predicate")
+        obj = rel.get("object")
+        if predicate and obj and obj in structures:
+            restrictions.append((predicate, obj))
+    return OwlClass(
+        id=struct_id,
+        label=struct.get("name", struct_id),
+        parent=parent if parent and parent in structures else None,
+        definition=struct.get("definition") or None,
+        abbreviation=struct.get("abbreviation") or None,
+        restrictions=restrictions,
+    )
+
+
+def iter_classes(structures: Dict[str, dict], relationships: List[dict]) -> Iterator[OwlClass]:
+    """Every structure as an OwlClass, in ID order."""
+    rel_lookup = build_rel_lookup(relationships)
+    for struct_id in sorted(structures.keys()):
+        yield make_class(struct_id, structures, rel_lookup)
+
+
+# ============================================================================
+# RDF/XML
+# ============================================================================
+
+def owl_header() -> str:
+    """Everything before the first class: namespaces, ontology metadata, properties."""
     lines = []
     
     # XML declaration
@@ -148,16 +212,14 @@ def generate_owl(structures: Dict[str, dict], relationships: List[dict]) -> str:
     lines.append(f'        <dcterms:title>{escape_xml(TITLE)}</dcterms:title>')
     lines.append(f'        <dcterms:description>{escape_xml(DESCRIPTION)}</dcterms:description>')
     lines.append(f'        <owl:versionInfo>{VERSION}</owl:versionInfo>')
-    lines.append('        <dcterms:license rdf:resource="https://creativecommons.org/licenses/by/4.0/"/>')
+    lines.append(f'        <dcterms:license rdf:resource="{LICENSE}"/>')
     lines.append('    </owl:Ontology>')
     lines.append('')
     
     # Annotation properties
     lines.append('    <!-- Annotation Properties -->')
-    lines.append(f'    <owl:AnnotationProperty rdf:about="{IAO_DEFINITION}"/>')
-    lines.append('    <owl:AnnotationProperty rdf:about="http://purl.org/dc/terms/description"/>')
-    lines.append('    <owl:AnnotationProperty rdf:about="http://purl.org/dc/terms/title"/>')
-    lines.append('    <owl:AnnotationProperty rdf:about="http://purl.org/dc/terms/license"/>')
+    for iri in ANNOTATION_PROPERTIES:
+        lines.append(f'    <owl:AnnotationProperty rdf:about="{iri}"/>')
     lines.append('')
     
     # Object properties
@@ -168,70 +230,724 @@ def generate_owl(structures: Dict[str, dict], relationships: List[dict]) -> str:
         lines.append('    </owl:ObjectProperty>')
         lines.append('')
     
-    # Build relationship lookup
-    rel_lookup: Dict[str, List[dict]] = {}
-    for rel in relationships:
-        subject = rel.get("subject")
-        if subject:
-            if subject not in rel_lookup:
-                rel_lookup[subject] = []
-            rel_lookup[subject].append(rel)
-    
     # Classes (structures)
     lines.append('    <!-- Classes (Anatomical Structures) -->')
     lines.append('')
     
-    for struct_id in sorted(structures.keys()):
-        struct = structures[struct_id]
-        iri = bap_id_to_iri(struct_id)
-        
-        lines.append(f'    <!-- {iri} -->')
-        lines.append(f'    <owl:Class rdf:about="{iri}">')
-        
-        # Parent (subClassOf)
-        parent = struct.get("parent")
-        if parent and parent in structures:
-            parent_iri = bap_id_to_iri(parent)
-            lines.append(f'        <rdfs:subClassOf rdf:resource="{parent_iri}"/>')
-        
-        # Relationships as existential restrictions
-        if struct_id in rel_lookup:
-            for rel in rel_lookup[struct_id]:
-                predicate = rel.get("predicate")
-                obj = rel.get("object")
-                if predicate and obj and obj in structures:
-                    rel_iri = get_relation_iri(predicate)
-                    obj_iri = bap_id_to_iri(obj)
-                    lines.append('        <rdfs:subClassOf>')
-                    lines.append('            <owl:Restriction>')
-                    lines.append(f'                <owl:onProperty rdf:resource="{rel_iri}"/>')
-                    lines.append(f'                <owl:someValuesFrom rdf:resource="{obj_iri}"/>')
-                    lines.append('            </owl:Restriction>')
-                    lines.append('        </rdfs:subClassOf>')
-        
-        # Definition
-        definition = struct.get("definition")
-        if definition:
-            lines.append(f'        <obo:IAO_0000115 xml:lang="en">{escape_xml(definition)}</obo:IAO_0000115>')
-        
-        # Label
-        name = struct.get("name", struct_id)
-        lines.append(f'        <rdfs:label xml:lang="en">{escape_xml(name)}</rdfs:label>')
-        
-        # Abbreviation
-        abbrev = struct.get("abbreviation")
-        if abbrev:
-            lines.append(f'        <obo:IAO_0000111>{escape_xml(abbrev)}</obo:IAO_0000111>')
-        
-        lines.append('    </owl:Class>')
-        lines.append('')
+    return ''.join(line + '\n' for line in lines)
+
+
+def render_owl_class(cls: OwlClass) -> str:
+    """One owl:Class block, followed by a blank line."""
+    lines = []
     
-    lines.append('</rdf:RDF>')
-    lines.append('')
-    lines.append('<!-- Generated by BAP Ontology Generator -->')
+    lines.append(f'    <!-- {cls.iri} -->')
+    lines.append(f'    <owl:Class rdf:about="{cls.iri}">')
+    
+    # Parent (subClassOf)
+    if cls.parent:
+        lines.append(f'        <rdfs:subClassOf rdf:resource="{bap_id_to_iri(cls.parent)}"/>')
+    
+    # Relationships as existential restrictions
+    for predicate, obj in cls.restrictions:
+        lines.append('        <rdfs:subClassOf>')
+        lines.append('            <owl:Restriction>')
+        lines.append(f'                <owl:onProperty rdf:resource="{get_relation_iri(predicate)}"/>')
+        lines.append(f'                <owl:someValuesFrom rdf:resource="{bap_id_to_iri(obj)}"/>')
+        lines.append('            </owl:Restriction>')
+        lines.append('        </rdfs:subClassOf>')
+    
+    # Definition
+    if cls.definition:
+        lines.append(f'        <obo:IAO_0000115 xml:lang="en">{escape_xml(cls.definition)}</obo:IAO_0000115>')
+    
+    # Label
+    lines.append(f'        <rdfs:label xml:lang="en">{escape_xml(cls.label)}</rdfs:label>')
+    
+    # Abbreviation
+    if cls.abbreviation:
+        lines.append(f'        <obo:IAO_0000111>{escape_xml(cls.abbreviation)}</obo:IAO_0000111>')
+    
+    lines.append('    </owl:Class>')
     lines.append('')
     
-    return '\n'.join(lines)
+    return ''.join(line + '\n' for line in lines)
+
+
+def owl_footer() -> str:
+    return '</rdf:RDF>\n\n<!-- Generated by BAP Ontology Generator -->\n'
+
+
+def generate_owl(structures: Dict[str, dict], relationships: List[dict]) -> str:
+    """Generate complete OWL/RDF XML document."""
+    buffer = io.StringIO()
+    export(structures, relationships, [OwlXmlSink(buffer)])
+    return buffer.getvalue()
+
+
+# ============================================================================
+# N-Triples and Turtle
+# ============================================================================
+
+def rdf_literal(text: str, lang: Optional[str] = None) -> str:
+    """A quoted N-Triples / Turtle string literal."""
+    escaped = (str(text)
+               .replace('\\', '\\\\')
+               .replace('"', '\\"')
+               .replace('\n', '\\n')
+               .replace('\r', '\\r'))
+    return f'"{escaped}"@{lang}' if lang else f'"{escaped}"'
+
+
+def header_triples() -> List[Tuple[str, str, str]]:
+    """The ontology, annotation property and object property statements."""
+    rdf, rdfs, owl, dcterms = (NAMESPACES[p] for p in ('rdf', 'rdfs', 'owl', 'dcterms'))
+    triples = [
+        (BASE_IRI, f"{rdf}type", f"<{owl}Ontology>"),
+        (BASE_IRI, f"{dcterms}title", rdf_literal(TITLE)),
+        (BASE_IRI, f"{dcterms}description", rdf_literal(DESCRIPTION)),
+        (BASE_IRI, f"{owl}versionInfo", rdf_literal(VERSION)),
+        (BASE_IRI, f"{dcterms}license", f"<{LICENSE}>"),
+    ]
+    for iri in ANNOTATION_PROPERTIES:
+        triples.append((iri, f"{rdf}type", f"<{owl}AnnotationProperty>"))
+    for name, iri in sorted(OBO_RELATIONS.items()):
+        triples.append((iri, f"{rdf}type", f"<{owl}ObjectProperty>"))
+        triples.append((iri, f"{rdfs}label", rdf_literal(name.replace("_", " "))))
+    return triples
+
+
+def class_triples(cls: OwlClass) -> List[Tuple[str, str, str]]:
+    """
+    (subject, predicate IRI, object term) statements for one class. Subjects
+    and predicates are bare IRIs or _: blank nodes; objects are ready-made
+    terms. Blank node labels derive from the class ID, so they are unique and
+    stable across runs.
+    """
+    rdf, rdfs, owl, obo = (NAMESPACES[p] for p in ('rdf', 'rdfs', 'owl', 'obo'))
+    iri = cls.iri
+    triples = [(iri, f"{rdf}type", f"<{owl}Class>")]
+    if cls.parent:
+        triples.append((iri, f"{rdfs}subClassOf", f"<{bap_id_to_iri(cls.parent)}>"))
+    for i, (predicate, obj) in enumerate(cls.restrictions, 1):
+        node = f"_:{cls.id}_r{i}"
+        triples.append((iri, f"{rdfs}subClassOf", node))
+        triples.append((node, f"{rdf}type", f"<{owl}Restriction>"))
+        triples.append((node, f"{owl}onProperty", f"<{get_relation_iri(predicate)}>"))
+        triples.append((node, f"{owl}someValuesFrom", f"<{bap_id_to_iri(obj)}>"))
+    if cls.definition:
+        triples.append((iri, IAO_DEFINITION, rdf_literal(cls.definition, 'en')))
+    triples.append((iri, f"{rdfs}label", rdf_literal(cls.label, 'en')))
+    if cls.abbreviation:
+        triples.append((iri, f"{obo}IAO_0000111", rdf_literal(cls.abbreviation)))
+    return triples
+
+
+def render_ntriples(triples: List[Tuple[str, str, str]]) -> str:
+    return ''.join(
+        f"{s if s.startswith('_:') else f'<{s}>'} <{p}> {o} .\n"
+        for s, p, o in triples
+    )
+
+
+# Prefixes declared in Turtle and JSON-LD output
+RDF_PREFIXES = ['rdf', 'rdfs', 'owl', 'xsd', 'obo', 'dcterms']
+
+
+def turtle_term(term: str) -> str:
+    """Shorten an IRI (bare or <...>) to prefix:local where that is valid Turtle."""
+    if term.startswith(('"', '_:')):
+        return term
+    iri = term[1:-1] if term.startswith('<') else term
+    for prefix in RDF_PREFIXES:
+        namespace = NAMESPACES[prefix]
+        local = iri[len(namespace):]
+        if iri.startswith(namespace) and local and local.replace('_', 'a').isalnum():
+            return f"{prefix}:{local}"
+    return f"<{iri}>"
+
+
+def turtle_header() -> str:
+    lines = [f"@prefix {prefix}: <{NAMESPACES[prefix]}> ." for prefix in RDF_PREFIXES]
+    lines.append('')
+    return ''.join(line + '\n' for line in lines) + render_turtle(header_triples())
+
+
+def render_turtle(triples: List[Tuple[str, str, str]]) -> str:
+    """Turtle for statements, one block per subject in order of first appearance."""
+    by_subject: Dict[str, List[str]] = {}
+    for s, p, o in triples:
+        predicate = 'a' if p == f"{NAMESPACES['rdf']}type" else turtle_term(p)
+        by_subject.setdefault(s, []).append(f"{predicate} {turtle_term(o)}")
+    return ''.join(
+        f"{turtle_term(subject)} " + " ;\n    ".join(parts) + " .\n\n"
+        for subject, parts in by_subject.items()
+    )
+
+
+# ============================================================================
+# OBO, OBOGraph and JSON-LD
+# ============================================================================
+
+def obo_id(bap_id: str) -> str:
+    """BAP_0001234 -> BAP:0001234"""
+    return bap_id.replace('_', ':', 1)
+
+
+def obo_quoted(text: str) -> str:
+    escaped = str(text).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'"{escaped}"'
+
+
+def obo_value(text: str) -> str:
+    """An unquoted OBO tag value ('!' would start a comment)."""
+    return str(text).replace('\\', '\\\\').replace('\n', '\\n').replace('!', '\\!')
+
+
+def obo_header() -> str:
+    lines = [
+        'format-version: 1.4',
+        f'data-version: {VERSION}',
+        'ontology: bap',
+        f'property_value: {NAMESPACES["dcterms"]}title {obo_quoted(TITLE)} xsd:string',
+        f'property_value: {NAMESPACES["dcterms"]}description {obo_quoted(DESCRIPTION)} xsd:string',
+        f'property_value: {NAMESPACES["dcterms"]}license {LICENSE}',
+        '',
+    ]
+    return ''.join(line + '\n' for line in lines)
+
+
+def render_obo_term(cls: OwlClass) -> str:
+    """One [Term] stanza, followed by a blank line."""
+    lines = [
+        '[Term]',
+        f'id: {obo_id(cls.id)}',
+        f'name: {obo_value(cls.label)}',
+    ]
+    if cls.definition:
+        lines.append(f'def: {obo_quoted(cls.definition)} []')
+    if cls.abbreviation:
+        lines.append(f'property_value: IAO:0000111 {obo_quoted(cls.abbreviation)} xsd:string')
+    if cls.parent:
+        lines.append(f'is_a: {obo_id(cls.parent)}')
+    for predicate, obj in cls.restrictions:
+        lines.append(f'relationship: {predicate} {obo_id(obj)}')
+    lines.append('')
+    return ''.join(line + '\n' for line in lines)
+
+
+def obo_footer() -> str:
+    """[Typedef] stanzas for the OBO relations."""
+    lines = []
+    for name, iri in sorted(OBO_RELATIONS.items()):
+        lines.append('[Typedef]')
+        lines.append(f'id: {name}')
+        lines.append(f'name: {name.replace("_", " ")}')
+        lines.append(f'xref: {obo_id(iri.rsplit("/", 1)[1])}')
+        lines.append('')
+    return ''.join(line + '\n' for line in lines)
+
+
+def compact_iri(iri: str) -> str:
+    """prefix:local for IRIs in one of the declared namespaces."""
+    for prefix in RDF_PREFIXES:
+        namespace = NAMESPACES[prefix]
+        if iri.startswith(namespace) and len(iri) > len(namespace):
+            return f"{prefix}:{iri[len(namespace):]}"
+    return iri
+
+
+def obograph_header() -> str:
+    """Opens the graph and its nodes array, starting with the object properties."""
+    meta = {
+        "basicPropertyValues": [
+            {"pred": f"{NAMESPACES['dcterms']}title", "val": TITLE},
+            {"pred": f"{NAMESPACES['dcterms']}description", "val": DESCRIPTION},
+            {"pred": f"{NAMESPACES['dcterms']}license", "val": LICENSE},
+            {"pred": f"{NAMESPACES['owl']}versionInfo", "val": VERSION},
+        ]
+    }
+    properties = [
+        {"id": iri, "lbl": name.replace("_", " "), "type": "PROPERTY"}
+        for name, iri in sorted(OBO_RELATIONS.items())
+    ]
+    return (
+        '{\n  "graphs": [{\n'
+        f'    "id": {json.dumps(BASE_IRI)},\n'
+        f'    "meta": {json.dumps(meta, ensure_ascii=False)},\n'
+        '    "nodes": [\n      '
+        + ',\n      '.join(json.dumps(node) for node in properties)
+    )
+
+
+def render_obograph(cls: OwlClass) -> Tuple[str, str]:
+    """The class node and its edges, each item preceded by a comma."""
+    node = {"id": cls.iri, "lbl": cls.label, "type": "CLASS"}
+    meta = {}
+    if cls.definition:
+        meta["definition"] = {"val": cls.definition}
+    if cls.abbreviation:
+        meta["basicPropertyValues"] = [{"pred": f"{NAMESPACES['obo']}IAO_0000111", "val": cls.abbreviation}]
+    if meta:
+        node["meta"] = meta
+    edges = []
+    if cls.parent:
+        edges.append({"sub": cls.iri, "pred": "is_a", "obj": bap_id_to_iri(cls.parent)})
+    for predicate, obj in cls.restrictions:
+        edges.append({"sub": cls.iri, "pred": get_relation_iri(predicate), "obj": bap_id_to_iri(obj)})
+    return (
+        ',\n      ' + json.dumps(node, ensure_ascii=False),
+        ''.join(',\n      ' + json.dumps(edge) for edge in edges),
+    )
+
+
+def jsonld_header() -> str:
+    """The context, then the @graph array opened with the ontology and its properties."""
+    context = {prefix: NAMESPACES[prefix] for prefix in RDF_PREFIXES}
+    nodes = [{
+        "@id": BASE_IRI,
+        "@type": "owl:Ontology",
+        "dcterms:title": TITLE,
+        "dcterms:description": DESCRIPTION,
+        "owl:versionInfo": VERSION,
+        "dcterms:license": {"@id": LICENSE},
+    }]
+    for iri in ANNOTATION_PROPERTIES:
+        nodes.append({"@id": compact_iri(iri), "@type": "owl:AnnotationProperty"})
+    for name, iri in sorted(OBO_RELATIONS.items()):
+        nodes.append({"@id": compact_iri(iri), "@type": "owl:ObjectProperty", "rdfs:label": name.replace("_", " ")})
+    return (
+        f'{{\n  "@context": {json.dumps(context)},\n'
+        '  "@graph": [\n    '
+        + ',\n    '.join(json.dumps(node, ensure_ascii=False) for node in nodes)
+    )
+
+
+def render_jsonld(cls: OwlClass) -> str:
+    """One class node, restrictions as embedded blank nodes, preceded by a comma."""
+    node = {"@id": compact_iri(cls.iri), "@type": "owl:Class"}
+    superclasses = []
+    if cls.parent:
+        superclasses.append({"@id": compact_iri(bap_id_to_iri(cls.parent))})
+    for predicate, obj in cls.restrictions:
+        superclasses.append({
+            "@type": "owl:Restriction",
+            "owl:onProperty": {"@id": compact_iri(get_relation_iri(predicate))},
+            "owl:someValuesFrom": {"@id": compact_iri(bap_id_to_iri(obj))},
+        })
+    if superclasses:
+        node["rdfs:subClassOf"] = superclasses
+    if cls.definition:
+        node["obo:IAO_0000115"] = {"@value": cls.definition, "@language": "en"}
+    node["rdfs:label"] = {"@value": cls.label, "@language": "en"}
+    if cls.abbreviation:
+        node["obo:IAO_0000111"] = cls.abbreviation
+    return ',\n    ' + json.dumps(node, ensure_ascii=False)
+
+
+# ============================================================================
+# Writers
+# ============================================================================
+
+class Sink:
+    """
+    One output format. begin(), then write() of each class block in order,
+    then end(). render_class() is pure, so blocks can be rendered anywhere
+    (see render_shard) and written later.
+    """
+    suffix = ""
+
+    def __init__(self, out: TextIO):
+        self.out = out
+
+    @staticmethod
+    def render_class(cls: OwlClass) -> str:
+        raise NotImplementedError
+
+    @staticmethod
+    def join(blocks: list) -> str:
+        """Concatenate rendered class blocks (see render_shard)."""
+        return ''.join(blocks)
+
+    def header(self) -> str:
+        return ""
+
+    def footer(self) -> str:
+        return ""
+
+    def write(self, text: str):
+        self.out.write(text)
+
+    def begin(self):
+        self.write(self.header())
+
+    def write_class(self, cls: OwlClass):
+        self.write(self.render_class(cls))
+
+    def end(self):
+        self.write(self.footer())
+
+
+class OwlXmlSink(Sink):
+    """RDF/XML. With validate=True the output is parsed as it is written."""
+    suffix = ".owl"
+    render_class = staticmethod(render_owl_class)
+
+    def __init__(self, out: TextIO, validate: bool = False):
+        super().__init__(out)
+        self.parser = XmlStreamValidator() if validate else None
+
+    def header(self) -> str:
+        return owl_header()
+
+    def footer(self) -> str:
+        return owl_footer()
+
+    def write(self, text: str):
+        self.out.write(text)
+        if self.parser:
+            self.parser.feed(text)
+
+    def end(self):
+        super().end()
+        if self.parser:
+            self.parser.close()
+
+
+class NTriplesSink(Sink):
+    """N-Triples, one statement per line (bulk-loadable by triple stores)."""
+    suffix = ".nt"
+
+    @staticmethod
+    def render_class(cls: OwlClass) -> str:
+        return render_ntriples(class_triples(cls))
+
+    def header(self) -> str:
+        return render_ntriples(header_triples())
+
+
+class TurtleSink(Sink):
+    """Turtle with the usual prefixes, one block per class."""
+    suffix = ".ttl"
+
+    @staticmethod
+    def render_class(cls: OwlClass) -> str:
+        return render_turtle(class_triples(cls))
+
+    def header(self) -> str:
+        return turtle_header()
+
+
+class OboSink(Sink):
+    """OBO 1.4 flat file: [Term] stanzas, then [Typedef] stanzas for the relations."""
+    suffix = ".obo"
+    render_class = staticmethod(render_obo_term)
+
+    def header(self) -> str:
+        return obo_header()
+
+    def footer(self) -> str:
+        return obo_footer()
+
+
+class OboGraphSink(Sink):
+    """
+    OBOGraph JSON. Nodes are written as they come; edges, which go in a
+    separate array after them, are spooled to a temporary file meanwhile.
+    """
+    suffix = ".json"
+    render_class = staticmethod(render_obograph)
+
+    def __init__(self, out: TextIO):
+        super().__init__(out)
+        self.edges = tempfile.TemporaryFile('w+', encoding='utf-8')
+
+    @staticmethod
+    def join(blocks: list) -> Tuple[str, str]:
+        return ''.join(node for node, _ in blocks), ''.join(edges for _, edges in blocks)
+
+    def write(self, block: Tuple[str, str]):
+        nodes, edges = block
+        self.out.write(nodes)
+        self.edges.write(edges)
+
+    def begin(self):
+        self.out.write(obograph_header())
+
+    def end(self):
+        self.out.write('\n    ],\n    "edges": [')
+        self.edges.seek(0)
+        # Every edge starts with a comma; drop the first one
+        if self.edges.read(1) == ',':
+            shutil.copyfileobj(self.edges, self.out)
+            self.out.write('\n    ')
+        self.edges.close()
+        self.out.write(']\n  }]\n}\n')
+
+
+class JsonLdSink(Sink):
+    """JSON-LD: one node per class in a single @graph, prefixes in the context."""
+    suffix = ".jsonld"
+    render_class = staticmethod(render_jsonld)
+
+    def header(self) -> str:
+        return jsonld_header()
+
+    def footer(self) -> str:
+        return '\n  ]\n}\n'
+
+
+SINKS = {
+    "owl": OwlXmlSink,
+    "ntriples": NTriplesSink,
+    "turtle": TurtleSink,
+    "obo": OboSink,
+    "obograph": OboGraphSink,
+    "jsonld": JsonLdSink,
+}
+
+
+class XmlStreamValidator:
+    """
+    Incremental well-formedness check (the push-parser form of iterparse).
+    Finished top-level elements are dropped, so memory stays flat.
+    """
+
+    def __init__(self):
+        self.parser = ET.XMLPullParser(events=("start", "end"))
+        self.root = None
+        self.depth = 0
+
+    def feed(self, text: str):
+        self.parser.feed(text)
+        self._drain()
+
+    def close(self):
+        self.parser.close()
+        self._drain()
+
+    def _drain(self):
+        for event, elem in self.parser.read_events():
+            if event == "start":
+                if self.root is None:
+                    self.root = elem
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if self.depth == 1:
+                    self.root.clear()
+
+
+# ============================================================================
+# Parallel Rendering
+# ============================================================================
+
+# Classes per shard when rendering with --jobs; small enough to balance
+# the pool, large enough that pickling results is not the bottleneck
+SHARD_SIZE = 2000
+
+# Set in each worker process by _init_worker
+_worker_state: Tuple[Dict[str, dict], Dict[str, List[dict]]] = ({}, {})
+
+
+def _init_worker(structures: Dict[str, dict], rel_lookup: Dict[str, List[dict]]):
+    global _worker_state
+    _worker_state = (structures, rel_lookup)
+
+
+def render_blocks(struct_ids: List[str], sink_types: Tuple[type, ...]) -> List[list]:
+    """The class blocks of struct_ids, one list per sink type."""
+    structures, rel_lookup = _worker_state
+    renderers = [sink_type.render_class for sink_type in sink_types]
+    blocks: List[list] = [[] for _ in sink_types]
+    for struct_id in struct_ids:
+        cls = make_class(struct_id, structures, rel_lookup)
+        for out, render in zip(blocks, renderers):
+            out.append(render(cls))
+    return blocks
+
+
+def render_shard(struct_ids: List[str], sink_types: Tuple[type, ...]) -> list:
+    """The joined class blocks of struct_ids, one entry per sink type."""
+    blocks = render_blocks(struct_ids, sink_types)
+    return [sink_type.join(out) for sink_type, out in zip(sink_types, blocks)]
+
+
+def shards(struct_ids: List[str], size: int) -> List[List[str]]:
+    return [struct_ids[i:i + size] for i in range(0, len(struct_ids), size)]
+
+
+# ============================================================================
+# Fragment Cache
+# ============================================================================
+
+FRAGMENT_CACHE_DIR = ROOT_DIR / CACHE_DIRNAME / "owl"
+FRAGMENT_CACHE_VERSION = 1
+
+
+def class_key(cls: OwlClass) -> bytes:
+    """
+    Digest of everything a class block is rendered from: the structure
+    record's fields and its outgoing relationships, as resolved by make_class
+    (so removing a parent or a relationship target also changes the key).
+    """
+    return hashlib.blake2b(repr(cls).encode('utf-8'), digest_size=16).digest()
+
+
+def renderer_signature() -> str:
+    """Hash of this file; any change to the writers invalidates every cached block."""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+class FragmentCache:
+    """
+    Rendered class blocks of one output format from the previous run, by
+    structure ID, each tagged with the class_key it was rendered from.
+    """
+
+    def __init__(self, path: Path, signature: str = ""):
+        self.path = Path(path)
+        self.signature = signature
+        self.fragments: Dict[str, tuple] = {}
+        self.changed = False
+
+    @classmethod
+    def for_sink(cls, sink: Sink, cache_dir: Path = FRAGMENT_CACHE_DIR,
+                 signature: Optional[str] = None) -> "FragmentCache":
+        """The saved cache for a sink's format, or an empty one."""
+        cache = cls(Path(cache_dir) / f"fragments{sink.suffix}.pickle",
+                    renderer_signature() if signature is None else signature)
+        try:
+            with open(cache.path, 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return cache
+        if (isinstance(entry, dict) and entry.get("version") == FRAGMENT_CACHE_VERSION
+                and entry.get("signature") == cache.signature):
+            cache.fragments = entry["fragments"]
+        return cache
+
+    def get(self, struct_id: str, key: bytes):
+        """The cached block, or None if missing or rendered from another record."""
+        entry = self.fragments.get(struct_id)
+        return entry[1] if entry is not None and entry[0] == key else None
+
+    def put(self, struct_id: str, key: bytes, block):
+        self.fragments[struct_id] = (key, block)
+        self.changed = True
+
+    def retain(self, struct_ids: List[str]):
+        """Drop blocks of structures that no longer exist."""
+        if len(self.fragments) > len(struct_ids):
+            self.fragments = {i: self.fragments[i] for i in struct_ids if i in self.fragments}
+            self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({
+                    "version": FRAGMENT_CACHE_VERSION,
+                    "signature": self.signature,
+                    "fragments": self.fragments,
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+            self.changed = False
+        except OSError:
+            # A read-only checkout just means no caching
+            pass
+
+
+def write_cached(structures: Dict[str, dict], relationships: List[dict], sinks: List[Sink],
+                 caches: List[FragmentCache], jobs: int = 1) -> int:
+    """
+    Write every class block from the caches, rendering (and caching) only
+    the classes whose key changed. Returns how many classes were rendered.
+    """
+    rel_lookup = build_rel_lookup(relationships)
+    struct_ids = sorted(structures.keys())
+    keys = {}
+    stale = []
+    for struct_id in struct_ids:
+        key = keys[struct_id] = class_key(make_class(struct_id, structures, rel_lookup))
+        if any(cache.get(struct_id, key) is None for cache in caches):
+            stale.append(struct_id)
+
+    sink_types = tuple(type(sink) for sink in sinks)
+    if jobs > 1 and len(stale) > SHARD_SIZE:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(structures, rel_lookup)) as pool:
+            work = shards(stale, SHARD_SIZE)
+            rendered = pool.map(render_blocks, work, [sink_types] * len(work))
+            for shard, blocks in zip(work, rendered):
+                for cache, sink_blocks in zip(caches, blocks):
+                    for struct_id, block in zip(shard, sink_blocks):
+                        cache.put(struct_id, keys[struct_id], block)
+    else:
+        _init_worker(structures, rel_lookup)
+        blocks = render_blocks(stale, sink_types)
+        for cache, sink_blocks in zip(caches, blocks):
+            for struct_id, block in zip(stale, sink_blocks):
+                cache.put(struct_id, keys[struct_id], block)
+
+    for cache in caches:
+        cache.retain(struct_ids)
+    for struct_id in struct_ids:
+        key = keys[struct_id]
+        for sink, cache in zip(sinks, caches):
+            sink.write(cache.get(struct_id, key))
+    return len(stale)
+
+
+def export(structures: Dict[str, dict], relationships: List[dict], sinks: List[Sink],
+           jobs: int = 1, caches: Optional[List[FragmentCache]] = None):
+    """
+    Feed every sink from a single pass over the classes. With jobs > 1 the
+    sorted IDs are cut into shards rendered by a process pool; results are
+    written in shard order, so the output is identical to a serial run.
+    With caches (one FragmentCache per sink), unchanged class blocks are
+    reused from the previous run instead of rendered.
+    Returns how many classes were rendered.
+    """
+    rendered = len(structures)
+    for sink in sinks:
+        sink.begin()
+    if caches is not None:
+        rendered = write_cached(structures, relationships, sinks, caches, jobs)
+    elif jobs > 1 and len(structures) > SHARD_SIZE:
+        rel_lookup = build_rel_lookup(relationships)
+        sink_types = tuple(type(sink) for sink in sinks)
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(structures, rel_lookup)) as pool:
+            work = shards(sorted(structures.keys()), SHARD_SIZE)
+            for texts in pool.map(render_shard, work, [sink_types] * len(work)):
+                for sink, text in zip(sinks, texts):
+                    sink.write(text)
+    else:
+        for cls in iter_classes(structures, relationships):
+            for sink in sinks:
+                sink.write_class(cls)
+    for sink in sinks:
+        sink.end()
+    return rendered
+
+
+def output_paths(output: Path, formats: List[str]) -> Dict[str, Path]:
+    """
+    --output for the first format; the others get the same path with their
+    own suffix. The first does too if --output has another format's suffix
+    (so -f obo writes bap-mousehead.obo, not OBO into a .owl file).
+    """
+    suffixes = {sink.suffix for sink in SINKS.values()}
+    paths = {}
+    for i, name in enumerate(formats):
+        suffix = SINKS[name].suffix
+        keep = i == 0 and (output.suffix == suffix or output.suffix not in suffixes)
+        paths[name] = output if keep else output.with_suffix(suffix)
+    return paths
 
 
 # ============================================================================
@@ -242,7 +958,16 @@ def main():
     parser = argparse.ArgumentParser(description="Generate OWL from YAML definitions")
     parser.add_argument("--output", "-o", default="bap-mousehead.owl", help="Output file path")
     parser.add_argument("--validate", "-v", action="store_true", help="Validate XML output")
+    parser.add_argument("--format", "-f", action="append", choices=sorted(SINKS), dest="formats",
+                        help="Output format; repeat for several, written in one pass "
+                             "(default: owl; extra formats use --output with their own suffix)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Render classes in N worker processes (default: 1; 0 = one per CPU)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Render every class instead of reusing unchanged blocks from "
+                             f"{FRAGMENT_CACHE_DIR.relative_to(ROOT_DIR)}/ (also off with BAP_NO_CACHE=1)")
     args = parser.parse_args()
+    formats = list(dict.fromkeys(args.formats or ["owl"]))
     
     print("Loading structures...")
     structures = load_all_structures()
@@ -253,24 +978,45 @@ def main():
     print(f"  Loaded {len(relationships)} relationships")
     
     print("Generating OWL...")
-    owl_content = generate_owl(structures, relationships)
+    paths = output_paths(Path(args.output), formats)
+    # Write to temp files so a failed run leaves existing outputs untouched
+    files = {}
+    try:
+        for name, path in paths.items():
+            fd, tmp = tempfile.mkstemp(dir=path.parent.resolve(), suffix=".tmp")
+            os.close(fd)
+            files[name] = tmp
+        with ExitStack() as stack:
+            sinks = []
+            for name, tmp in files.items():
+                f = stack.enter_context(open(tmp, 'w', encoding='utf-8'))
+                sinks.append(OwlXmlSink(f, validate=args.validate) if name == "owl" else SINKS[name](f))
+            use_cache = CACHE_ENABLED and not args.no_cache
+            caches = [FragmentCache.for_sink(sink) for sink in sinks] if use_cache else None
+            rendered = export(structures, relationships, sinks, jobs=args.jobs or os.cpu_count() or 1, caches=caches)
+    except ET.ParseError as e:
+        print(f"  ✗ XML validation failed: {e}")
+        for tmp in files.values():
+            os.unlink(tmp)
+        return 1
+    except BaseException:
+        for tmp in files.values():
+            os.unlink(tmp)
+        raise
     
-    # Validate XML if requested
-    if args.validate:
-        try:
-            from xml.etree import ElementTree as ET
-            ET.fromstring(owl_content)
-            print("  ✓ XML is valid")
-        except Exception as e:
-            print(f"  ✗ XML validation failed: {e}")
-            return 1
+    if args.validate and "owl" in paths:
+        print("  ✓ XML is valid")
+    if caches is not None:
+        print(f"  Rendered {rendered} of {len(structures)} classes (the rest from cache)")
+        for cache in caches:
+            cache.save()
     
-    # Write output
-    output_path = Path(args.output)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(owl_content)
+    for name, path in paths.items():
+        os.chmod(files[name], 0o644)
+        os.replace(files[name], path)
     
-    print(f"\n✓ Generated {output_path}")
+    for path in paths.values():
+        print(f"\n✓ Generated {path}")
     print(f"  Structures: {len(structures)}")
     print(f"  Relationships: {len(relationships)}")
     
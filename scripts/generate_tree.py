@@ -13,10 +13,10 @@ Usage:
 import sys
 import argparse
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO
 from collections import defaultdict
 
-import yaml
+from ontology import load_ontology
 
 
 # ============================================================================
@@ -38,45 +38,17 @@ TREE_CHARS = {
 
 
 # ============================================================================
-# YAML Loading
+# Loading
 # ============================================================================
 
-def load_yaml_files(directory: Path) -> List[dict]:
-    """Load all YAML files from a directory."""
-    data = []
-    if not directory.exists():
-        return data
-    
-    for filepath in sorted(directory.glob("*.yaml")):
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
-                if content:
-                    data.append(content)
-        except Exception as e:
-            print(f"Warning: Failed to load {filepath}: {e}")
-    
-    return data
-
-
 def load_all_structures() -> Dict[str, dict]:
     """Load all structures from YAML files."""
-    structures = {}
-    for data in load_yaml_files(STRUCTURES_DIR):
-        for struct in data.get("structures", []):
-            if "id" in struct:
-                structures[struct["id"]] = struct
-    return structures
+    return dict(load_ontology(ROOT_DIR).structures)
 
 
 def load_all_relationships() -> Dict[str, List[dict]]:
     """Load all relationships grouped by type."""
-    relationships = defaultdict(list)
-    for data in load_yaml_files(RELATIONSHIPS_DIR):
-        for rel in data.get("relationships", []) or []:
-            predicate = rel.get("predicate", "unknown")
-            relationships[predicate].append(rel)
-    return dict(relationships)
+    return load_ontology(ROOT_DIR).relationships_by_predicate()
 
 
 def get_structure_name(structures: Dict[str, dict], id_or_name: str) -> str:
@@ -105,6 +77,52 @@ def build_children_map(structures: Dict[str, dict]) -> Dict[Optional[str], List[
     return children
 
 
+def iter_tree_lines(
+    structures: Dict[str, dict],
+    children_map: Dict[Optional[str], List[str]],
+    node_id: str,
+    prefix: str = "",
+    is_last: bool = True,
+    max_depth: int = 10,
+    current_depth: int = 0,
+    collapse_node_ids: Optional[Set[str]] = None
+) -> Iterator[str]:
+    """
+    Yield tree lines for a node and its children, depth first. Uses an
+    explicit stack, so depth is not limited by Python's recursion limit.
+    """
+    # (node, prefix, is_last, depth), children pushed in reverse so they pop in order
+    stack = [(node_id, prefix, is_last, current_depth)]
+    while stack:
+        node_id, prefix, is_last, depth = stack.pop()
+        if depth > max_depth:
+            continue
+        
+        struct = structures.get(node_id, {})
+        name = struct.get('name', node_id)
+        
+        # Determine connector
+        if depth == 0:
+            connector = ""
+            new_prefix = ""
+        else:
+            connector = TREE_CHARS['last'] if is_last else TREE_CHARS['branch']
+            new_prefix = prefix + (TREE_CHARS['space'] if is_last else TREE_CHARS['pipe'])
+        
+        yield f"{prefix}{connector}{name}"
+        
+        # Skip expanding children for collapsed nodes (e.g. Brain in README)
+        if collapse_node_ids and node_id in collapse_node_ids:
+            continue
+        
+        # Skip deprecated structures
+        child_ids = [c for c in children_map.get(node_id, ()) if not structures.get(c, {}).get('deprecated', False)]
+        
+        last = len(child_ids) - 1
+        for i in range(last, -1, -1):
+            stack.append((child_ids[i], new_prefix, i == last, depth + 1))
+
+
 def generate_tree_lines(
     structures: Dict[str, dict],
     children_map: Dict[Optional[str], List[str]],
@@ -116,64 +134,28 @@ def generate_tree_lines(
     collapse_node_ids: Optional[Set[str]] = None
 ) -> List[str]:
     """Generate tree lines for a node and its children."""
-    if current_depth > max_depth:
-        return []
-    
-    lines = []
-    struct = structures.get(node_id, {})
-    name = struct.get('name', node_id)
-    
-    # Determine connector
-    if current_depth == 0:
-        connector = ""
-        new_prefix = ""
-    else:
-        connector = TREE_CHARS['last'] if is_last else TREE_CHARS['branch']
-        new_prefix = prefix + (TREE_CHARS['space'] if is_last else TREE_CHARS['pipe'])
-    
-    lines.append(f"{prefix}{connector}{name}")
-    
-    # Skip expanding children for collapsed nodes (e.g. Brain in README)
-    if collapse_node_ids and node_id in collapse_node_ids:
-        return lines
-    
-    # Get children
-    child_ids = children_map.get(node_id, [])
-    
-    # Skip deprecated structures
-    child_ids = [c for c in child_ids if not structures.get(c, {}).get('deprecated', False)]
-    
-    for i, child_id in enumerate(child_ids):
-        is_last_child = (i == len(child_ids) - 1)
-        lines.extend(generate_tree_lines(
-            structures,
-            children_map,
-            child_id,
-            new_prefix,
-            is_last_child,
-            max_depth,
-            current_depth + 1,
-            collapse_node_ids
-        ))
-    
-    return lines
+    return list(iter_tree_lines(
+        structures, children_map, node_id, prefix, is_last,
+        max_depth, current_depth, collapse_node_ids
+    ))
 
 
-def generate_full_tree(
+def iter_full_tree(
     structures: Dict[str, dict],
     max_depth: int = 10,
-    collapse_node_ids: Optional[Set[str]] = None
-) -> str:
-    """Generate the complete hierarchy tree."""
-    children_map = build_children_map(structures)
+    collapse_node_ids: Optional[Set[str]] = None,
+    children_map: Optional[Dict[Optional[str], List[str]]] = None
+) -> Iterator[str]:
+    """Yield the lines of the complete hierarchy tree, a blank line between roots."""
+    if children_map is None:
+        children_map = build_children_map(structures)
     
     # Find root nodes (parent is None)
     root_ids = children_map.get(None, [])
     
-    all_lines = []
     for i, root_id in enumerate(root_ids):
         is_last = (i == len(root_ids) - 1)
-        lines = generate_tree_lines(
+        yield from iter_tree_lines(
             structures,
             children_map,
             root_id,
@@ -182,21 +164,40 @@ def generate_full_tree(
             max_depth,
             collapse_node_ids=collapse_node_ids
         )
-        all_lines.extend(lines)
         if not is_last:
-            all_lines.append("")  # Add spacing between roots
-    
-    return '\n'.join(all_lines)
+            yield ""  # Add spacing between roots
 
 
-def generate_subtree(
+def generate_full_tree(
     structures: Dict[str, dict],
-    root_name: str,
     max_depth: int = 10,
-    collapse_node_ids: Optional[Set[str]] = None
+    collapse_node_ids: Optional[Set[str]] = None,
+    children_map: Optional[Dict[Optional[str], List[str]]] = None
 ) -> str:
-    """Generate tree for a specific subtree by name."""
-    children_map = build_children_map(structures)
+    """Generate the complete hierarchy tree."""
+    return '\n'.join(iter_full_tree(structures, max_depth, collapse_node_ids, children_map))
+
+
+def write_lines(lines: Iterable[str], out: TextIO):
+    """Write lines joined by newlines (no trailing newline, like '\\n'.join)."""
+    first = True
+    for line in lines:
+        if not first:
+            out.write('\n')
+        out.write(line)
+        first = False
+
+
+def iter_subtree(
+    structures: Dict[str, dict],
+    root_name: str,
+    max_depth: int = 10,
+    collapse_node_ids: Optional[Set[str]] = None,
+    children_map: Optional[Dict[Optional[str], List[str]]] = None
+) -> Iterator[str]:
+    """Yield the tree lines for a specific subtree by name."""
+    if children_map is None:
+        children_map = build_children_map(structures)
     
     # Find the structure by name
     root_id = None
@@ -206,13 +207,24 @@ def generate_subtree(
             break
     
     if root_id is None:
-        return f"Structure '{root_name}' not found"
+        yield f"Structure '{root_name}' not found"
+        return
     
-    lines = generate_tree_lines(
+    yield from iter_tree_lines(
         structures, children_map, root_id, "", True, max_depth,
         collapse_node_ids=collapse_node_ids
     )
-    return '\n'.join(lines)
+
+
+def generate_subtree(
+    structures: Dict[str, dict],
+    root_name: str,
+    max_depth: int = 10,
+    collapse_node_ids: Optional[Set[str]] = None,
+    children_map: Optional[Dict[Optional[str], List[str]]] = None
+) -> str:
+    """Generate tree for a specific subtree by name."""
+    return '\n'.join(iter_subtree(structures, root_name, max_depth, collapse_node_ids, children_map))
 
 
 # ============================================================================
@@ -291,23 +303,29 @@ def update_readme(
 # Statistics
 # ============================================================================
 
-def generate_stats(structures: Dict[str, dict], relationships: Dict[str, List[dict]]) -> str:
+def count_at_depth(children_map: Dict[Optional[str], List[str]]) -> Dict[int, int]:
+    """Structures per depth below the roots, in one breadth-first pass."""
+    counts = {}
+    level = children_map.get(None, [])
+    depth = 0
+    while level:
+        counts[depth] = len(level)
+        level = [child for node_id in level for child in children_map.get(node_id, ())]
+        depth += 1
+    return counts
+
+
+def generate_stats(
+    structures: Dict[str, dict],
+    relationships: Dict[str, List[dict]],
+    children_map: Optional[Dict[Optional[str], List[str]]] = None
+) -> str:
     """Generate statistics about the ontology."""
-    children_map = build_children_map(structures)
+    if children_map is None:
+        children_map = build_children_map(structures)
     
     # Count by depth
-    def count_at_depth(node_id: str, depth: int = 0) -> Dict[int, int]:
-        counts = {depth: 1}
-        for child_id in children_map.get(node_id, []):
-            child_counts = count_at_depth(child_id, depth + 1)
-            for d, c in child_counts.items():
-                counts[d] = counts.get(d, 0) + c
-        return counts
-    
-    total_counts = defaultdict(int)
-    for root_id in children_map.get(None, []):
-        for d, c in count_at_depth(root_id).items():
-            total_counts[d] += c
+    total_counts = count_at_depth(children_map)
     
     total_rels = sum(len(r) for r in relationships.values())
     max_depth = max(total_counts.keys()) if total_counts else 0
@@ -468,8 +486,13 @@ def main():
     parser.add_argument("--subtree", type=str, help="Generate tree for specific subtree (by name)")
     parser.add_argument("--max-depth", type=int, default=10, help="Maximum tree depth")
     parser.add_argument("--stats", action="store_true", help="Show statistics")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse YAML instead of using .cache/")
     args = parser.parse_args()
     
+    if args.no_cache:
+        # Prime the in-process copy so the loaders below reuse it
+        load_ontology(ROOT_DIR, refresh=True, use_cache=False)
+    
     print("Loading structures...")
     structures = load_all_structures()
     print(f"  Loaded {len(structures)} structures")
@@ -479,34 +502,39 @@ def main():
     total_rels = sum(len(r) for r in relationships.values())
     print(f"  Loaded {total_rels} relationships")
     
+    # Shared by the stats and the tree
+    children_map = build_children_map(structures)
+    
     if args.stats:
         print("\nStatistics:")
-        print(generate_stats(structures, relationships))
+        print(generate_stats(structures, relationships, children_map))
         print()
     
-    # Generate tree
+    # Generate tree (lazily; written out line by line below)
     # Collapse Brain subtree in README to avoid excessive length (~2500 children)
     collapse_for_readme = {"BAP_0012004"} if args.update_readme else None
 
     if args.subtree:
-        tree = generate_subtree(
+        tree_lines = iter_subtree(
             structures, args.subtree, args.max_depth,
-            collapse_node_ids=collapse_for_readme
+            collapse_node_ids=collapse_for_readme, children_map=children_map
         )
     else:
-        tree = generate_full_tree(
+        tree_lines = iter_full_tree(
             structures, args.max_depth,
-            collapse_node_ids=collapse_for_readme
+            collapse_node_ids=collapse_for_readme, children_map=children_map
         )
 
     # Output
     if args.output:
         with open(args.output, 'w', encoding='utf-8') as f:
-            f.write(tree)
+            write_lines(tree_lines, f)
         print(f"✓ Saved to {args.output}")
     elif args.update_readme:
+        tree = '\n'.join(tree_lines)
+        
         # Generate all content
-        stats = generate_stats(structures, relationships)
+        stats = generate_stats(structures, relationships, children_map)
         
         # Generate Mermaid diagrams
         mermaid_parts = []
@@ -526,7 +554,9 @@ def main():
         # Update README
         update_readme(tree, stats, mermaid, tables)
     else:
-        print("\n" + tree)
+        print()
+        write_lines(tree_lines, sys.stdout)
+        print()
     
     return 0
 
@@ -13,11 +13,11 @@ import sys
 import json
 import argparse
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 from datetime import datetime
 
-import yaml
+from ontology import HierarchyIndex, load_ontology
 
 # ============================================================================
 # Configuration
@@ -33,43 +33,14 @@ SCHEMAS_DIR = ROOT_DIR / "schemas"
 # Data Loading
 # ============================================================================
 
-def load_yaml_files(directory: Path) -> List[dict]:
-    """Load all YAML files from a directory."""
-    data = []
-    if not directory.exists():
-        return data
-    
-    for filepath in sorted(directory.glob("*.yaml")):
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
-                if content:
-                    data.append({'file': filepath.name, 'data': content})
-        except Exception as e:
-            print(f"Warning: Failed to load {filepath}: {e}")
-    
-    return data
-
-
 def load_all_structures() -> Dict[str, dict]:
     """Load all structures with metadata."""
-    structures = {}
-    for item in load_yaml_files(STRUCTURES_DIR):
-        for struct in item['data'].get("structures", []):
-            if "id" in struct:
-                struct['_source_file'] = item['file']
-                structures[struct["id"]] = struct
-    return structures
+    return dict(load_ontology(ROOT_DIR).structures)
 
 
 def load_all_relationships() -> List[dict]:
     """Load all relationships with metadata."""
-    relationships = []
-    for item in load_yaml_files(RELATIONSHIPS_DIR):
-        for rel in item['data'].get("relationships", []) or []:
-            rel['_source_file'] = item['file']
-            relationships.append(rel)
-    return relationships
+    return list(load_ontology(ROOT_DIR).relationships)
 
 
 def get_structure_name(structures: Dict[str, dict], struct_id: str) -> str:
@@ -99,20 +70,7 @@ def generate_home_page(structures: Dict[str, dict], relationships: List[dict]) -
         rel_by_type[rel.get('predicate', 'unknown')] += 1
     
     # Calculate hierarchy depth
-    def get_depth(struct_id: str, visited: Set[str] = None) -> int:
-        if visited is None:
-            visited = set()
-        if struct_id in visited:
-            return 0
-        visited.add(struct_id)
-        
-        struct = structures.get(struct_id, {})
-        parent = struct.get('parent')
-        if parent is None or parent not in structures:
-            return 0
-        return 1 + get_depth(parent, visited)
-    
-    max_depth = max((get_depth(sid) for sid in structures.keys()), default=0)
+    max_depth = HierarchyIndex.from_structures(structures).max_depth()
     
     # Count roots
     roots = [s for s in structures.values() if s.get('parent') is None]
@@ -17,6 +17,7 @@ try:
     USE_RUAMEL = True
 except ImportError:
     import yaml
+    import yaml_fast
     USE_RUAMEL = False
 
 from ai_context import load_all_structures
@@ -30,7 +31,7 @@ def load_yaml_file(filepath: Path) -> dict:
             return y.load(f) or {}
     else:
         with open(filepath) as f:
-            return yaml.safe_load(f) or {}
+            return yaml_fast.safe_load(f) or {}
 
 
 def save_yaml_file(filepath: Path, data: dict):
@@ -18,9 +18,11 @@ try:
     USE_RUAMEL = True
 except ImportError:
     import yaml
+    import yaml_fast
     USE_RUAMEL = False
 
 from ai_context import load_all_structures, build_hierarchy_context
+from structure_index import load_structure_index
 
 
 def load_all_relationships() -> Dict:
@@ -74,7 +76,7 @@ def load_yaml_file(filepath: Path) -> dict:
             return y.load(f) or {}
     else:
         with open(filepath) as f:
-            return yaml.safe_load(f) or {}
+            return yaml_fast.safe_load(f) or {}
 
 
 def save_yaml_file(filepath: Path, data: dict):
@@ -90,16 +92,8 @@ def save_yaml_file(filepath: Path, data: dict):
 
 def find_structure_file(struct_id: str) -> Path:
     """Find which YAML file contains a given structure."""
-    structures_dir = Path('structures')
-    
-    for yaml_file in structures_dir.glob('*.yaml'):
-        data = load_yaml_file(yaml_file)
-        if data and 'structures' in data:
-            for struct in data['structures']:
-                if struct.get('id') == struct_id:
-                    return yaml_file
-    
-    return None
+    loc = load_structure_index(Path('structures')).locate(struct_id)
+    return loc.path if loc else None
 
 
 def get_next_available_id(structures: Dict) -> int:
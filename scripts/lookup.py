@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Structure Lookup
+
+Resolves atlas identifiers to BAP IDs from the ontology's in-memory
+indexes: BAP IDs, xrefs (ABA:695), external IDs (UBERON_0001234),
+abbreviations (CTXpl) and names, tried in that order. Bare numbers are
+read as xrefs with --prefix (default ABA), so Allen atlas labels can be
+piped in directly.
+
+Output is one tab-separated line per term: the term, then its BAP ID (the
+first listed in the files; --all gives every match, comma-separated), or
+an empty field if nothing matched. --fuzzy falls back to the closest name.
+
+Usage:
+    python scripts/lookup.py ABA:695 CTXpl "Cortical plate"
+    python scripts/lookup.py --all ABA:695
+    cut -f1 voxel_labels.tsv | python scripts/lookup.py --batch > labels_bap.tsv
+"""
+
+import sys
+import argparse
+from typing import Callable, Dict, Iterable, List, TextIO
+
+from ontology import load_ontology, Ontology
+
+
+DEFAULT_PREFIX = "ABA"
+
+# Minimum trigram similarity for --fuzzy matches
+FUZZY_MIN_SCORE = 0.3
+
+
+def make_resolver(onto: Ontology, prefix: str = DEFAULT_PREFIX, fuzzy: bool = False) -> Callable[[str], List[str]]:
+    """A memoised term -> IDs function (atlas label streams repeat a few terms a lot)."""
+    memo: Dict[str, List[str]] = {}
+
+    def resolve(term: str) -> List[str]:
+        ids = memo.get(term)
+        if ids is None:
+            key = term.strip()
+            if key.isdigit() and prefix:
+                key = f"{prefix}:{key}"
+            ids = onto.resolve(key)
+            if not ids and fuzzy and key:
+                match = onto.name_search.best(key, min_score=FUZZY_MIN_SCORE)
+                ids = [match.value] if match else []
+            memo[term] = ids
+        return ids
+
+    return resolve
+
+
+def write_lookups(terms: Iterable[str], resolve: Callable[[str], List[str]], out: TextIO, show_all: bool = False) -> int:
+    """Write one line per term; returns how many terms had no match."""
+    missing = 0
+    write = out.write
+    for term in terms:
+        ids = resolve(term)
+        if not ids:
+            missing += 1
+        write(f"{term}\t{','.join(ids) if show_all else (ids[0] if ids else '')}\n")
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resolve xrefs, abbreviations and names to BAP IDs",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ABA:695 CTXpl
+  %(prog)s --all 695
+  %(prog)s --batch < labels.txt
+        """
+    )
+    parser.add_argument("terms", nargs="*", help="IDs, xrefs, abbreviations or names to resolve")
+    parser.add_argument("--batch", action="store_true", help="Also read terms from stdin, one per line")
+    parser.add_argument("--all", action="store_true", dest="show_all", help="Print every matching ID")
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX,
+                        help=f"xref prefix for bare numbers (default: {DEFAULT_PREFIX}; '' to disable)")
+    parser.add_argument("--fuzzy", action="store_true", help="Fall back to the closest name")
+    args = parser.parse_args()
+
+    if not args.terms and not args.batch:
+        parser.error("give terms to look up or --batch")
+
+    resolve = make_resolver(load_ontology(), args.prefix, args.fuzzy)
+    missing = write_lookups(args.terms, resolve, sys.stdout, args.show_all)
+    if args.batch:
+        missing += write_lookups((line.rstrip("\r\n") for line in sys.stdin), resolve, sys.stdout, args.show_all)
+
+    return 0 if not missing else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
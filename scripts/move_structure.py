@@ -17,6 +17,9 @@ import argparse
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import yaml
+import yaml_fast
+
+from structure_index import load_structure_index
 
 
 # ============================================================================
@@ -35,7 +38,7 @@ def load_yaml_file(filepath: Path) -> Optional[dict]:
     """Load a YAML file preserving order and comments where possible."""
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            return yaml_fast.safe_load(f)
     except Exception as e:
         print(f"❌ Error loading {filepath}: {e}")
         return None
@@ -80,21 +83,22 @@ def find_structure_occurrences(structure_id: str) -> List[Tuple[Path, int, dict]
     """
     Find all occurrences of a structure ID across YAML files.
     
+    Only the files the structure index points at are parsed.
+    
     Returns:
         List of (filepath, index, structure_dict) tuples
     """
     occurrences = []
+    loaded = {}
     
-    yaml_files = list(STRUCTURES_DIR.glob("*.yaml")) + list(STRUCTURES_DIR.glob("*.yml"))
-    
-    for filepath in yaml_files:
-        data = load_yaml_file(filepath)
+    for loc in load_structure_index(STRUCTURES_DIR).locate_all(structure_id):
+        if loc.path not in loaded:
+            loaded[loc.path] = load_yaml_file(loc.path)
+        data = loaded[loc.path]
         if not data or "structures" not in data:
             continue
         
-        for idx, struct in enumerate(data["structures"]):
-            if struct.get("id") == structure_id:
-                occurrences.append((filepath, idx, struct))
+        occurrences.append((loc.path, loc.index, data["structures"][loc.index]))
     
     return occurrences
 
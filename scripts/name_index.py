@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Fuzzy Name Index
+
+Character-trigram inverted index over structure names (and abbreviations,
+synonyms and xrefs). A query only touches the keys that share at least one
+trigram with it, and the candidates are ranked by trigram Jaccard
+similarity, ties broken by key and then value, so the best match is the
+same on every run.
+
+Trigrams are taken per word the way PostgreSQL's pg_trgm does: lowercase,
+alphanumeric runs padded with two spaces in front and one behind, so
+"Facial nerve" gives "  f", " fa", "fac", ..., "ve ".
+
+Usage:
+    from name_index import TrigramIndex
+
+    index = TrigramIndex.from_lookup({"facial nerve": "BAP_0001000"})
+    index.search("facial")          # [NameMatch(key='facial nerve', ...)]
+
+    onto.name_search.best("facial nrve")   # via ontology.Ontology
+
+Indexes pickle to disk with save() / load().
+"""
+
+import os
+import re
+import pickle
+import tempfile
+from pathlib import Path
+from dataclasses import dataclass
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+INDEX_VERSION = 1
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+# Structure fields indexed besides the name
+ALIAS_FIELDS = ("abbreviation", "synonyms", "xref", "xrefs", "external_id")
+
+
+def trigrams(text: str) -> frozenset:
+    """pg_trgm-style trigrams of a string."""
+    grams = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def structure_keys(struct: dict) -> List[str]:
+    """Name, then abbreviation, synonyms and xrefs of a structure record."""
+    keys = [struct.get("name")]
+    for field in ALIAS_FIELDS:
+        value = struct.get(field)
+        if isinstance(value, list):
+            keys.extend(value)
+        else:
+            keys.append(value)
+    return [str(k) for k in keys if k]
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    """An indexed key, the value it maps to, and its similarity to the query."""
+    key: str
+    value: str
+    score: float
+
+
+class TrigramIndex:
+    """Inverted index from trigram to the keys containing it."""
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self.values: List[str] = []
+        self.sizes: List[int] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self._seen = set()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: str, value: str):
+        """Index key (case-insensitively) as a name for value."""
+        key = key.lower().strip()
+        if not key or value is None or (key, value) in self._seen:
+            return
+        self._seen.add((key, value))
+        grams = trigrams(key)
+        position = len(self.keys)
+        self.keys.append(key)
+        self.values.append(value)
+        self.sizes.append(len(grams))
+        for gram in grams:
+            self.postings[gram].append(position)
+
+    @classmethod
+    def from_lookup(cls, lookup: Dict[str, Optional[str]]) -> "TrigramIndex":
+        """Index a name -> ID dictionary."""
+        index = cls()
+        for key, value in lookup.items():
+            index.add(key, value)
+        return index
+
+    @classmethod
+    def from_structures(cls, structures: Iterable[dict]) -> "TrigramIndex":
+        """Index structure records by name, abbreviation, synonyms and xrefs."""
+        index = cls()
+        for struct in structures:
+            struct_id = struct.get("id")
+            if struct_id:
+                for key in structure_keys(struct):
+                    index.add(key, struct_id)
+        return index
+
+    def search(self, query: str, limit: Optional[int] = 5, min_score: float = 0.0) -> List[NameMatch]:
+        """Keys sharing trigrams with query, best Jaccard similarity first."""
+        grams = trigrams(query)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for position in self.postings.get(gram, ()):
+                shared[position] += 1
+
+        matches = []
+        for position, count in shared.items():
+            score = count / (len(grams) + self.sizes[position] - count)
+            if score >= min_score:
+                matches.append(NameMatch(self.keys[position], self.values[position], score))
+        matches.sort(key=lambda m: (-m.score, m.key, m.value))
+        return matches if limit is None else matches[:limit]
+
+    def best(self, query: str, min_score: float = 0.0) -> Optional[NameMatch]:
+        """The single best match, or None."""
+        matches = self.search(query, limit=1, min_score=min_score)
+        return matches[0] if matches else None
+
+    def partial(self, query: str) -> List[NameMatch]:
+        """Keys containing the query or contained in it, best first."""
+        query = query.lower().strip()
+        return [m for m in self.search(query, limit=None) if query in m.key or m.key in query]
+
+    # ------------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------------
+
+    def save(self, path: Path, signature: object = None):
+        """Pickle the index atomically, tagged with a caller-defined signature."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({
+                    "version": INDEX_VERSION,
+                    "signature": signature,
+                    "keys": self.keys,
+                    "values": self.values,
+                    "sizes": self.sizes,
+                    "postings": dict(self.postings),
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: Path, signature: object = None) -> Optional["TrigramIndex"]:
+        """Read a saved index, or None if missing, unreadable or saved with another signature."""
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if (not isinstance(entry, dict) or entry.get("version") != INDEX_VERSION
+                or entry.get("signature") != signature):
+            return None
+        index = cls()
+        index.keys, index.values, index.sizes = entry["keys"], entry["values"], entry["sizes"]
+        index.postings.update(entry["postings"])
+        index._seen = set(zip(index.keys, index.values))
+        return index
@@ -0,0 +1,603 @@
+#!/usr/bin/env python3
+"""
+BAP Ontology Model
+
+Shared in-memory view of the ontology. The YAML files under structures/ and
+relationships/ are parsed once per process and indexed for the lookups the
+other scripts need:
+
+- id -> structure record
+- parent id -> child ids
+- lowercase name -> ids
+- abbreviation / xref / external_id -> ids (exact)
+- fuzzy name / abbreviation / synonym / xref -> ids (trigram index)
+- subject / object -> relationships
+
+Usage:
+    from ontology import load_ontology
+
+    onto = load_ontology()
+    eye = onto.structures["BAP_0000008"]
+    for child_id in onto.children_of("BAP_0000008"):
+        print(onto.name_of(child_id))
+
+Records handed out by the model are shared between callers and should be
+treated as read-only. The parsed documents in `structure_files` /
+`relationship_files` are kept exactly as they were in the YAML (no
+bookkeeping keys) so they can be schema-validated directly.
+
+Parsed files are cached under .cache/ontology/, keyed by each file's size,
+mtime and SHA-256, so unchanged files are not re-parsed on the next run.
+Set BAP_NO_CACHE=1 to bypass the cache.
+"""
+
+import os
+import pickle
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Iterable
+from dataclasses import dataclass
+from collections import defaultdict
+
+import yaml
+
+import yaml_fast
+from name_index import TrigramIndex
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+
+ROOT_DIR = Path(__file__).parent.parent
+STRUCTURES_DIRNAME = "structures"
+RELATIONSHIPS_DIRNAME = "relationships"
+
+# Parsed-file cache (relative to the ontology root)
+CACHE_DIRNAME = ".cache"
+CACHE_VERSION = 1
+CACHE_ENABLED = not os.getenv("BAP_NO_CACHE")
+
+
+# ============================================================================
+# Data Classes
+# ============================================================================
+
+@dataclass
+class OntologyFile:
+    """A YAML file and its parsed contents (data is None if it failed to load)."""
+    path: Path
+    data: Optional[dict] = None
+    error: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+
+# ============================================================================
+# YAML Loading
+# ============================================================================
+
+def yaml_files(directory: Path) -> List[Path]:
+    """List the YAML files in a directory in a stable order."""
+    if not directory.exists():
+        return []
+    return sorted(list(directory.glob("*.yaml")) + list(directory.glob("*.yml")))
+
+
+def parse_yaml_bytes(raw: bytes) -> Tuple[Optional[dict], Optional[str]]:
+    """Parse YAML content, returning (data, error)."""
+    try:
+        return yaml_fast.safe_load(raw.decode('utf-8')), None
+    except (yaml.YAMLError, UnicodeDecodeError) as e:
+        return None, str(e)
+
+
+def load_file(filepath: Path, cache_dir: Optional[Path] = None) -> OntologyFile:
+    """Parse a single YAML file, going through the parsed-file cache if given."""
+    if cache_dir is None:
+        try:
+            with open(filepath, 'rb') as f:
+                data, error = parse_yaml_bytes(f.read())
+        except OSError as e:
+            return OntologyFile(filepath, None, str(e))
+        return OntologyFile(filepath, data, error)
+
+    try:
+        data, error = ParseCache(cache_dir).load(filepath)
+    except OSError as e:
+        return OntologyFile(filepath, None, str(e))
+    return OntologyFile(filepath, data, error)
+
+
+# ============================================================================
+# Parsed-file Cache
+# ============================================================================
+
+class ParseCache:
+    """
+    On-disk cache of parsed YAML documents.
+
+    Each source file gets one pickle holding its size, mtime, SHA-256 and
+    parsed contents. A matching size and mtime is trusted without reading
+    the source; otherwise the content hash decides (so a fresh checkout
+    with new mtimes still hits the cache).
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+
+    def entry_path(self, filepath: Path) -> Path:
+        return self.cache_dir / f"{filepath.parent.name}__{filepath.name}.pickle"
+
+    def _read_entry(self, filepath: Path) -> Optional[dict]:
+        try:
+            with open(self.entry_path(filepath), 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("version") != CACHE_VERSION:
+            return None
+        return entry
+
+    def _write_entry(self, filepath: Path, entry: dict):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.entry_path(filepath))
+        except OSError:
+            # A read-only checkout just means no caching
+            pass
+
+    def load(self, filepath: Path) -> Tuple[Optional[dict], Optional[str]]:
+        """Return (data, error) for a file, parsing it only on a cache miss."""
+        stat = filepath.stat()
+        entry = self._read_entry(filepath)
+
+        if (entry and entry["size"] == stat.st_size
+                and entry["mtime_ns"] == stat.st_mtime_ns):
+            return entry["data"], entry["error"]
+
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if entry and entry["sha256"] == digest:
+            data, error = entry["data"], entry["error"]
+        else:
+            data, error = parse_yaml_bytes(raw)
+
+        self._write_entry(filepath, {
+            "version": CACHE_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+            "data": data,
+            "error": error,
+        })
+        return data, error
+
+
+# ============================================================================
+# Hierarchy Cycles
+# ============================================================================
+
+WHITE, GREY, BLACK = 0, 1, 2
+
+
+def find_hierarchy_cycles(parent_of: Dict[str, Optional[str]]) -> List[List[str]]:
+    """
+    Find every distinct cycle in a child -> parent map in a single O(n) pass.
+
+    Each structure has at most one parent, so walking up from an unvisited
+    node either reaches a finished (black) node, leaves the map, or comes
+    back to a node on the current walk (grey), which closes a cycle. Every
+    node is walked once. Each cycle is returned once, as its members in
+    child -> parent order starting from the smallest ID.
+    """
+    colour: Dict[str, int] = {}
+    cycles = []
+
+    for start in parent_of:
+        if colour.get(start, WHITE) != WHITE:
+            continue
+
+        path = []
+        position: Dict[str, int] = {}
+        node = start
+        while node in parent_of and colour.get(node, WHITE) == WHITE:
+            colour[node] = GREY
+            position[node] = len(path)
+            path.append(node)
+            node = parent_of[node]
+
+        if node in position:
+            cycle = path[position[node]:]
+            first = cycle.index(min(cycle))
+            cycles.append(cycle[first:] + cycle[:first])
+
+        for member in path:
+            colour[member] = BLACK
+
+    return cycles
+
+
+# ============================================================================
+# Hierarchy Index
+# ============================================================================
+
+class HierarchyIndex:
+    """
+    Euler-tour numbering of the structure tree, built in O(n).
+
+    Every structure reachable from a root gets its pre-order position
+    (enter) and the position just past its subtree (exit). That answers:
+
+    - depth: O(1)
+    - is_ancestor(a, b): O(1), since enter[a] < enter[b] < exit[a]
+    - subtree_size: O(1)
+    - descendants: O(k), as a slice of the pre-order list
+
+    Structures whose parent is null or unknown are roots. Structures on a
+    cycle (or below one) cannot be reached from a root and are left out;
+    depth() returns None for them. root_offset() is 1 for structures whose
+    root has an unknown (dangling) parent, also in O(1).
+    """
+
+    def __init__(self, parent_of: Dict[str, Optional[str]]):
+        self.parent_of = parent_of
+        self.children: Dict[str, List[str]] = defaultdict(list)
+        self.roots: List[str] = []
+        for node, parent in parent_of.items():
+            if parent and parent in parent_of:
+                self.children[parent].append(node)
+            else:
+                self.roots.append(node)
+
+        self.order: List[str] = []
+        self.enter: Dict[str, int] = {}
+        self.exit: Dict[str, int] = {}
+        self._depth: Dict[str, int] = {}
+        self._under_dangling: Set[str] = set()
+
+        for root in self.roots:
+            dangling = bool(parent_of.get(root))
+            stack = [(root, 0)]
+            while stack:
+                node, depth = stack.pop()
+                self.enter[node] = len(self.order)
+                self._depth[node] = depth
+                self.order.append(node)
+                if dangling:
+                    self._under_dangling.add(node)
+                for child in reversed(self.children.get(node, ())):
+                    stack.append((child, depth + 1))
+
+        # Subtree sizes bottom-up: children always come after their parent
+        size = dict.fromkeys(self.order, 1)
+        for node in reversed(self.order):
+            parent = parent_of.get(node)
+            if parent in size:
+                size[parent] += size[node]
+        for node in self.order:
+            self.exit[node] = self.enter[node] + size[node]
+
+    @classmethod
+    def from_structures(cls, structures: Dict[str, dict]) -> "HierarchyIndex":
+        return cls({struct_id: struct.get("parent") for struct_id, struct in structures.items()})
+
+    def __contains__(self, struct_id: str) -> bool:
+        return struct_id in self.enter
+
+    def depth(self, struct_id: str) -> Optional[int]:
+        """Distance from the root (0 for roots, None if unreachable)."""
+        return self._depth.get(struct_id)
+
+    def root_offset(self, struct_id: str) -> int:
+        """1 if the structure's root has a parent ID not in the tree, else 0."""
+        return 1 if struct_id in self._under_dangling else 0
+
+    def max_depth(self) -> int:
+        return max(self._depth.values(), default=0)
+
+    def subtree_size(self, struct_id: str) -> int:
+        """Number of structures in the subtree, including the structure itself."""
+        if struct_id not in self.enter:
+            return 0
+        return self.exit[struct_id] - self.enter[struct_id]
+
+    def is_ancestor(self, ancestor: str, struct_id: str) -> bool:
+        """True if struct_id is strictly below ancestor."""
+        if ancestor not in self.enter or struct_id not in self.enter:
+            return False
+        return self.enter[ancestor] < self.enter[struct_id] < self.exit[ancestor]
+
+    def descendants(self, struct_id: str) -> List[str]:
+        """All structures below struct_id, in depth-first pre-order."""
+        if struct_id not in self.enter:
+            return []
+        return self.order[self.enter[struct_id] + 1:self.exit[struct_id]]
+
+    def ancestors(self, struct_id: str) -> List[str]:
+        """Parent, grandparent, ... up to the root."""
+        chain = []
+        parent = self.parent_of.get(struct_id)
+        while parent in self.enter and struct_id in self.enter:
+            chain.append(parent)
+            parent = self.parent_of.get(parent)
+        return chain
+
+
+# ============================================================================
+# Ontology
+# ============================================================================
+
+class Ontology:
+    """Structures and relationships with the indexes built over them."""
+
+    def __init__(self, root: Path = ROOT_DIR):
+        self.root = Path(root)
+        self.structures_dir = self.root / STRUCTURES_DIRNAME
+        self.relationships_dir = self.root / RELATIONSHIPS_DIRNAME
+
+        self.structure_files: List[OntologyFile] = []
+        self.relationship_files: List[OntologyFile] = []
+
+        # Every structure entry that has an id, in file order (duplicates kept)
+        self.structure_records: List[dict] = []
+        # id -> record (a later duplicate wins)
+        self.structures: Dict[str, dict] = {}
+        self.relationships: List[dict] = []
+
+        self.children: Dict[Optional[str], List[str]] = defaultdict(list)
+        self.name_index: Dict[str, List[str]] = defaultdict(list)
+        # Exact-match reverse indexes; xref and external_id keys are uppercased
+        self.abbreviation_index: Dict[str, List[str]] = defaultdict(list)
+        self.xref_index: Dict[str, List[str]] = defaultdict(list)
+        self.external_id_index: Dict[str, List[str]] = defaultdict(list)
+        self.subject_index: Dict[str, List[dict]] = defaultdict(list)
+        self.object_index: Dict[str, List[dict]] = defaultdict(list)
+        self._hierarchy: Optional[HierarchyIndex] = None
+        self._name_search: Optional[TrigramIndex] = None
+
+        # Set when loaded from disk with the cache on (see name_search)
+        self.cache_dir: Optional[Path] = None
+        self.structures_signature: Optional[tuple] = None
+
+    # ------------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------------
+
+    @classmethod
+    def load(cls, root: Path = ROOT_DIR, use_cache: Optional[bool] = None) -> "Ontology":
+        """Parse every structure and relationship file under root."""
+        onto = cls(root)
+        if use_cache is None:
+            use_cache = CACHE_ENABLED
+        cache_dir = onto.root / CACHE_DIRNAME / "ontology" if use_cache else None
+
+        structure_paths = yaml_files(onto.structures_dir)
+        if cache_dir is not None:
+            onto.cache_dir = cache_dir
+            onto.structures_signature = tuple(
+                (p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in structure_paths
+            )
+        onto.structure_files = [load_file(p, cache_dir) for p in structure_paths]
+        onto.relationship_files = [load_file(p, cache_dir) for p in yaml_files(onto.relationships_dir)]
+
+        for file in onto.structure_files:
+            if not isinstance(file.data, dict):
+                continue
+            for struct in file.data.get("structures") or []:
+                if isinstance(struct, dict) and "id" in struct:
+                    onto.structure_records.append({**struct, "_source_file": file.name})
+
+        for file in onto.relationship_files:
+            if not isinstance(file.data, dict):
+                continue
+            for rel in file.data.get("relationships") or []:
+                if rel is not None:
+                    onto.relationships.append({**rel, "_source_file": file.name})
+
+        onto._build_indexes()
+        return onto
+
+    @classmethod
+    def from_records(
+        cls,
+        structures: Iterable[dict],
+        relationships: Iterable[dict] = (),
+        root: Path = ROOT_DIR
+    ) -> "Ontology":
+        """Build an ontology from already-loaded records (used by tests and tools)."""
+        onto = cls(root)
+        onto.structure_records = [s for s in structures if "id" in s]
+        onto.relationships = [r for r in relationships if r is not None]
+        onto._build_indexes()
+        return onto
+
+    def _build_indexes(self):
+        for struct in self.structure_records:
+            self.structures[struct["id"]] = struct
+
+        for struct_id, struct in self.structures.items():
+            self.children[struct.get("parent")].append(struct_id)
+            name = struct.get("name")
+            if name:
+                self.name_index[name.lower()].append(struct_id)
+            abbreviation = struct.get("abbreviation")
+            if abbreviation:
+                self.abbreviation_index[str(abbreviation)].append(struct_id)
+            xref = struct.get("xref")
+            if xref:
+                self.xref_index[str(xref).upper()].append(struct_id)
+            external_id = struct.get("external_id")
+            if external_id:
+                self.external_id_index[str(external_id).upper()].append(struct_id)
+
+        for rel in self.relationships:
+            subject = rel.get("subject")
+            obj = rel.get("object")
+            if subject:
+                self.subject_index[subject].append(rel)
+            if obj:
+                self.object_index[obj].append(rel)
+
+    # ------------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------------
+
+    def get(self, struct_id: str) -> Optional[dict]:
+        """Get a structure record by ID."""
+        return self.structures.get(struct_id)
+
+    def name_of(self, struct_id: str) -> str:
+        """Get a structure's name, falling back to its ID."""
+        return self.structures.get(struct_id, {}).get("name", struct_id)
+
+    def children_of(self, struct_id: Optional[str]) -> List[str]:
+        """Direct children of a structure (None gives the root structures)."""
+        return self.children.get(struct_id, [])
+
+    def roots(self) -> List[str]:
+        """Structures whose parent is null."""
+        return self.children_of(None)
+
+    def ids_by_name(self, name: str) -> List[str]:
+        """All structure IDs with this name (case-insensitive)."""
+        return self.name_index.get(name.lower().strip(), [])
+
+    def id_by_name(self, name: str) -> Optional[str]:
+        """The structure ID for a name, or None if absent (last duplicate wins)."""
+        ids = self.ids_by_name(name)
+        return ids[-1] if ids else None
+
+    def ids_by_abbreviation(self, abbreviation: str) -> List[str]:
+        """All structure IDs with this abbreviation (exact case), in file order."""
+        return self.abbreviation_index.get(abbreviation.strip(), [])
+
+    def ids_by_xref(self, xref: str) -> List[str]:
+        """All structure IDs cross-referenced to e.g. "ABA:695", in file order."""
+        return self.xref_index.get(xref.strip().upper(), [])
+
+    def ids_by_external_id(self, external_id: str) -> List[str]:
+        """All structure IDs with this external_id (e.g. "UBERON_0001234"), in file order."""
+        return self.external_id_index.get(external_id.strip().upper(), [])
+
+    def resolve(self, term: str) -> List[str]:
+        """
+        Structure IDs for a BAP ID, xref, external_id, abbreviation or name,
+        tried in that order; the first kind that matches wins. Lateralized
+        copies share their parent's xref and abbreviation, so a term can map
+        to several IDs; the first is the one listed first in the files.
+        """
+        term = term.strip()
+        if term in self.structures:
+            return [term]
+        return (self.ids_by_xref(term) or self.ids_by_external_id(term)
+                or self.ids_by_abbreviation(term) or self.ids_by_name(term))
+
+    def relationships_from(self, subject_id: str) -> List[dict]:
+        """Relationships whose subject is the given structure."""
+        return self.subject_index.get(subject_id, [])
+
+    def relationships_to(self, object_id: str) -> List[dict]:
+        """Relationships whose object is the given structure."""
+        return self.object_index.get(object_id, [])
+
+    def relationships_by_predicate(self) -> Dict[str, List[dict]]:
+        """Relationships grouped by predicate."""
+        grouped = defaultdict(list)
+        for rel in self.relationships:
+            grouped[rel.get("predicate", "unknown")].append(rel)
+        return dict(grouped)
+
+    @property
+    def hierarchy(self) -> HierarchyIndex:
+        """Depth / ancestor / descendant index, built on first use."""
+        if self._hierarchy is None:
+            self._hierarchy = HierarchyIndex.from_structures(self.structures)
+        return self._hierarchy
+
+    @property
+    def name_search(self) -> TrigramIndex:
+        """
+        Fuzzy lookup over names, abbreviations, synonyms and xrefs, built on
+        first use (and kept in the cache dir until a structure file changes).
+        """
+        if self._name_search is None:
+            path = self.cache_dir / "name_index.pickle" if self.cache_dir else None
+            if path:
+                self._name_search = TrigramIndex.load(path, self.structures_signature)
+            if self._name_search is None:
+                self._name_search = TrigramIndex.from_structures(self.structure_records)
+                if path:
+                    try:
+                        self._name_search.save(path, self.structures_signature)
+                    except OSError:
+                        # A read-only checkout just means no caching
+                        pass
+        return self._name_search
+
+    def hierarchy_cycles(self) -> List[List[str]]:
+        """Every distinct parent cycle (see find_hierarchy_cycles)."""
+        return find_hierarchy_cycles({
+            struct_id: struct.get("parent") for struct_id, struct in self.structures.items()
+        })
+
+    def max_id_number(self, default: int = 0) -> int:
+        """Largest numeric part of any BAP_ structure ID."""
+        max_id = default
+        for struct_id in self.structures:
+            if isinstance(struct_id, str) and struct_id.startswith("BAP_"):
+                try:
+                    max_id = max(max_id, int(struct_id.split("_")[1]))
+                except (ValueError, IndexError):
+                    pass
+        return max_id
+
+
+# ============================================================================
+# Process-wide Loader
+# ============================================================================
+
+_loaded: Dict[Path, Tuple[tuple, Ontology]] = {}
+
+
+def _files_signature(root: Path) -> tuple:
+    """Cheap stat-based fingerprint of every YAML file under root."""
+    signature = []
+    for dirname in (STRUCTURES_DIRNAME, RELATIONSHIPS_DIRNAME):
+        for path in yaml_files(root / dirname):
+            stat = path.stat()
+            signature.append((str(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def load_ontology(
+    root: Optional[Path] = None,
+    refresh: bool = False,
+    use_cache: Optional[bool] = None
+) -> Ontology:
+    """
+    Load the ontology, reusing the copy already parsed by this process.
+
+    The in-process copy is reused as long as no YAML file under root has
+    changed size or modification time, so scripts that edit files and then
+    reload see their own changes. Files are read through the on-disk parse
+    cache unless use_cache is False (default: on unless BAP_NO_CACHE is set).
+    """
+    root = Path(root if root is not None else ROOT_DIR).resolve()
+    signature = _files_signature(root)
+
+    cached = _loaded.get(root)
+    if cached and not refresh and cached[0] == signature:
+        return cached[1]
+
+    onto = Ontology.load(root, use_cache=use_cache)
+    _loaded[root] = (signature, onto)
+    return onto
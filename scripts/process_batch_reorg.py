@@ -6,10 +6,12 @@ Moves multiple structures to a new parent, optionally creating the parent first.
 
 import os
 import re
-import yaml
+import yaml_fast
 from pathlib import Path
 from typing import Optional
 
+from yaml_utils import OntologyWriter
+
 
 def parse_issue_body(body: str) -> dict:
     """Parse the structured issue body into a dictionary."""
@@ -41,7 +43,7 @@ def load_all_structures(structures_dir: Path) -> dict:
     
     for yaml_file in structures_dir.glob('*.yaml'):
         with open(yaml_file) as f:
-            data = yaml.safe_load(f)
+            data = yaml_fast.safe_load(f)
             if data and 'structures' in data:
                 for struct in data['structures']:
                     if 'id' in struct:
@@ -73,34 +75,6 @@ def get_next_id(structures: dict) -> str:
     return f"BAP_{max_id + 1:07d}"
 
 
-def add_structure_to_file(filepath: Path, new_struct: dict):
-    """Add a new structure to a YAML file."""
-    with open(filepath) as f:
-        data = yaml.safe_load(f) or {'structures': []}
-    
-    if 'structures' not in data:
-        data['structures'] = []
-    
-    data['structures'].append(new_struct)
-    
-    with open(filepath, 'w') as f:
-        yaml.dump(data, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
-
-
-def update_structure_parent(filepath: Path, struct_id: str, new_parent_id: str):
-    """Update the parent of a structure in a YAML file."""
-    with open(filepath) as f:
-        data = yaml.safe_load(f)
-    
-    for struct in data.get('structures', []):
-        if struct.get('id') == struct_id:
-            struct['parent'] = new_parent_id
-            break
-    
-    with open(filepath, 'w') as f:
-        yaml.dump(data, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
-
-
 def main():
     issue_body = os.environ.get('ISSUE_BODY', '')
     issue_number = os.environ.get('ISSUE_NUMBER', 'unknown')
@@ -137,6 +111,9 @@ def main():
         print("Missing required fields")
         return
     
+    # All edits are applied in memory and each file is written once at the end
+    writer = OntologyWriter(structures_dir)
+    
     # Find or create the new parent
     new_parent_id = find_structure_by_name(structures, new_parent_name)
     
@@ -159,7 +136,7 @@ def main():
         
         # Add to body_regions.yaml (or appropriate file based on region)
         target_file = structures_dir / 'body_regions.yaml'
-        add_structure_to_file(target_file, new_parent_struct)
+        writer.add_structure(target_file, new_parent_struct)
         print(f"✓ Created new parent: {new_parent_name} ({new_parent_id})")
         
         # Update our local structures dict
@@ -187,10 +164,13 @@ def main():
             continue
         
         old_parent = structures[struct_id].get('parent', 'None')
-        update_structure_parent(filepath, struct_id, new_parent_id)
+        writer.update_structure_parent(filepath, struct_id, new_parent_id)
         moved.append(f"{struct_name}: {old_parent} → {new_parent_id}")
         print(f"✓ Moved {struct_name} to {new_parent_name}")
     
+    written = writer.commit()
+    print(f"Wrote {len(written)} file(s)")
+    
     # Write summary
     with open('REORG_SUMMARY.md', 'w') as f:
         f.write(f"# Batch Reorganization Summary\n\n")
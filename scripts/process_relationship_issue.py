@@ -7,6 +7,7 @@ Parses the issue body and appends to the appropriate relationship YAML.
 import os
 import re
 import yaml
+import yaml_fast
 from pathlib import Path
 
 
@@ -37,7 +38,7 @@ def find_structure_id(structures_dir: Path, name: str) -> str | None:
     """Find the ID of a structure by name."""
     for yaml_file in structures_dir.glob('*.yaml'):
         with open(yaml_file) as f:
-            data = yaml.safe_load(f)
+            data = yaml_fast.safe_load(f)
             if data and 'structures' in data:
                 for struct in data['structures']:
                     if struct.get('name', '').lower() == name.lower():
@@ -61,7 +62,7 @@ def add_relationship_to_yaml(file_path: Path, new_rel: dict):
     """Add a new relationship to the YAML file."""
     if file_path.exists():
         with open(file_path) as f:
-            data = yaml.safe_load(f) or {'relationships': []}
+            data = yaml_fast.safe_load(f) or {'relationships': []}
     else:
         data = {'relationships': []}
     
@@ -13,6 +13,8 @@ from datetime import datetime
 # Add scripts directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
+from structure_index import load_structure_index
+
 try:
     from yaml_utils import (
         load_yaml, save_yaml, remove_structure_by_index, 
@@ -21,6 +23,7 @@ try:
     USE_RUAMEL = True
 except ImportError:
     import yaml
+    import yaml_fast
     USE_RUAMEL = False
 
 
@@ -53,7 +56,7 @@ def _load_yaml_file(filepath: Path) -> dict:
         return load_yaml(filepath)
     else:
         with open(filepath) as f:
-            return yaml.safe_load(f) or {}
+            return yaml_fast.safe_load(f) or {}
 
 
 def _save_yaml_file(filepath: Path, data: dict):
@@ -67,13 +70,13 @@ def _save_yaml_file(filepath: Path, data: dict):
 
 def find_structure_in_files(structures_dir: Path, name: str) -> tuple[Path | None, dict | None, int | None]:
     """Find a structure by name, return (file_path, structure_dict, index)."""
-    for yaml_file in structures_dir.glob('*.yaml'):
-        data = _load_yaml_file(yaml_file)
-        if data and 'structures' in data:
-            for i, struct in enumerate(data['structures']):
-                if struct.get('name', '').lower() == name.lower():
-                    return yaml_file, dict(struct), i
-    return None, None, None
+    matches = load_structure_index(structures_dir).find_by_name(name)
+    if not matches:
+        return None, None, None
+    
+    loc = matches[0]
+    data = _load_yaml_file(loc.path)
+    return loc.path, dict(data['structures'][loc.index]), loc.index
 
 
 def find_children(structures_dir: Path, parent_id: str) -> list[dict]:
@@ -7,6 +7,7 @@ Parses the issue body and generates the appropriate YAML entry.
 import os
 import re
 import yaml
+import yaml_fast
 from pathlib import Path
 
 
@@ -42,7 +43,7 @@ def get_next_id(structures_dir: Path, region: str) -> str:
     
     for yaml_file in structures_dir.glob('*.yaml'):
         with open(yaml_file) as f:
-            data = yaml.safe_load(f)
+            data = yaml_fast.safe_load(f)
             if data and 'structures' in data:
                 for struct in data['structures']:
                     if 'id' in struct and struct['id'].startswith('BAP_'):
@@ -59,7 +60,7 @@ def find_parent_id(structures_dir: Path, parent_name: str) -> str | None:
     """Find the ID of a parent structure by name."""
     for yaml_file in structures_dir.glob('*.yaml'):
         with open(yaml_file) as f:
-            data = yaml.safe_load(f)
+            data = yaml_fast.safe_load(f)
             if data and 'structures' in data:
                 for struct in data['structures']:
                     if struct.get('name', '').lower() == parent_name.lower():
@@ -87,7 +88,7 @@ def determine_target_file(region: str, system: str) -> str:
 def add_structure_to_yaml(file_path: Path, new_structure: dict):
     """Add a new structure to the YAML file."""
     with open(file_path) as f:
-        data = yaml.safe_load(f) or {'structures': []}
+        data = yaml_fast.safe_load(f) or {'structures': []}
     
     if 'structures' not in data:
         data['structures'] = []
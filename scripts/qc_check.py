@@ -10,39 +10,17 @@ import sys
 from pathlib import Path
 from collections import defaultdict
 
-import yaml
+from ontology import find_hierarchy_cycles, load_ontology
 
 
 def load_all_structures() -> list[dict]:
     """Load all structures from YAML files."""
-    structures = []
-    structures_dir = Path('structures')
-    
-    for yaml_file in structures_dir.glob('*.yaml'):
-        with open(yaml_file) as f:
-            data = yaml.safe_load(f)
-            if data and 'structures' in data:
-                for struct in data['structures']:
-                    struct['_file'] = yaml_file.name
-                    structures.append(struct)
-    
-    return structures
+    return list(load_ontology(Path('.')).structure_records)
 
 
 def load_all_relationships() -> list[dict]:
     """Load all relationships from YAML files."""
-    relationships = []
-    rel_dir = Path('relationships')
-    
-    for yaml_file in rel_dir.glob('*.yaml'):
-        with open(yaml_file) as f:
-            data = yaml.safe_load(f)
-            if data and 'relationships' in data and data['relationships']:
-                for rel in data['relationships']:
-                    rel['_file'] = yaml_file.name
-                    relationships.append(rel)
-    
-    return relationships
+    return list(load_ontology(Path('.')).relationships)
 
 
 def check_orphans(structures: list[dict]) -> list[dict]:
@@ -59,7 +37,7 @@ def check_orphans(structures: list[dict]) -> list[dict]:
                 'structure': struct['name'],
                 'id': struct['id'],
                 'message': f"Parent '{parent}' not found",
-                'file': struct['_file']
+                'file': struct['_source_file']
             })
     
     return issues
@@ -77,7 +55,7 @@ def check_missing_definitions(structures: list[dict]) -> list[dict]:
                 'structure': struct['name'],
                 'id': struct['id'],
                 'message': "No definition provided",
-                'file': struct['_file']
+                'file': struct['_source_file']
             })
     
     return issues
@@ -100,40 +78,29 @@ def check_duplicate_names(structures: list[dict]) -> list[dict]:
                 'structure': structs[0]['name'],
                 'id': ids[0],
                 'message': f"Name appears {len(structs)} times: {ids}",
-                'file': structs[0]['_file']
+                'file': structs[0]['_source_file']
             })
     
     return issues
 
 
 def check_circular_references(structures: list[dict]) -> list[dict]:
-    """Check for circular parent references."""
+    """Check for circular parent references (one issue per distinct cycle)."""
     issues = []
     id_to_struct = {s['id']: s for s in structures}
-    
-    for struct in structures:
-        visited = set()
-        current = struct
-        
-        while current:
-            if current['id'] in visited:
-                issues.append({
-                    'type': 'circular_reference',
-                    'severity': 'error',
-                    'structure': struct['name'],
-                    'id': struct['id'],
-                    'message': f"Circular reference detected: {' -> '.join(visited)} -> {current['id']}",
-                    'file': struct['_file']
-                })
-                break
-            
-            visited.add(current['id'])
-            parent_id = current.get('parent')
-            
-            if parent_id and parent_id in id_to_struct:
-                current = id_to_struct[parent_id]
-            else:
-                break
+    parent_map = {struct_id: s.get('parent') for struct_id, s in id_to_struct.items()}
+    
+    for cycle in find_hierarchy_cycles(parent_map):
+        struct = id_to_struct[cycle[0]]
+        issues.append({
+            'type': 'circular_reference',
+            'severity': 'error',
+            'structure': struct['name'],
+            'id': struct['id'],
+            'members': cycle,
+            'message': f"Circular reference detected: {' -> '.join(cycle + cycle[:1])}",
+            'file': struct['_source_file']
+        })
     
     return issues
 
@@ -151,7 +118,7 @@ def check_broken_relationships(structures: list[dict], relationships: list[dict]
                 'structure': rel['subject'],
                 'id': rel['subject'],
                 'message': f"Subject '{rel['subject']}' not found in structures",
-                'file': rel['_file']
+                'file': rel['_source_file']
             })
         
         if rel.get('object') and rel['object'] not in all_ids:
@@ -161,7 +128,7 @@ def check_broken_relationships(structures: list[dict], relationships: list[dict]
                 'structure': rel['object'],
                 'id': rel['object'],
                 'message': f"Object '{rel['object']}' not found in structures",
-                'file': rel['_file']
+                'file': rel['_source_file']
             })
     
     return issues
@@ -185,7 +152,7 @@ def check_structures_no_relationships(structures: list[dict], relationships: lis
                 'structure': struct['name'],
                 'id': struct['id'],
                 'message': "Structure has no relationships",
-                'file': struct['_file']
+                'file': struct['_source_file']
             })
     
     return issues
@@ -213,7 +180,7 @@ def check_unused_structures(structures: list[dict], relationships: list[dict]) -
                 'structure': struct['name'],
                 'id': struct['id'],
                 'message': "Structure has no children and no relationships",
-                'file': struct['_file']
+                'file': struct['_source_file']
             })
     
     return issues
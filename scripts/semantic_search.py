@@ -1,23 +1,78 @@
 #!/usr/bin/env python3
 """
 Semantic search for finding existing structures.
-Uses pre-computed embeddings (no model needed at runtime).
+Uses pre-computed embeddings (generate_embeddings.py); the model is only
+needed to embed the query.
+
+Embeddings are stored as two files:
+    data/embeddings.json        model name and the structures, in row order
+    data/embeddings.<hash>.npy  float32 matrix, one L2-normalised row per
+                                structure (named by 'matrix_file' in the JSON)
+
+The matrix is memory-mapped, so scoring every structure is a single
+matrix-vector product. For very large stores an optional IVF index
+(ann_index.py, data/embeddings.ivf.npz) limits scoring to the closest lists.
 """
 
 import json
 import numpy as np
 from pathlib import Path
 
+from name_index import TrigramIndex
+
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBEDDINGS_FILE = Path('data/embeddings.npy')
+METADATA_FILE = Path('data/embeddings.json')
+ANN_INDEX_FILE = Path('data/embeddings.ivf.npz')
+
+# Loaded models, so repeated queries in one process do not reload them
+_models = {}
+
+
+def get_model(name: str = MODEL_NAME):
+    """Load a SentenceTransformer once per process. Raises ImportError if unavailable."""
+    if name not in _models:
+        from sentence_transformers import SentenceTransformer
+        _models[name] = SentenceTransformer(name)
+    return _models[name]
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise vectors (rows of a matrix) as float32; zero vectors stay zero."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
 
 def load_embeddings() -> dict | None:
-    """Load pre-computed embeddings."""
-    embeddings_file = Path('data/embeddings.json')
-    
-    if not embeddings_file.exists():
+    """
+    Load pre-computed embeddings.
+
+    Returns the metadata with the vectors under 'matrix' (and the ANN index,
+    if one was built, under 'index'). A data/embeddings.json
+    from before the .npy store (vectors inline as 'embedding') still loads.
+    """
+    if not METADATA_FILE.exists():
         return None
     
-    with open(embeddings_file) as f:
-        return json.load(f)
+    with open(METADATA_FILE) as f:
+        data = json.load(f)
+    
+    matrix_file = METADATA_FILE.parent / data.get('matrix_file', EMBEDDINGS_FILE.name)
+    if matrix_file.exists():
+        data['matrix'] = np.load(matrix_file, mmap_mode='r')
+    elif data['structures'] and 'embedding' in data['structures'][0]:
+        data['matrix'] = normalize([s.pop('embedding') for s in data['structures']])
+    
+    # Optional ANN index (generate_embeddings.py --ann), only if built for this matrix
+    if matrix_file.exists() and ANN_INDEX_FILE.exists():
+        from ann_index import IVFIndex
+        index = IVFIndex.load(ANN_INDEX_FILE)
+        if index is not None and index.matrix_file == matrix_file.name:
+            data['index'] = index
+    
+    return data
 
 
 def cosine_similarity(a: list, b: list) -> float:
@@ -27,6 +82,70 @@ def cosine_similarity(a: list, b: list) -> float:
     return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
 
 
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k scores, best first (ties by row order)."""
+    if top_k < len(scores):
+        # Everything tied with the k-th best, so ties break the same way every time
+        kth = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.lexsort((candidates, -scores[candidates]))][:top_k]
+
+
+def search_matrix_batch(matrix: np.ndarray, query_vectors, top_k: int = 5, threshold: float = 0.5) -> list[list[tuple[int, float]]]:
+    """(row, similarity) of the closest rows for each query vector, from one matrix product."""
+    query_vectors = normalize(query_vectors)
+    if top_k <= 0 or len(matrix) == 0:
+        return [[] for _ in query_vectors]
+    scores = query_vectors @ matrix.T
+    return [
+        [(int(i), float(row[i])) for i in top_k_indices(row, top_k) if row[i] >= threshold]
+        for row in scores
+    ]
+
+
+def search_matrix(matrix: np.ndarray, query_vector, top_k: int = 5, threshold: float = 0.5) -> list[tuple[int, float]]:
+    """(row, similarity) of the rows of a normalised matrix closest to query_vector."""
+    return search_matrix_batch(matrix, [query_vector], top_k, threshold)[0]
+
+
+def find_similar_structures_batch(queries: list[str], embeddings_data: dict, top_k: int = 5, threshold: float = 0.5) -> list[list[dict]]:
+    """
+    find_similar_structures() for many queries: one encode call and one
+    matrix-matrix product. Returns a result list per query, in order.
+    """
+    if not queries:
+        return []
+    
+    try:
+        model = get_model(embeddings_data.get('model', MODEL_NAME))
+    except ImportError:
+        return [find_by_name(query, embeddings_data) for query in queries]
+    
+    if embeddings_data.get('matrix') is None:
+        return [find_by_name(query, embeddings_data) for query in queries]
+    
+    structures = embeddings_data['structures']
+    query_vectors = model.encode(list(queries))
+    if embeddings_data.get('index') is not None:
+        matches = embeddings_data['index'].search_batch(embeddings_data['matrix'], query_vectors, top_k, threshold)
+    else:
+        matches = search_matrix_batch(embeddings_data['matrix'], query_vectors, top_k, threshold)
+    return [
+        [
+            {
+                'id': structures[row]['id'],
+                'name': structures[row]['name'],
+                'definition': structures[row].get('definition', ''),
+                'similarity': similarity
+            }
+            for row, similarity in query_matches
+        ]
+        for query_matches in matches
+    ]
+
+
 def find_similar_structures(query: str, embeddings_data: dict, top_k: int = 5, threshold: float = 0.5) -> list[dict]:
     """
     Find structures similar to the query.
@@ -34,57 +153,42 @@ def find_similar_structures(query: str, embeddings_data: dict, top_k: int = 5, t
     Note: This requires the same embedding model used during generation.
     For GitHub Actions, we use a simple fallback (exact/fuzzy match).
     """
-    # Try to use sentence-transformers if available
-    try:
-        from sentence_transformers import SentenceTransformer
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        query_embedding = model.encode(query).tolist()
-    except ImportError:
-        # Fallback: exact name matching
-        return find_by_name(query, embeddings_data)
-    
-    results = []
-    for struct in embeddings_data['structures']:
-        similarity = cosine_similarity(query_embedding, struct['embedding'])
-        if similarity >= threshold:
-            results.append({
-                'id': struct['id'],
-                'name': struct['name'],
-                'definition': struct.get('definition', ''),
-                'similarity': float(similarity)
-            })
-    
-    # Sort by similarity
-    results.sort(key=lambda x: x['similarity'], reverse=True)
-    return results[:top_k]
+    return find_similar_structures_batch([query], embeddings_data, top_k, threshold)[0]
+
+
+# Trigram index over the names of the last embeddings_data searched by name
+_name_index: tuple = (None, None)
+
+
+def name_index_for(embeddings_data: dict) -> TrigramIndex:
+    """Trigram index from structure name to row, built once per structure list."""
+    global _name_index
+    structures = embeddings_data['structures']
+    if _name_index[0] is not structures:
+        index = TrigramIndex()
+        for row, struct in enumerate(structures):
+            index.add(struct['name'], str(row))
+        _name_index = (structures, index)
+    return _name_index[1]
 
 
 def find_by_name(query: str, embeddings_data: dict) -> list[dict]:
     """Fallback: Find by exact or partial name match."""
     query_lower = query.lower().strip()
+    structures = embeddings_data['structures']
     results = []
     
-    for struct in embeddings_data['structures']:
-        name_lower = struct['name'].lower()
-        
-        # Exact match
-        if name_lower == query_lower:
-            results.append({
-                'id': struct['id'],
-                'name': struct['name'],
-                'definition': struct.get('definition', ''),
-                'similarity': 1.0,
-                'match_type': 'exact'
-            })
-        # Partial match
-        elif query_lower in name_lower or name_lower in query_lower:
-            results.append({
-                'id': struct['id'],
-                'name': struct['name'],
-                'definition': struct.get('definition', ''),
-                'similarity': 0.8,
-                'match_type': 'partial'
-            })
+    # Candidates come from the trigram index, best similarity first
+    for match in name_index_for(embeddings_data).partial(query_lower):
+        struct = structures[int(match.value)]
+        exact = match.key == query_lower
+        results.append({
+            'id': struct['id'],
+            'name': struct['name'],
+            'definition': struct.get('definition', ''),
+            'similarity': 1.0 if exact else 0.8,
+            'match_type': 'exact' if exact else 'partial'
+        })
     
     results.sort(key=lambda x: x['similarity'], reverse=True)
     return results[:5]
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Structure Location Index
+
+Maps structure IDs and lowercase names to where they live on disk:
+(file, position in the `structures:` list, line number). Scripts that edit a
+single structure use it instead of parsing every file under structures/ to
+find one entry.
+
+The index is stored in .cache/ontology/structure_index.pickle. On each use
+the structure files are stat'ed; only files whose size/mtime changed are
+re-read, and only files whose SHA-256 changed are re-indexed.
+
+Usage:
+    from structure_index import load_structure_index
+
+    index = load_structure_index(Path('structures'))
+    loc = index.locate("BAP_0000015")
+    print(loc.path, loc.index, loc.line)
+"""
+
+import os
+import pickle
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass
+
+import yaml
+
+import yaml_fast
+from ontology import ROOT_DIR, STRUCTURES_DIRNAME, CACHE_DIRNAME, CACHE_ENABLED, yaml_files
+
+
+INDEX_VERSION = 1
+INDEX_FILENAME = "structure_index.pickle"
+
+
+# ============================================================================
+# Data Classes
+# ============================================================================
+
+@dataclass(frozen=True)
+class StructureLocation:
+    """Where one structure entry sits in the YAML files."""
+    path: Path
+    index: int  # position in the file's structures list
+    line: int   # 1-based line of the entry's first key
+    id: str
+    name: Optional[str] = None
+
+
+# ============================================================================
+# Indexing
+# ============================================================================
+
+def _scalar(node) -> Optional[str]:
+    if isinstance(node, yaml.ScalarNode) and not node.tag.endswith(":null"):
+        return node.value
+    return None
+
+
+def index_yaml_text(text: str) -> List[Tuple[str, Optional[str], int, int]]:
+    """
+    Find (id, name, list index, line) for every structure in a YAML document.
+
+    Works on the node tree (yaml.compose) rather than the parsed data so the
+    line numbers come for free.
+    """
+    root = yaml.compose(text, Loader=yaml_fast.SafeLoader)
+    if not isinstance(root, yaml.MappingNode):
+        return []
+
+    entries = []
+    for key, value in root.value:
+        if _scalar(key) != "structures" or not isinstance(value, yaml.SequenceNode):
+            continue
+        for i, item in enumerate(value.value):
+            if not isinstance(item, yaml.MappingNode):
+                continue
+            fields = {_scalar(k): v for k, v in item.value}
+            struct_id = _scalar(fields.get("id"))
+            if struct_id:
+                entries.append((struct_id, _scalar(fields.get("name")), i, item.start_mark.line + 1))
+    return entries
+
+
+class StructureIndex:
+    """ID/name -> StructureLocation for every file in a structures directory."""
+
+    def __init__(self, structures_dir: Path, cache_dir: Optional[Path] = None):
+        self.structures_dir = Path(structures_dir)
+        self.cache_dir = cache_dir
+        # filename -> {"size", "mtime_ns", "sha256", "entries"}
+        self._files: Dict[str, dict] = {}
+        self._by_id: Dict[str, List[StructureLocation]] = {}
+        self._by_name: Dict[str, List[StructureLocation]] = {}
+        self._read_cache()
+
+    # ------------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------------
+
+    @property
+    def cache_path(self) -> Optional[Path]:
+        return self.cache_dir / INDEX_FILENAME if self.cache_dir else None
+
+    def _read_cache(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return
+        if isinstance(cached, dict) and cached.get("version") == INDEX_VERSION:
+            self._files = cached["files"]
+
+    def _write_cache(self):
+        if not self.cache_path:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({"version": INDEX_VERSION, "files": self._files}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------------
+
+    def refresh(self) -> List[str]:
+        """Re-index files that changed on disk. Returns the re-indexed names."""
+        changed = []
+        stale = False
+        present = set()
+
+        for path in yaml_files(self.structures_dir):
+            present.add(path.name)
+            stat = path.stat()
+            entry = self._files.get(path.name)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                continue
+
+            raw = path.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+            if not entry or entry["sha256"] != digest:
+                try:
+                    entries = index_yaml_text(raw.decode('utf-8'))
+                except (yaml.YAMLError, UnicodeDecodeError):
+                    entries = []
+                changed.append(path.name)
+            else:
+                entries = entry["entries"]
+
+            self._files[path.name] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": digest,
+                "entries": entries,
+            }
+            stale = True
+
+        for name in set(self._files) - present:
+            del self._files[name]
+            stale = True
+
+        if stale or not self._by_id:
+            self._rebuild_lookups()
+        if stale:
+            self._write_cache()
+        return changed
+
+    def _rebuild_lookups(self):
+        self._by_id = {}
+        self._by_name = {}
+        for filename in sorted(self._files):
+            path = self.structures_dir / filename
+            for struct_id, name, i, line in self._files[filename]["entries"]:
+                loc = StructureLocation(path, i, line, struct_id, name)
+                self._by_id.setdefault(struct_id, []).append(loc)
+                if name:
+                    self._by_name.setdefault(name.lower().strip(), []).append(loc)
+
+    # ------------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------------
+
+    def locate(self, struct_id: str) -> Optional[StructureLocation]:
+        """First location of a structure ID (files in sorted order)."""
+        locations = self._by_id.get(struct_id)
+        return locations[0] if locations else None
+
+    def locate_all(self, struct_id: str) -> List[StructureLocation]:
+        """Every location of a structure ID, including duplicates."""
+        return list(self._by_id.get(struct_id, []))
+
+    def find_by_name(self, name: str) -> List[StructureLocation]:
+        """Locations of structures with this name (case-insensitive)."""
+        return list(self._by_name.get(name.lower().strip(), []))
+
+    def __contains__(self, struct_id: str) -> bool:
+        return struct_id in self._by_id
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+# ============================================================================
+# Process-wide Loader
+# ============================================================================
+
+_indexes: Dict[Path, StructureIndex] = {}
+
+
+def load_structure_index(
+    structures_dir: Optional[Path] = None,
+    use_cache: Optional[bool] = None
+) -> StructureIndex:
+    """
+    Get the index for a structures directory, refreshed against the files.
+
+    The refresh only stats the files, so it is cheap to call before every
+    lookup; files edited since the last call are re-indexed.
+    """
+    structures_dir = Path(structures_dir if structures_dir is not None else ROOT_DIR / STRUCTURES_DIRNAME)
+    key = structures_dir.resolve()
+    if use_cache is None:
+        use_cache = CACHE_ENABLED
+
+    index = _indexes.get(key)
+    if index is None:
+        cache_dir = key.parent / CACHE_DIRNAME / "ontology" if use_cache else None
+        index = StructureIndex(structures_dir, cache_dir)
+        _indexes[key] = index
+
+    index.refresh()
+    return index
@@ -6,9 +6,14 @@ Synchronizes YAML structure and relationship definitions to the PostgreSQL datab
 This script is designed to be run by GitHub Actions on merge to main.
 
 Usage:
-    python scripts/sync_to_db.py
+    python scripts/sync_to_db.py            # Set-based sync of changed rows (see db_sync.py)
     python scripts/sync_to_db.py --dry-run  # Preview changes without applying
     python scripts/sync_to_db.py --force    # Skip confirmation prompts
+    python scripts/sync_to_db.py --full     # Re-check every row, not just changed ones
+    python scripts/sync_to_db.py --rowwise  # Previous engine: one query per row, every row
+    python scripts/sync_to_db.py --reconcile --dry-run  # Report rows the YAML no longer has
+    python scripts/sync_to_db.py --reconcile --hard-delete  # Delete them instead of tombstoning
+    python scripts/sync_to_db.py --async --pool-size 8  # Pooled asyncpg engine (db_sync_async.py)
 
 Environment Variables:
     DB_HOST     - Database host (default: localhost)
@@ -23,9 +28,6 @@ import sys
 import argparse
 from pathlib import Path
 from typing import Dict, List, Set, Tuple, Optional
-from dataclasses import dataclass
-
-import yaml
 
 try:
     import psycopg2
@@ -34,6 +36,12 @@ except ImportError:
     print("Error: psycopg2 not installed. Run: pip install psycopg2-binary")
     sys.exit(1)
 
+from ontology import load_ontology
+from db_sync import (
+    DIGEST_TABLES, SyncStats, IdAllocator, bap_id_to_db_id, ensure_sync_tables,
+    get_relationship_type_map, run_bulk_sync
+)
+
 
 # ============================================================================
 # Configuration
@@ -56,85 +64,18 @@ DB_CONFIG = {
 BAP_NOMENCLATURE_ID = 1  # Adjust based on your database
 
 
-# ============================================================================
-# Data Classes
-# ============================================================================
-
-@dataclass
-class SyncStats:
-    structures_added: int = 0
-    structures_updated: int = 0
-    structures_unchanged: int = 0
-    hierarchies_added: int = 0
-    hierarchies_updated: int = 0
-    relationships_added: int = 0
-    relationships_updated: int = 0
-    errors: List[str] = None
-    
-    def __post_init__(self):
-        if self.errors is None:
-            self.errors = []
-    
-    def print_summary(self):
-        print("\n" + "=" * 50)
-        print("📊 SYNC SUMMARY")
-        print("=" * 50)
-        print(f"  Structures added:    {self.structures_added}")
-        print(f"  Structures updated:  {self.structures_updated}")
-        print(f"  Structures unchanged:{self.structures_unchanged}")
-        print(f"  Hierarchies added:   {self.hierarchies_added}")
-        print(f"  Hierarchies updated: {self.hierarchies_updated}")
-        print(f"  Relationships added: {self.relationships_added}")
-        print(f"  Relationships updated:{self.relationships_updated}")
-        
-        if self.errors:
-            print(f"\n❌ ERRORS ({len(self.errors)}):")
-            for err in self.errors[:10]:
-                print(f"  - {err}")
-        else:
-            print("\n✅ No errors!")
-        print("=" * 50)
-
-
 # ============================================================================
 # YAML Loading
 # ============================================================================
 
-def load_yaml_files(directory: Path) -> List[dict]:
-    """Load all YAML files from a directory."""
-    data = []
-    if not directory.exists():
-        return data
-    
-    for filepath in sorted(directory.glob("*.yaml")):
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
-                if content:
-                    data.append(content)
-        except Exception as e:
-            print(f"Warning: Failed to load {filepath}: {e}")
-    
-    return data
-
-
 def load_all_structures() -> Dict[str, dict]:
     """Load all structures from YAML files."""
-    structures = {}
-    for data in load_yaml_files(STRUCTURES_DIR):
-        for struct in data.get("structures", []):
-            if "id" in struct:
-                structures[struct["id"]] = struct
-    return structures
+    return dict(load_ontology(ROOT_DIR).structures)
 
 
 def load_all_relationships() -> List[dict]:
     """Load all relationships from YAML files."""
-    relationships = []
-    for data in load_yaml_files(RELATIONSHIPS_DIR):
-        rels = data.get("relationships") or []  # Handle None case
-        relationships.extend([r for r in rels if r is not None])
-    return relationships
+    return list(load_ontology(ROOT_DIR).relationships)
 
 
 # ============================================================================
@@ -146,13 +87,6 @@ def get_db_connection():
     return psycopg2.connect(**DB_CONFIG)
 
 
-def bap_id_to_db_id(bap_id: str) -> int:
-    """Extract numeric ID from BAP ID (BAP_0000015 -> 15)."""
-    # Remove BAP_ prefix and leading zeros, convert to int
-    numeric_part = bap_id.replace("BAP_", "")
-    return int(numeric_part)  # int() handles leading zeros automatically
-
-
 def get_existing_structures(conn) -> Dict[str, dict]:
     """Get existing structures from database."""
     cur = conn.cursor()
@@ -189,13 +123,6 @@ def get_existing_hierarchies(conn) -> Dict[int, int]:
     return {row[0]: row[1] for row in cur.fetchall()}
 
 
-def get_relationship_type_map(conn) -> Dict[str, int]:
-    """Get relationship type name -> ID mapping."""
-    cur = conn.cursor()
-    cur.execute("SELECT id, name FROM relationship_type")
-    return {row[1].lower(): row[0] for row in cur.fetchall()}
-
-
 def sync_structures(
     conn,
     yaml_structures: Dict[str, dict],
@@ -266,10 +193,7 @@ def sync_hierarchies(
 ):
     """Sync hierarchy relationships to database."""
     cur = conn.cursor()
-    
-    # Get the next available ID for hierarchy table
-    cur.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM anatomical_structure_hierarchy")
-    next_id = cur.fetchone()[0]
+    new_rows = []
     
     for bap_id, struct in yaml_structures.items():
         parent_bap_id = struct.get('parent')
@@ -295,13 +219,7 @@ def sync_hierarchies(
         if existing_parent is None:
             # Insert new hierarchy
             print(f"    + ADD hierarchy: {struct_name} (ID:{child_db_id}) -> parent: {parent_name} (ID:{parent_db_id})")
-            if not dry_run:
-                cur.execute("""
-                    INSERT INTO anatomical_structure_hierarchy 
-                    (id, anatomical_entity_id, parent_entity_id)
-                    VALUES (%s, %s, %s)
-                """, (next_id, child_db_id, parent_db_id))
-            next_id += 1
+            new_rows.append((child_db_id, parent_db_id))
             stats.hierarchies_added += 1
         elif existing_parent != parent_db_id:
             # Update hierarchy
@@ -313,6 +231,15 @@ def sync_hierarchies(
                     WHERE anatomical_entity_id = %s
                 """, (parent_db_id, child_db_id))
             stats.hierarchies_updated += 1
+    
+    if new_rows and not dry_run:
+        # IDs come from the sequence in one block, not MAX(id)+1
+        ids = IdAllocator(conn, "anatomical_structure_hierarchy").take(len(new_rows))
+        execute_values(cur, """
+            INSERT INTO anatomical_structure_hierarchy
+            (id, anatomical_entity_id, parent_entity_id)
+            VALUES %s
+        """, [(new_id, *row) for new_id, row in zip(ids, new_rows)])
 
 
 def sync_relationships(
@@ -326,6 +253,8 @@ def sync_relationships(
 ):
     """Sync relationships to database."""
     cur = conn.cursor()
+    new_rows = []
+    pending = set()
     
     for rel in yaml_relationships:
         subject_bap = rel.get('subject')
@@ -360,29 +289,90 @@ def sync_relationships(
         """, (subject_id, object_id, rel_type_id))
         
         existing = cur.fetchone()
+        key = (subject_id, object_id, rel_type_id)
         
-        if existing is None:
+        if existing is None and key not in pending:
             print(f"    + ADD relationship: {subject_name} --[{predicate}]--> {object_name}")
-            if not dry_run:
-                # Get next available ID
-                cur.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM anatomical_structure_relationship")
-                next_id = cur.fetchone()[0]
-                
-                cur.execute("""
-                    INSERT INTO anatomical_structure_relationship
-                    (id, entity1_id, entity2_id, relationship_type_id, notes)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (next_id, subject_id, object_id, rel_type_id, rel.get('notes')))
+            pending.add(key)
+            new_rows.append((*key, rel.get('notes')))
             stats.relationships_added += 1
         # Note: We don't update existing relationships to avoid conflicts
+    
+    if new_rows and not dry_run:
+        ids = IdAllocator(conn, "anatomical_structure_relationship").take(len(new_rows))
+        execute_values(cur, """
+            INSERT INTO anatomical_structure_relationship
+            (id, entity1_id, entity2_id, relationship_type_id, notes)
+            VALUES %s
+        """, [(new_id, *row) for new_id, row in zip(ids, new_rows)])
 
 
 # ============================================================================
 # Main Sync Function
 # ============================================================================
 
-def run_sync(dry_run: bool = False, force: bool = False) -> SyncStats:
-    """Run the full sync process."""
+def confirm(structure_count: int) -> bool:
+    print(f"\nThis will sync {structure_count} structures to the database.")
+    response = input("Continue? [y/N] ")
+    if response.lower() != 'y':
+        print("Aborted.")
+        return False
+    return True
+
+
+def finish(conn, dry_run: bool):
+    """Commit, or roll back a dry run."""
+    if not dry_run:
+        conn.commit()
+        print("\n✓ Changes committed to database")
+    else:
+        conn.rollback()
+        print("\n✓ Dry run complete (no changes made)")
+
+
+def run_async(
+    yaml_structures: Dict[str, dict],
+    yaml_relationships: List[dict],
+    stats: SyncStats,
+    dry_run: bool,
+    force: bool,
+    pool_size: int
+) -> SyncStats:
+    """Sync with the pooled asyncpg engine (commits itself unless dry_run)."""
+    from db_sync_async import HAS_ASYNCPG, sync_async
+    if not HAS_ASYNCPG:
+        stats.errors.append("asyncpg not installed. Run: pip install asyncpg")
+        return stats
+    
+    if dry_run:
+        print("\n🔍 DRY RUN MODE - No changes will be made")
+    elif not force and not confirm(len(yaml_structures)):
+        return stats
+    
+    try:
+        sync_async(yaml_structures, yaml_relationships, stats, dry_run, BAP_NOMENCLATURE_ID,
+                   pool_size=pool_size, **DB_CONFIG)
+    except Exception as e:
+        stats.errors.append(f"Sync failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return stats
+    
+    print("\n✓ Changes committed to database" if not dry_run else "\n✓ Dry run complete (no changes made)")
+    return stats
+
+
+def run_sync(
+    dry_run: bool = False,
+    force: bool = False,
+    bulk: bool = True,
+    full: bool = False,
+    reconcile: bool = False,
+    hard_delete: bool = False,
+    use_async: bool = False,
+    pool_size: int = 4
+) -> SyncStats:
+    """Run the full sync process (pooled if use_async, else set-based if bulk, else row by row)."""
     stats = SyncStats()
     
     print("Loading YAML definitions...")
@@ -397,6 +387,9 @@ def run_sync(dry_run: bool = False, force: bool = False) -> SyncStats:
     
     print(f"\nConnecting to database at {DB_CONFIG['host']}:{DB_CONFIG['port']}...")
     
+    if use_async:
+        return run_async(yaml_structures, yaml_relationships, stats, dry_run, force, pool_size)
+    
     try:
         conn = get_db_connection()
     except Exception as e:
@@ -404,6 +397,20 @@ def run_sync(dry_run: bool = False, force: bool = False) -> SyncStats:
         return stats
     
     try:
+        if bulk or reconcile:
+            if dry_run:
+                print("\n🔍 DRY RUN MODE - No changes will be made")
+            elif not force and not confirm(len(yaml_structures)):
+                return stats
+            
+            run_bulk_sync(conn, yaml_structures, yaml_relationships, stats, dry_run, BAP_NOMENCLATURE_ID,
+                          full=full, reconcile=reconcile, hard_delete=hard_delete)
+            finish(conn, dry_run)
+            return stats
+        
+        if not dry_run:
+            ensure_sync_tables(conn)
+        
         print("Loading existing data...")
         existing_structures = get_existing_structures(conn)
         existing_hierarchies = get_existing_hierarchies(conn)
@@ -415,12 +422,8 @@ def run_sync(dry_run: bool = False, force: bool = False) -> SyncStats:
         if dry_run:
             print("\n🔍 DRY RUN MODE - No changes will be made")
         
-        if not force and not dry_run:
-            print(f"\nThis will sync {len(yaml_structures)} structures to the database.")
-            response = input("Continue? [y/N] ")
-            if response.lower() != 'y':
-                print("Aborted.")
-                return stats
+        if not force and not dry_run and not confirm(len(yaml_structures)):
+            return stats
         
         print("\nSyncing structures...")
         id_map = sync_structures(conn, yaml_structures, existing_structures, stats, dry_run)
@@ -432,11 +435,13 @@ def run_sync(dry_run: bool = False, force: bool = False) -> SyncStats:
         sync_relationships(conn, yaml_relationships, id_map, yaml_structures, rel_type_map, stats, dry_run)
         
         if not dry_run:
-            conn.commit()
-            print("\n✓ Changes committed to database")
-        else:
-            conn.rollback()
-            print("\n✓ Dry run complete (no changes made)")
+            # The digests describe the last bulk sync, not this one; drop them so
+            # the next bulk sync re-checks every row instead of trusting them.
+            with conn.cursor() as cur:
+                for table in DIGEST_TABLES:
+                    cur.execute(f"DELETE FROM {table}")
+        
+        finish(conn, dry_run)
         
     except Exception as e:
         conn.rollback()
@@ -455,11 +460,41 @@ def run_sync(dry_run: bool = False, force: bool = False) -> SyncStats:
 
 def main():
     parser = argparse.ArgumentParser(description="Sync YAML definitions to database")
-    parser.add_argument("--dry-run", action="store_true", help="Preview changes without applying")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Preview changes without applying (--async still creates and drops its staging tables)")
     parser.add_argument("--force", "-f", action="store_true", help="Skip confirmation prompts")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Set-based sync of changed rows in one transaction (the default; kept for old scripts)")
+    parser.add_argument("--rowwise", action="store_true",
+                        help="Use the previous row-by-row engine, which fetches and compares every row")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-check every row instead of only rows changed since the last sync")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="Also tombstone rows no longer in the YAML (implies --full)")
+    parser.add_argument("--hard-delete", action="store_true",
+                        help="With --reconcile, delete those rows instead of setting deprecated = TRUE")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the pooled asyncpg engine (needs: pip install asyncpg)")
+    parser.add_argument("--pool-size", type=int, default=4, help="Connections for --async (default: 4)")
     args = parser.parse_args()
     
-    stats = run_sync(dry_run=args.dry_run, force=args.force)
+    if args.hard_delete and not args.reconcile:
+        parser.error("--hard-delete requires --reconcile")
+    if args.use_async and (args.reconcile or args.full):
+        parser.error("--async always checks every row and does not reconcile")
+    if args.rowwise and (args.bulk or args.reconcile or args.full or args.use_async):
+        parser.error("--rowwise cannot be combined with --bulk, --full, --reconcile or --async")
+    
+    stats = run_sync(
+        dry_run=args.dry_run,
+        force=args.force,
+        bulk=not args.rowwise,
+        full=args.full,
+        reconcile=args.reconcile,
+        hard_delete=args.hard_delete,
+        use_async=args.use_async,
+        pool_size=args.pool_size
+    )
     stats.print_summary()
     
     return 0 if not stats.errors else 1
@@ -16,6 +16,7 @@ from pathlib import Path
 from ai_process_request import (
     load_structure_lookup,
     find_existing_structure,
+    resolve_structure_names,
     find_ambiguous_names,
     check_duplicate_relationship,
     find_conflicting_relationships,
@@ -68,6 +69,25 @@ class TestStructureLookup(unittest.TestCase):
         
         result = find_existing_structure('inner ear', lookup)
         self.assertEqual(result, 'BAP_0011600')
+    
+    def test_resolve_structure_names(self):
+        """Test batch resolution without embeddings matches one-by-one lookup."""
+        lookup = {
+            'facial nerve': 'BAP_0001000',
+            'innerear': 'BAP_0011600',
+        }
+        no_embeddings = {'structures': [], 'matrix': None}
+        
+        result = resolve_structure_names(
+            ['Facial nerve', 'inner ear', 'facial', 'nonexistent structure', 'Facial nerve', ''],
+            lookup, no_embeddings
+        )
+        self.assertEqual(result, {
+            'Facial nerve': 'BAP_0001000',
+            'inner ear': 'BAP_0011600',
+            'facial': 'BAP_0001000',
+            'nonexistent structure': None,
+        })
 
 
 class TestAmbiguousNames(unittest.TestCase):
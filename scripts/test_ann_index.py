@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the IVF embedding index.
+
+Run with: python -m pytest scripts/test_ann_index.py -v
+Or: python scripts/test_ann_index.py
+"""
+
+import unittest
+import tempfile
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from ann_index import IVFIndex
+from semantic_search import load_embeddings, normalize, search_matrix_batch
+
+
+def random_matrix(rows: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return normalize(np.random.default_rng(seed).standard_normal((rows, dim)))
+
+
+class TestIVFIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = random_matrix(500)
+        self.queries = random_matrix(20, seed=1)
+        self.index = IVFIndex.build(self.matrix, nlist=10)
+
+    def test_lists_cover_every_row(self):
+        """Test every row lands in exactly one list."""
+        self.assertEqual(self.index.nlist, 10)
+        self.assertEqual(sorted(self.index.order.tolist()), list(range(500)))
+        self.assertEqual(self.index.offsets[-1], 500)
+
+    def test_all_lists_is_exact(self):
+        """Test probing every list gives the exact results."""
+        approx = self.index.search_batch(self.matrix, self.queries, top_k=5, nprobe=10)
+        exact = search_matrix_batch(self.matrix, self.queries, top_k=5, threshold=-1)
+        for a, e in zip(approx, exact):
+            self.assertEqual([row for row, _ in a], [row for row, _ in e])
+            np.testing.assert_allclose([s for _, s in a], [s for _, s in e], rtol=1e-5)
+
+    def test_recall_grows_with_nprobe(self):
+        """Test more lists never finds fewer of the exact top rows."""
+        exact = search_matrix_batch(self.matrix, self.queries, top_k=5, threshold=-1)
+
+        def hits(nprobe):
+            approx = self.index.search_batch(self.matrix, self.queries, top_k=5, nprobe=nprobe)
+            return sum(len({r for r, _ in a} & {r for r, _ in e}) for a, e in zip(approx, exact))
+
+        self.assertLessEqual(hits(1), hits(3))
+        self.assertLessEqual(hits(3), hits(10))
+
+    def test_threshold(self):
+        """Test rows under the threshold are dropped."""
+        results = self.index.search_batch(self.matrix, self.queries, top_k=5, threshold=0.99)
+        self.assertTrue(all(score >= 0.99 for result in results for _, score in result))
+
+
+class TestIndexPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        Path('data').mkdir()
+        self.matrix = random_matrix(50)
+        np.save('data/embeddings.abc.npy', self.matrix)
+        structures = [{'id': f'BAP_{i:07d}', 'name': f'S{i}'} for i in range(50)]
+        with open('data/embeddings.json', 'w') as f:
+            json.dump({'model': 'm', 'matrix_file': 'embeddings.abc.npy', 'structures': structures}, f)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        """Test a saved index loads back with the embeddings."""
+        index = IVFIndex.build(self.matrix, nlist=4, matrix_file='embeddings.abc.npy')
+        index.nprobe = 2
+        index.save()
+
+        data = load_embeddings()
+        loaded = data['index']
+        self.assertEqual(loaded.nprobe, 2)
+        np.testing.assert_array_equal(loaded.order, index.order)
+        self.assertEqual(
+            loaded.search_batch(data['matrix'], self.matrix[:3]),
+            index.search_batch(self.matrix, self.matrix[:3])
+        )
+        del data
+
+    def test_stale_index_ignored(self):
+        """Test an index built for another matrix is not used."""
+        IVFIndex.build(self.matrix, nlist=4, matrix_file='embeddings.old.npy').save()
+        data = load_embeddings()
+        self.assertNotIn('index', data)
+        del data
+
+
+if __name__ == '__main__':
+    os.chdir(Path(__file__).parent)
+    unittest.main(verbosity=2)
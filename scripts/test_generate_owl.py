@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the OWL, N-Triples and Turtle writers.
+
+Run with: python -m pytest scripts/test_generate_owl.py -v
+Or: python scripts/test_generate_owl.py
+"""
+
+import unittest
+import io
+import os
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+from xml.etree import ElementTree as ET
+
+from generate_owl import (
+    generate_owl, export, iter_classes, class_triples, rdf_literal, output_paths,
+    OwlXmlSink, NTriplesSink, TurtleSink, OboSink, OboGraphSink, JsonLdSink, FragmentCache,
+)
+
+
+STRUCTURES = {
+    'BAP_0000001': {'id': 'BAP_0000001', 'name': 'Head', 'definition': 'The "head" <region>'},
+    'BAP_0000002': {'id': 'BAP_0000002', 'name': 'Ear', 'parent': 'BAP_0000001', 'abbreviation': 'E'},
+    'BAP_0000003': {'id': 'BAP_0000003', 'name': 'Facial nerve', 'parent': 'BAP_0000001'},
+}
+
+RELATIONSHIPS = [
+    {'subject': 'BAP_0000002', 'predicate': 'innervated_by', 'object': 'BAP_0000003'},
+    {'subject': 'BAP_0000002', 'predicate': 'part_of', 'object': 'BAP_0000001'},
+    {'subject': 'BAP_0000002', 'predicate': 'supplied_by', 'object': 'BAP_9999999'},
+]
+
+
+def write_all(validate=False, jobs=1):
+    outputs = {name: io.StringIO() for name in ('owl', 'nt', 'ttl', 'obo', 'obograph', 'jsonld')}
+    export(STRUCTURES, RELATIONSHIPS, [
+        OwlXmlSink(outputs['owl'], validate=validate),
+        NTriplesSink(outputs['nt']),
+        TurtleSink(outputs['ttl']),
+        OboSink(outputs['obo']),
+        OboGraphSink(outputs['obograph']),
+        JsonLdSink(outputs['jsonld']),
+    ], jobs=jobs)
+    return {name: out.getvalue() for name, out in outputs.items()}
+
+
+class TestClasses(unittest.TestCase):
+
+    def test_restrictions_resolved(self):
+        """Test restrictions to unknown structures are dropped, order kept."""
+        ear = list(iter_classes(STRUCTURES, RELATIONSHIPS))[1]
+        self.assertEqual(ear.parent, 'BAP_0000001')
+        self.assertEqual(ear.restrictions, [('innervated_by', 'BAP_0000003'), ('part_of', 'BAP_0000001')])
+
+    def test_blank_nodes_stable(self):
+        """Test blank node labels come from the class ID."""
+        ear = list(iter_classes(STRUCTURES, RELATIONSHIPS))[1]
+        subjects = {s for s, _, _ in class_triples(ear) if s.startswith('_:')}
+        self.assertEqual(subjects, {'_:BAP_0000002_r1', '_:BAP_0000002_r2'})
+
+
+class TestWriters(unittest.TestCase):
+
+    def test_single_pass_matches_generate_owl(self):
+        """Test the OWL written alongside other formats is the same document."""
+        self.assertEqual(write_all(validate=True)['owl'], generate_owl(STRUCTURES, RELATIONSHIPS))
+
+    def test_parallel_identical(self):
+        """Test shards rendered in worker processes join up to the serial output."""
+        with mock.patch('generate_owl.SHARD_SIZE', 1):
+            self.assertEqual(write_all(validate=True, jobs=2), write_all())
+
+    def test_owl_well_formed(self):
+        """Test the RDF/XML parses and carries every class."""
+        root = ET.fromstring(generate_owl(STRUCTURES, RELATIONSHIPS))
+        owl = '{http://www.w3.org/2002/07/owl#}'
+        self.assertEqual(len(root.findall(f'{owl}Class')), 3)
+        self.assertEqual(len(list(root.iter(f'{owl}Restriction'))), 2)
+
+    def test_validation_fails_on_bad_xml(self):
+        """Test the streaming validator rejects malformed output."""
+        sink = OwlXmlSink(io.StringIO(), validate=True)
+        sink.begin()
+        with self.assertRaises(ET.ParseError):
+            sink.write('<owl:Class></rdf:RDF>')
+
+    def test_ntriples(self):
+        """Test one statement per line, same class count as the OWL."""
+        nt = write_all()['nt']
+        lines = nt.splitlines()
+        self.assertTrue(all(line.endswith(' .') for line in lines))
+        self.assertEqual(sum('#type> <http://www.w3.org/2002/07/owl#Class>' in line for line in lines), 3)
+        self.assertIn('"The \\"head\\" <region>"@en', nt)
+
+    def test_turtle(self):
+        """Test Turtle uses prefixes and groups statements by subject."""
+        ttl = write_all()['ttl']
+        self.assertIn('@prefix obo: <http://purl.obolibrary.org/obo/> .', ttl)
+        self.assertIn('obo:BAP_0000002 a owl:Class ;\n    rdfs:subClassOf obo:BAP_0000001 ;', ttl)
+        self.assertIn('_:BAP_0000002_r1 a owl:Restriction ;\n    owl:onProperty obo:RO_0002005 ;', ttl)
+        self.assertEqual(ttl.count('\nobo:BAP_0000002 '), 1)
+
+    def test_obo(self):
+        """Test OBO stanzas carry is_a, relationships and escaped text."""
+        obo = write_all()['obo']
+        self.assertTrue(obo.startswith('format-version: 1.4\n'))
+        self.assertIn(
+            '[Term]\nid: BAP:0000002\nname: Ear\n'
+            'property_value: IAO:0000111 "E" xsd:string\nis_a: BAP:0000001\n'
+            'relationship: innervated_by BAP:0000003\nrelationship: part_of BAP:0000001\n\n', obo)
+        self.assertIn('def: "The \\"head\\" <region>" []', obo)
+        self.assertIn('[Typedef]\nid: part_of\nname: part of\nxref: BFO:0000050\n', obo)
+
+    def test_obograph(self):
+        """Test OBOGraph JSON parses, with is_a and relation edges after the nodes."""
+        graph = json.loads(write_all()['obograph'])['graphs'][0]
+        classes = [n for n in graph['nodes'] if n['type'] == 'CLASS']
+        self.assertEqual([n['lbl'] for n in classes], ['Head', 'Ear', 'Facial nerve'])
+        self.assertEqual(classes[0]['meta']['definition']['val'], 'The "head" <region>')
+        self.assertEqual([e['pred'] for e in graph['edges']], [
+            'is_a', 'http://purl.obolibrary.org/obo/RO_0002005',
+            'http://purl.obolibrary.org/obo/BFO_0000050', 'is_a',
+        ])
+
+    def test_obograph_without_edges(self):
+        """Test an ontology with no edges still closes the edges array."""
+        out = io.StringIO()
+        export({'BAP_0000001': STRUCTURES['BAP_0000001']}, [], [OboGraphSink(out)])
+        self.assertEqual(json.loads(out.getvalue())['graphs'][0]['edges'], [])
+
+    def test_jsonld(self):
+        """Test JSON-LD nodes embed restrictions as blank nodes."""
+        graph = json.loads(write_all()['jsonld'])['@graph']
+        ear = next(n for n in graph if n['@id'] == 'obo:BAP_0000002')
+        self.assertEqual(ear['rdfs:subClassOf'][0], {'@id': 'obo:BAP_0000001'})
+        self.assertEqual(ear['rdfs:subClassOf'][1]['owl:someValuesFrom'], {'@id': 'obo:BAP_0000003'})
+        self.assertEqual(ear['rdfs:label'], {'@value': 'Ear', '@language': 'en'})
+
+    def test_literal_escaping(self):
+        self.assertEqual(rdf_literal('a "b"\n\\', 'en'), '"a \\"b\\"\\n\\\\"@en')
+
+
+class TestFragmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def build(self, structures, relationships=RELATIONSHIPS, signature="v1"):
+        """(OWL, OBOGraph JSON, classes rendered) with caches saved in tmpdir."""
+        owl, obograph = io.StringIO(), io.StringIO()
+        sinks = [OwlXmlSink(owl, validate=True), OboGraphSink(obograph)]
+        caches = [FragmentCache.for_sink(sink, self.tmpdir.name, signature) for sink in sinks]
+        rendered = export(structures, relationships, sinks, caches=caches)
+        for cache in caches:
+            cache.save()
+        return owl.getvalue(), obograph.getvalue(), rendered
+
+    def uncached(self, structures, relationships=RELATIONSHIPS):
+        owl, obograph = io.StringIO(), io.StringIO()
+        export(structures, relationships, [OwlXmlSink(owl), OboGraphSink(obograph)])
+        return owl.getvalue(), obograph.getvalue()
+
+    def test_unchanged_rebuild(self):
+        """Test a second build renders nothing and writes the same output."""
+        first = self.build(STRUCTURES)
+        self.assertEqual(first[2], 3)
+        second = self.build(STRUCTURES)
+        self.assertEqual(second, first[:2] + (0,))
+        self.assertEqual(second[:2], self.uncached(STRUCTURES))
+
+    def test_changed_structure(self):
+        """Test only the edited structure is rendered again."""
+        self.build(STRUCTURES)
+        changed = dict(STRUCTURES, BAP_0000003={**STRUCTURES['BAP_0000003'], 'name': 'Nerve VII'})
+        owl, obograph, rendered = self.build(changed)
+        self.assertEqual(rendered, 1)
+        self.assertIn('Nerve VII', owl)
+        self.assertEqual((owl, obograph), self.uncached(changed))
+
+    def test_removed_target(self):
+        """Test removing a structure re-renders classes that pointed at it."""
+        self.build(STRUCTURES)
+        smaller = {k: v for k, v in STRUCTURES.items() if k != 'BAP_0000003'}
+        owl, obograph, rendered = self.build(smaller)
+        self.assertEqual(rendered, 1)
+        self.assertEqual((owl, obograph), self.uncached(smaller))
+
+    def test_relationship_change(self):
+        """Test a new outgoing relationship re-renders its subject."""
+        self.build(STRUCTURES)
+        extra = RELATIONSHIPS + [{'subject': 'BAP_0000003', 'predicate': 'part_of', 'object': 'BAP_0000001'}]
+        self.assertEqual(self.build(STRUCTURES, extra)[2], 1)
+
+    def test_signature_mismatch(self):
+        """Test blocks rendered by another version of the writers are not reused."""
+        self.build(STRUCTURES)
+        self.assertEqual(self.build(STRUCTURES, signature="v2")[2], 3)
+
+
+class TestOutputPaths(unittest.TestCase):
+
+    def test_suffixes(self):
+        """Test extra formats take --output with their own suffix."""
+        paths = output_paths(Path('out/bap.owl'), ['owl', 'turtle', 'ntriples'])
+        self.assertEqual(paths, {
+            'owl': Path('out/bap.owl'), 'turtle': Path('out/bap.ttl'), 'ntriples': Path('out/bap.nt'),
+        })
+
+    def test_first_format_suffix(self):
+        """Test the first format only keeps --output if it is not another format's suffix."""
+        self.assertEqual(output_paths(Path('bap.owl'), ['obo']), {'obo': Path('bap.obo')})
+        self.assertEqual(output_paths(Path('bap.txt'), ['obo']), {'obo': Path('bap.txt')})
+
+
+if __name__ == '__main__':
+    os.chdir(Path(__file__).parent)
+    unittest.main(verbosity=2)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the hierarchy tree renderer and depth statistics.
+
+Run with: python -m pytest scripts/test_generate_tree.py -v
+Or: python scripts/test_generate_tree.py
+"""
+
+import unittest
+import sys
+import io
+import os
+from pathlib import Path
+
+from generate_tree import (
+    build_children_map, count_at_depth, generate_full_tree, generate_subtree,
+    generate_tree_lines, iter_full_tree, write_lines,
+)
+
+
+STRUCTURES = {
+    'BAP_0000001': {'id': 'BAP_0000001', 'name': 'Head', 'parent': None},
+    'BAP_0000002': {'id': 'BAP_0000002', 'name': 'Ear', 'parent': 'BAP_0000001'},
+    'BAP_0000003': {'id': 'BAP_0000003', 'name': 'Cochlea', 'parent': 'BAP_0000002'},
+    'BAP_0000004': {'id': 'BAP_0000004', 'name': 'Brain', 'parent': 'BAP_0000001'},
+    'BAP_0000005': {'id': 'BAP_0000005', 'name': 'Old', 'parent': 'BAP_0000001', 'deprecated': True},
+    'BAP_0000006': {'id': 'BAP_0000006', 'name': 'Cortex', 'parent': 'BAP_0000004'},
+    'BAP_0000007': {'id': 'BAP_0000007', 'name': 'Tail', 'parent': None},
+}
+
+
+def chain(depth: int) -> dict:
+    return {
+        f'BAP_{i:07d}': {'id': f'BAP_{i:07d}', 'name': f'N{i}', 'parent': f'BAP_{i - 1:07d}' if i else None}
+        for i in range(depth)
+    }
+
+
+class TestTreeLines(unittest.TestCase):
+
+    def test_full_tree(self):
+        """Test children sort by name, deprecated are hidden, roots are spaced."""
+        self.assertEqual(generate_full_tree(STRUCTURES), '\n'.join([
+            'Head',
+            '├── Brain',
+            '│   └── Cortex',
+            '└── Ear',
+            '    └── Cochlea',
+            '',
+            'Tail',
+        ]))
+
+    def test_max_depth_and_collapse(self):
+        """Test max_depth cuts levels and collapsed nodes keep their line only."""
+        self.assertEqual(generate_full_tree(STRUCTURES, max_depth=1).splitlines()[:3],
+                         ['Head', '├── Brain', '└── Ear'])
+        self.assertNotIn('Cortex', generate_full_tree(STRUCTURES, collapse_node_ids={'BAP_0000004'}))
+
+    def test_subtree(self):
+        self.assertEqual(generate_subtree(STRUCTURES, 'Ear'), 'Ear\n└── Cochlea')
+        self.assertEqual(generate_subtree(STRUCTURES, 'Nose'), "Structure 'Nose' not found")
+
+    def test_nested_prefix(self):
+        """Test a node rendered below the top keeps its connector and prefix."""
+        children_map = build_children_map(STRUCTURES)
+        lines = generate_tree_lines(STRUCTURES, children_map, 'BAP_0000002', '│   ', False, current_depth=1)
+        self.assertEqual(lines, ['│   ├── Ear', '│   │   └── Cochlea'])
+
+    def test_deeper_than_recursion_limit(self):
+        """Test very deep hierarchies render without recursion."""
+        depth = sys.getrecursionlimit() + 100
+        lines = list(iter_full_tree(chain(depth), max_depth=depth))
+        self.assertEqual(len(lines), depth)
+        self.assertEqual(lines[-1], '    ' * (depth - 2) + '└── N%d' % (depth - 1))
+
+    def test_write_lines(self):
+        """Test streamed output matches the joined string."""
+        out = io.StringIO()
+        write_lines(iter_full_tree(STRUCTURES), out)
+        self.assertEqual(out.getvalue(), generate_full_tree(STRUCTURES))
+
+
+class TestCountAtDepth(unittest.TestCase):
+
+    def test_histogram(self):
+        """Test every structure under a root is counted, deprecated included."""
+        self.assertEqual(count_at_depth(build_children_map(STRUCTURES)), {0: 2, 1: 3, 2: 2})
+
+    def test_deep(self):
+        depth = sys.getrecursionlimit() + 100
+        self.assertEqual(len(count_at_depth(build_children_map(chain(depth)))), depth)
+
+
+if __name__ == '__main__':
+    os.chdir(Path(__file__).parent)
+    unittest.main(verbosity=2)
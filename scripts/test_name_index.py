@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the trigram name index.
+
+Run with: python -m pytest scripts/test_name_index.py -v
+Or: python scripts/test_name_index.py
+"""
+
+import unittest
+import tempfile
+import os
+from pathlib import Path
+
+from name_index import TrigramIndex, trigrams
+from ontology import Ontology
+
+
+STRUCTURES = [
+    {'id': 'BAP_0000001', 'name': 'Facial nerve (L)', 'abbreviation': 'VII-L', 'xref': 'ABA:798'},
+    {'id': 'BAP_0000002', 'name': 'Facial nerve (R)', 'abbreviation': 'VII-R'},
+    {'id': 'BAP_0000003', 'name': 'Facial motor nucleus', 'synonyms': ['Nucleus of facial nerve']},
+    {'id': 'BAP_0000004', 'name': 'Trigeminal nerve'},
+]
+
+
+class TestTrigrams(unittest.TestCase):
+
+    def test_pg_trgm_padding(self):
+        """Test words are lowercased and padded like pg_trgm."""
+        self.assertEqual(trigrams("Ear"), {"  e", " ea", "ear", "ar "})
+        self.assertEqual(trigrams("ear (L)"), {"  e", " ea", "ear", "ar ", "  l", " l "})
+        self.assertEqual(trigrams("--"), set())
+
+
+class TestTrigramIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TrigramIndex.from_structures(STRUCTURES)
+
+    def test_aliases_indexed(self):
+        """Test abbreviations, synonyms and xrefs resolve to their structure."""
+        self.assertEqual(self.index.best("vii-r").value, 'BAP_0000002')
+        self.assertEqual(self.index.best("ABA:798").value, 'BAP_0000001')
+        self.assertEqual(self.index.best("nucleus of the facial nerve").value, 'BAP_0000003')
+
+    def test_ranked_by_similarity(self):
+        """Test a misspelling still ranks the closest names first, ties by key."""
+        matches = self.index.search("facial nrve", limit=3)
+        self.assertEqual([m.value for m in matches], ['BAP_0000001', 'BAP_0000002', 'BAP_0000003'])
+        self.assertEqual(matches[0].score, matches[1].score)
+        self.assertGreater(matches[1].score, matches[2].score)
+
+    def test_min_score(self):
+        """Test unrelated names fall below the score cut-off."""
+        self.assertIsNone(self.index.best("stapedius", min_score=0.3))
+
+    def test_partial(self):
+        """Test partial matches need containment one way or the other."""
+        self.assertEqual([m.value for m in self.index.partial("Trigeminal")], ['BAP_0000004'])
+        self.assertEqual(self.index.partial("trigeminal nerve root")[0].value, 'BAP_0000004')
+        self.assertEqual(self.index.partial("nerve root"), [])
+
+    def test_save_and_load(self):
+        """Test a saved index loads only with the same signature."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "names.pickle"
+            self.index.save(path, signature=("a", 1))
+            loaded = TrigramIndex.load(path, signature=("a", 1))
+            self.assertEqual(loaded.search("facial"), self.index.search("facial"))
+            self.assertIsNone(TrigramIndex.load(path, signature=("a", 2)))
+            self.assertIsNone(TrigramIndex.load(Path(tmpdir) / "missing.pickle"))
+
+
+class TestOntologyNameSearch(unittest.TestCase):
+
+    def test_built_once(self):
+        """Test the ontology builds its name index on first use only."""
+        onto = Ontology.from_records(STRUCTURES)
+        self.assertIs(onto.name_search, onto.name_search)
+        self.assertEqual(onto.name_search.best("VII-L").value, 'BAP_0000001')
+
+
+if __name__ == '__main__':
+    os.chdir(Path(__file__).parent)
+    unittest.main(verbosity=2)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared ontology model.
+
+Run with: python -m pytest scripts/test_ontology.py -v
+Or: python scripts/test_ontology.py
+"""
+
+import unittest
+import tempfile
+import os
+from pathlib import Path
+from unittest import mock
+
+import ontology
+from ontology import HierarchyIndex, Ontology, find_hierarchy_cycles, load_ontology
+from ai_context import calculate_depth
+
+
+STRUCTURES_YAML = """\
+metadata:
+  category: test
+structures:
+- id: BAP_0000001
+  name: Body
+  parent: null
+- id: BAP_0000002
+  name: Head
+  parent: BAP_0000001
+- id: BAP_0000003
+  name: Eye
+  parent: BAP_0000002
+"""
+
+RELATIONSHIPS_YAML = """\
+relationships:
+- subject: BAP_0000003
+  predicate: supplied_by
+  object: BAP_0000002
+-
+"""
+
+
+def write_tree(root: Path, structures: str = STRUCTURES_YAML, relationships: str = RELATIONSHIPS_YAML):
+    """Write a minimal ontology tree under root."""
+    (root / 'structures').mkdir(exist_ok=True)
+    (root / 'relationships').mkdir(exist_ok=True)
+    (root / 'structures' / 'regions.yaml').write_text(structures)
+    (root / 'relationships' / 'blood_supply.yaml').write_text(relationships)
+
+
+class TestOntologyLoad(unittest.TestCase):
+    """Tests for loading and indexing YAML files."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        write_tree(self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_indexes(self):
+        """Test the id, children, name and relationship indexes."""
+        onto = Ontology.load(self.root)
+
+        self.assertEqual(len(onto.structures), 3)
+        self.assertEqual(onto.roots(), ['BAP_0000001'])
+        self.assertEqual(onto.children_of('BAP_0000002'), ['BAP_0000003'])
+        self.assertEqual(onto.id_by_name('EYE'), 'BAP_0000003')
+        self.assertEqual(len(onto.relationships), 1)  # None entry skipped
+        self.assertEqual(onto.relationships_from('BAP_0000003')[0]['object'], 'BAP_0000002')
+        self.assertEqual(onto.relationships_to('BAP_0000002')[0]['subject'], 'BAP_0000003')
+
+    def test_documents_stay_raw(self):
+        """Test that bookkeeping keys are only added to records, not documents."""
+        onto = Ontology.load(self.root)
+
+        self.assertEqual(onto.structures['BAP_0000003']['_source_file'], 'regions.yaml')
+        for struct in onto.structure_files[0].data['structures']:
+            self.assertNotIn('_source_file', struct)
+
+    def test_parse_error_recorded(self):
+        """Test that a broken file is reported rather than raised."""
+        (self.root / 'structures' / 'broken.yaml').write_text("structures: [\n")
+        onto = Ontology.load(self.root)
+
+        broken = [f for f in onto.structure_files if f.name == 'broken.yaml'][0]
+        self.assertIsNone(broken.data)
+        self.assertIsNotNone(broken.error)
+        self.assertEqual(len(onto.structures), 3)
+
+    def test_load_ontology_reuses_until_files_change(self):
+        """Test that the process-wide loader only re-parses changed trees."""
+        first = load_ontology(self.root)
+        self.assertIs(load_ontology(self.root), first)
+
+        path = self.root / 'structures' / 'regions.yaml'
+        path.write_text(STRUCTURES_YAML + "- id: BAP_0000004\n  name: Ear\n  parent: BAP_0000002\n")
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+
+        second = load_ontology(self.root)
+        self.assertIsNot(second, first)
+        self.assertIn('BAP_0000004', second.structures)
+
+
+class TestParseCache(unittest.TestCase):
+    """Tests for the on-disk parsed-file cache."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        write_tree(self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_warm_load_skips_parsing(self):
+        """Test that unchanged files come from the cache."""
+        Ontology.load(self.root, use_cache=True)
+        self.assertTrue((self.root / '.cache' / 'ontology').is_dir())
+
+        with mock.patch.object(ontology, 'parse_yaml_bytes', side_effect=AssertionError("parsed")):
+            onto = Ontology.load(self.root, use_cache=True)
+        self.assertEqual(len(onto.structures), 3)
+
+    def test_touched_but_unchanged_file_hits_by_hash(self):
+        """Test that a new mtime with identical content still hits the cache."""
+        Ontology.load(self.root, use_cache=True)
+        path = self.root / 'structures' / 'regions.yaml'
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 5_000_000))
+
+        with mock.patch.object(ontology, 'parse_yaml_bytes', side_effect=AssertionError("parsed")):
+            onto = Ontology.load(self.root, use_cache=True)
+        self.assertEqual(len(onto.structures), 3)
+
+    def test_changed_file_is_reparsed(self):
+        """Test that edited content invalidates the entry."""
+        Ontology.load(self.root, use_cache=True)
+        path = self.root / 'structures' / 'regions.yaml'
+        path.write_text(STRUCTURES_YAML.replace('name: Eye', 'name: Eyeball'))
+
+        onto = Ontology.load(self.root, use_cache=True)
+        self.assertEqual(onto.name_of('BAP_0000003'), 'Eyeball')
+
+
+class TestFromRecords(unittest.TestCase):
+    """Tests for building an ontology from in-memory records."""
+
+    def test_duplicates_keep_last(self):
+        """Test that a duplicated ID resolves to its last record."""
+        onto = Ontology.from_records([
+            {'id': 'BAP_0000001', 'name': 'First', 'parent': None},
+            {'id': 'BAP_0000001', 'name': 'Second', 'parent': None},
+        ])
+
+        self.assertEqual(len(onto.structure_records), 2)
+        self.assertEqual(onto.name_of('BAP_0000001'), 'Second')
+        self.assertEqual(onto.roots(), ['BAP_0000001'])
+
+    def test_max_id_number(self):
+        """Test BAP ID numbering."""
+        onto = Ontology.from_records([
+            {'id': 'BAP_0000042', 'name': 'A'},
+            {'id': 'OTHER_9999999', 'name': 'B'},
+        ])
+
+        self.assertEqual(onto.max_id_number(), 42)
+        self.assertEqual(onto.max_id_number(default=100), 100)
+
+
+class TestReverseIndexes(unittest.TestCase):
+    """Tests for abbreviation / xref / external_id lookups."""
+
+    def setUp(self):
+        self.onto = Ontology.from_records([
+            {'id': 'BAP_0000001', 'name': 'Cortical plate', 'xref': 'ABA:695', 'abbreviation': 'CTXpl'},
+            {'id': 'BAP_0000002', 'name': 'Cortical plate (L)', 'xref': 'ABA:695', 'abbreviation': 'CTXpl'},
+            {'id': 'BAP_0000003', 'name': 'Cerebral cortex', 'xref': 'ABA:688', 'abbreviation': 'CTX',
+             'external_id': 'UBERON_0000956'},
+        ])
+
+    def test_exact_indexes(self):
+        """Test each reverse index, with lateralized copies in file order."""
+        self.assertEqual(self.onto.ids_by_xref('ABA:695'), ['BAP_0000001', 'BAP_0000002'])
+        self.assertEqual(self.onto.ids_by_xref('aba:688'), ['BAP_0000003'])
+        self.assertEqual(self.onto.ids_by_abbreviation('CTX'), ['BAP_0000003'])
+        self.assertEqual(self.onto.ids_by_abbreviation('ctx'), [])
+        self.assertEqual(self.onto.ids_by_external_id('UBERON_0000956'), ['BAP_0000003'])
+
+    def test_resolve(self):
+        """Test resolve() tries IDs, xrefs, abbreviations, then names."""
+        self.assertEqual(self.onto.resolve('BAP_0000002'), ['BAP_0000002'])
+        self.assertEqual(self.onto.resolve(' ABA:688 '), ['BAP_0000003'])
+        self.assertEqual(self.onto.resolve('CTXpl'), ['BAP_0000001', 'BAP_0000002'])
+        self.assertEqual(self.onto.resolve('cerebral CORTEX'), ['BAP_0000003'])
+        self.assertEqual(self.onto.resolve('ABA:1'), [])
+
+    def test_lookup_cli(self):
+        """Test the lookup command's resolver and output lines."""
+        import io
+        from lookup import make_resolver, write_lookups
+
+        out = io.StringIO()
+        missing = write_lookups(['695', 'CTX', 'nothing'], make_resolver(self.onto), out)
+        self.assertEqual(out.getvalue(), "695\tBAP_0000001\nCTX\tBAP_0000003\nnothing\t\n")
+        self.assertEqual(missing, 1)
+
+        out = io.StringIO()
+        write_lookups(['ABA:695'], make_resolver(self.onto), out, show_all=True)
+        self.assertEqual(out.getvalue(), "ABA:695\tBAP_0000001,BAP_0000002\n")
+
+
+class TestHierarchyCycles(unittest.TestCase):
+    """Tests for the shared cycle detector."""
+
+    def test_acyclic(self):
+        """Test that a tree has no cycles."""
+        self.assertEqual(find_hierarchy_cycles({'A': None, 'B': 'A', 'C': 'B', 'D': 'missing'}), [])
+
+    def test_each_cycle_reported_once(self):
+        """Test distinct cycles, self-loops and tails leading into a cycle."""
+        parent_of = {
+            'C': 'A', 'A': 'B', 'B': 'C',   # A -> B -> C -> A
+            'T1': 'T2', 'T2': 'B',          # tail into the first cycle
+            'S': 'S',                       # self-loop
+            'X': 'Y', 'Y': 'X',
+            'R': None,
+        }
+        cycles = find_hierarchy_cycles(parent_of)
+
+        self.assertEqual(sorted(cycles), [['A', 'B', 'C'], ['S'], ['X', 'Y']])
+
+    def test_ontology_hierarchy_cycles(self):
+        """Test the Ontology convenience wrapper."""
+        onto = Ontology.from_records([
+            {'id': 'BAP_0000001', 'name': 'A', 'parent': 'BAP_0000002'},
+            {'id': 'BAP_0000002', 'name': 'B', 'parent': 'BAP_0000001'},
+        ])
+        self.assertEqual(onto.hierarchy_cycles(), [['BAP_0000001', 'BAP_0000002']])
+
+    def test_deep_chain(self):
+        """Test that a long chain is handled without recursion."""
+        parent_of = {f'N{i}': f'N{i - 1}' for i in range(1, 200000)}
+        parent_of['N0'] = 'N199999'
+        cycles = find_hierarchy_cycles(parent_of)
+
+        self.assertEqual(len(cycles), 1)
+        self.assertEqual(len(cycles[0]), 200000)
+
+
+class TestHierarchyIndex(unittest.TestCase):
+    """Tests for Euler-tour depth/ancestor queries."""
+
+    def setUp(self):
+        #   A
+        #   +-- B
+        #   |   +-- D
+        #   |   +-- E
+        #   +-- C
+        #  X (orphan: unknown parent), L1 <-> L2 cycle
+        self.index = HierarchyIndex({
+            'A': None, 'B': 'A', 'C': 'A', 'D': 'B', 'E': 'B',
+            'X': 'MISSING', 'L1': 'L2', 'L2': 'L1',
+        })
+
+    def test_depth_and_size(self):
+        """Test depth, subtree size and roots."""
+        self.assertEqual(self.index.depth('A'), 0)
+        self.assertEqual(self.index.depth('E'), 2)
+        self.assertEqual(self.index.depth('X'), 0)
+        self.assertIsNone(self.index.depth('L1'))
+        self.assertEqual((self.index.root_offset('X'), self.index.root_offset('E')), (1, 0))
+        self.assertEqual(self.index.max_depth(), 2)
+        self.assertEqual(self.index.subtree_size('A'), 5)
+        self.assertEqual(self.index.subtree_size('B'), 3)
+        self.assertEqual(self.index.roots, ['A', 'X'])
+
+    def test_ancestry(self):
+        """Test is_ancestor, descendants and ancestors."""
+        self.assertTrue(self.index.is_ancestor('A', 'E'))
+        self.assertFalse(self.index.is_ancestor('E', 'A'))
+        self.assertFalse(self.index.is_ancestor('B', 'B'))
+        self.assertFalse(self.index.is_ancestor('C', 'D'))
+        self.assertFalse(self.index.is_ancestor('L1', 'L2'))
+        self.assertEqual(self.index.descendants('A'), ['B', 'D', 'E', 'C'])
+        self.assertEqual(self.index.descendants('L1'), [])
+        self.assertEqual(self.index.ancestors('D'), ['B', 'A'])
+
+    def test_ontology_hierarchy(self):
+        """Test that the ontology builds the index once."""
+        onto = Ontology.from_records([
+            {'id': 'BAP_0000001', 'name': 'Body', 'parent': None},
+            {'id': 'BAP_0000002', 'name': 'Head', 'parent': 'BAP_0000001'},
+        ])
+        self.assertIs(onto.hierarchy, onto.hierarchy)
+        self.assertEqual(onto.hierarchy.depth('BAP_0000002'), 1)
+
+    def test_ai_context_depth(self):
+        """Test a dangling parent still counts as a level in the AI context."""
+        self.assertEqual(calculate_depth('A', self.index), 0)
+        self.assertEqual(calculate_depth('E', self.index), 2)
+        self.assertEqual(calculate_depth('X', self.index), 1)
+        self.assertEqual(calculate_depth('L1', self.index), 999)
+
+
+if __name__ == '__main__':
+    os.chdir(Path(__file__).parent)
+    unittest.main(verbosity=2)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the embedding store and matrix search.
+
+Run with: python -m pytest scripts/test_semantic_search.py -v
+Or: python scripts/test_semantic_search.py
+"""
+
+import unittest
+import tempfile
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from generate_embeddings import save_embeddings, update_embeddings
+from semantic_search import (
+    load_embeddings, normalize, search_matrix, search_matrix_batch, top_k_indices
+)
+
+
+STRUCTURES = [
+    {'id': 'BAP_0000001', 'name': 'Body', 'definition': ''},
+    {'id': 'BAP_0000002', 'name': 'Head', 'definition': ''},
+    {'id': 'BAP_0000003', 'name': 'Eye', 'definition': 'Organ of sight'},
+]
+
+VECTORS = [[3.0, 0.0, 4.0], [0.0, 2.0, 0.0], [1.0, 1.0, 0.0]]
+
+
+class TestSearchMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = normalize(VECTORS)
+
+    def test_normalize(self):
+        """Test rows become unit length and zero rows stay zero."""
+        matrix = normalize([[3.0, 4.0], [0.0, 0.0]])
+        self.assertEqual(matrix.dtype, np.float32)
+        np.testing.assert_allclose(matrix, [[0.6, 0.8], [0.0, 0.0]])
+
+    def test_ranked_and_thresholded(self):
+        """Test results come best first and drop rows under the threshold."""
+        results = search_matrix(self.matrix, [0.0, 1.0, 0.0], top_k=3, threshold=0.5)
+        self.assertEqual([row for row, _ in results], [1, 2])
+        self.assertAlmostEqual(results[0][1], 1.0, places=6)
+        self.assertAlmostEqual(results[1][1], 2 ** -0.5, places=6)
+
+    def test_top_k(self):
+        """Test only the best top_k rows are returned."""
+        results = search_matrix(self.matrix, [1.0, 1.0, 1.0], top_k=1, threshold=-1)
+        self.assertEqual([row for row, _ in results], [2])
+        self.assertEqual(search_matrix(self.matrix, [1.0, 1.0, 1.0], top_k=0), [])
+
+    def test_batch(self):
+        """Test a batch gives the same results as one query at a time."""
+        queries = [[0.0, 1.0, 0.0], [1.0, 1.0, 1.0], [0.0, 0.0, -1.0]]
+        self.assertEqual(
+            search_matrix_batch(self.matrix, queries, top_k=2, threshold=0.1),
+            [search_matrix(self.matrix, q, top_k=2, threshold=0.1) for q in queries]
+        )
+        self.assertEqual(search_matrix_batch(self.matrix, queries, top_k=2, threshold=0.1)[2], [])
+
+    def test_ties_in_row_order(self):
+        """Test equal scores keep row order."""
+        scores = np.array([0.5, 0.9, 0.5, 0.9, 0.1])
+        self.assertEqual(list(top_k_indices(scores, 3)), [1, 3, 0])
+        self.assertEqual(list(top_k_indices(scores, 10)), [1, 3, 0, 2, 4])
+
+
+class TestLoadEmbeddings(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        Path('data').mkdir()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
+
+    def test_missing(self):
+        """Test None when embeddings were never generated."""
+        self.assertIsNone(load_embeddings())
+
+    def test_memory_mapped(self):
+        """Test the .npy store is memory-mapped alongside the metadata."""
+        np.save('data/embeddings.npy', normalize(VECTORS))
+        with open('data/embeddings.json', 'w') as f:
+            json.dump({'model': 'm', 'structures': STRUCTURES}, f)
+
+        data = load_embeddings()
+        self.assertIsInstance(data['matrix'], np.memmap)
+        self.assertEqual(data['matrix'].shape, (3, 3))
+        self.assertEqual(data['structures'][2]['name'], 'Eye')
+        del data
+
+    def test_inline_vectors(self):
+        """Test a JSON file with inline vectors still loads."""
+        legacy = [dict(s, embedding=v) for s, v in zip(STRUCTURES, VECTORS)]
+        with open('data/embeddings.json', 'w') as f:
+            json.dump({'model': 'm', 'structures': legacy}, f)
+
+        data = load_embeddings()
+        np.testing.assert_allclose(data['matrix'], normalize(VECTORS))
+        self.assertNotIn('embedding', data['structures'][0])
+
+
+
+class TestIncrementalEmbeddings(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        self.encoded = []
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
+
+    def encode(self, texts):
+        """Deterministic stand-in for the model: vector from the text length."""
+        self.encoded.extend(texts)
+        return np.array([[len(t), 1.0, 0.0] for t in texts])
+
+    def generate(self, structures):
+        data, matrix, _ = update_embeddings(structures, self.encode, load_embeddings())
+        save_embeddings(data, matrix)
+        return load_embeddings()
+
+    def test_only_changed_structures_encoded(self):
+        """Test a rename re-encodes one structure and a deletion drops its row."""
+        self.generate(STRUCTURES)
+        self.assertEqual(len(self.encoded), 3)
+        self.encoded.clear()
+
+        renamed = [STRUCTURES[0], dict(STRUCTURES[2], name='Eyeball')]
+        data = self.generate(renamed)
+        self.assertEqual(self.encoded, ['Eyeball - Organ of sight'])
+        self.assertEqual([s['id'] for s in data['structures']], ['BAP_0000001', 'BAP_0000003'])
+        np.testing.assert_allclose(data['matrix'], normalize([[4, 1, 0], [24, 1, 0]]))
+        self.assertEqual(len(list(Path('data').glob('*.npy'))), 1)
+
+    def test_unchanged_is_noop(self):
+        """Test a second run with no changes encodes and writes nothing."""
+        self.generate(STRUCTURES)
+        self.encoded.clear()
+
+        data, matrix, encoded = update_embeddings(STRUCTURES, self.encode, load_embeddings())
+        self.assertEqual(encoded, 0)
+        self.assertFalse(save_embeddings(data, matrix))
+        self.assertEqual(self.encoded, [])
+
+if __name__ == '__main__':
+    os.chdir(Path(__file__).parent)
+    unittest.main(verbosity=2)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the structure location index.
+
+Run with: python -m pytest scripts/test_structure_index.py -v
+Or: python scripts/test_structure_index.py
+"""
+
+import unittest
+import tempfile
+import os
+from pathlib import Path
+
+from structure_index import StructureIndex, index_yaml_text
+
+
+REGIONS_YAML = """\
+metadata:
+  category: test
+structures:
+- id: BAP_0000001
+  name: Body
+  parent: null
+- id: BAP_0000002
+  name: Head
+  parent: BAP_0000001
+"""
+
+ORGANS_YAML = """\
+structures:
+- id: BAP_0000003
+  name: Eye
+  parent: BAP_0000002
+- id: BAP_0000002
+  name: Head
+  parent: BAP_0000001
+"""
+
+
+class TestStructureIndex(unittest.TestCase):
+    """Tests for building and refreshing the index."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.structures_dir = self.root / 'structures'
+        self.structures_dir.mkdir()
+        (self.structures_dir / 'regions.yaml').write_text(REGIONS_YAML)
+        (self.structures_dir / 'organs.yaml').write_text(ORGANS_YAML)
+        self.cache_dir = self.root / '.cache' / 'ontology'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_index(self) -> StructureIndex:
+        index = StructureIndex(self.structures_dir, self.cache_dir)
+        index.refresh()
+        return index
+
+    def test_locations(self):
+        """Test file, list index and line number for each entry."""
+        index = self.make_index()
+
+        eye = index.locate('BAP_0000003')
+        self.assertEqual((eye.path.name, eye.index, eye.line), ('organs.yaml', 0, 2))
+
+        body = index.locate('BAP_0000001')
+        self.assertEqual((body.path.name, body.index, body.line), ('regions.yaml', 0, 4))
+
+        # Duplicates are all kept, files in sorted order
+        self.assertEqual([loc.path.name for loc in index.locate_all('BAP_0000002')],
+                         ['organs.yaml', 'regions.yaml'])
+        self.assertEqual(index.find_by_name(' EYE ')[0].id, 'BAP_0000003')
+        self.assertIsNone(index.locate('BAP_9999999'))
+
+    def test_refresh_reindexes_only_changed_files(self):
+        """Test incremental rebuild by content hash."""
+        index = self.make_index()
+        self.assertEqual(index.refresh(), [])
+
+        path = self.structures_dir / 'regions.yaml'
+        path.write_text(REGIONS_YAML + "- id: BAP_0000004\n  name: Ear\n  parent: BAP_0000002\n")
+        self.assertEqual(index.refresh(), ['regions.yaml'])
+        self.assertEqual(index.locate('BAP_0000004').line, 10)
+
+        # New mtime, same content: nothing to re-index
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000))
+        self.assertEqual(index.refresh(), [])
+
+    def test_persisted_between_runs(self):
+        """Test that a fresh index reuses the cached entries."""
+        self.make_index()
+        self.assertTrue((self.cache_dir / 'structure_index.pickle').exists())
+
+        index = StructureIndex(self.structures_dir, self.cache_dir)
+        self.assertEqual(index.refresh(), [])
+        self.assertEqual(len(index), 3)
+
+    def test_removed_file_is_dropped(self):
+        """Test that deleting a file removes its entries."""
+        index = self.make_index()
+        (self.structures_dir / 'organs.yaml').unlink()
+        index.refresh()
+
+        self.assertNotIn('BAP_0000003', index)
+        self.assertEqual(len(index.locate_all('BAP_0000002')), 1)
+
+    def test_index_yaml_text_ignores_other_keys(self):
+        """Test documents without a structures list."""
+        self.assertEqual(index_yaml_text("relationships:\n- subject: A\n"), [])
+        self.assertEqual(index_yaml_text(""), [])
+
+
+if __name__ == '__main__':
+    os.chdir(Path(__file__).parent)
+    unittest.main(verbosity=2)
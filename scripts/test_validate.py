@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Unit tests for validate.py's schema checks and incremental (--changed-since) mode.
+
+Run with: python -m pytest scripts/test_validate.py -v
+Or: python scripts/test_validate.py
+"""
+
+import unittest
+import tempfile
+import shutil
+import subprocess
+import sys
+import os
+from pathlib import Path
+from unittest import mock
+
+import validate
+from test_ontology import STRUCTURES_YAML, write_tree
+
+
+RELATIONSHIPS_YAML = """\
+relationships:
+- subject: BAP_0000003
+  predicate: supplied_by
+  object: BAP_0000002
+"""
+
+
+def git(root: Path, *args: str):
+    subprocess.run(
+        ["git", "-c", "user.email=test@example.com", "-c", "user.name=test", *args],
+        cwd=root, check=True, capture_output=True
+    )
+
+
+class TestChangedSince(unittest.TestCase):
+    """Tests that an incremental run reports exactly what a full run does."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        write_tree(self.root, STRUCTURES_YAML.replace('category: test', 'category: regions'), RELATIONSHIPS_YAML)
+        shutil.copytree(validate.SCHEMAS_DIR, self.root / 'schemas')
+        git(self.root, "init", "-q")
+        git(self.root, "add", "structures", "relationships")
+        git(self.root, "commit", "-q", "-m", "base")
+
+        self.patcher = mock.patch.multiple(
+            validate,
+            ROOT_DIR=self.root,
+            STRUCTURES_DIR=self.root / 'structures',
+            RELATIONSHIPS_DIR=self.root / 'relationships',
+            SCHEMAS_DIR=self.root / 'schemas',
+            RESULTS_CACHE=self.root / '.cache' / 'validation' / 'results.pickle',
+        )
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp.cleanup()
+
+    def run_both(self) -> tuple:
+        """(incremental, full) reports for the current working tree."""
+        validate.validate_all(use_cache=False)  # stored results for HEAD
+        self.edit()
+        incremental = validate.validate_all(use_cache=False, changed_since="HEAD").to_dict()
+        full = validate.validate_all(use_cache=False).to_dict()
+        return incremental, full
+
+    def append(self, relpath: str, text: str):
+        with open(self.root / relpath, 'a') as f:
+            f.write(text)
+
+    def test_removed_parent_and_new_structure(self):
+        """Test that neighbours of a removed structure are re-checked."""
+        def edit():
+            path = self.root / 'structures' / 'regions.yaml'
+            path.write_text(path.read_text().replace(
+                "- id: BAP_0000002\n  name: Head\n  parent: BAP_0000001\n", ""
+            ))
+            self.append('structures/regions.yaml', "- id: BAP_0000009\n  name: Ab\n  parent: BAP_0000001\n")
+        self.edit = edit
+
+        incremental, full = self.run_both()
+        self.assertEqual(incremental, full)
+        self.assertEqual(full['error_count'], 2)  # Eye's parent and a relationship object
+        self.assertEqual(full['warning_count'], 1)  # short name
+
+    def test_new_relationship_file_content(self):
+        """Test a relationship pointing at an unknown structure."""
+        self.edit = lambda: self.append(
+            'relationships/blood_supply.yaml',
+            "- subject: BAP_0000001\n  predicate: supplied_by\n  object: BAP_0000099\n"
+        )
+
+        incremental, full = self.run_both()
+        self.assertEqual(incremental, full)
+        self.assertEqual(full['error_count'], 1)
+
+    def test_falls_back_without_stored_results(self):
+        """Test that a missing or stale store gives a full run."""
+        report = validate.validate_all(use_cache=False, changed_since="HEAD")
+        self.assertTrue(report.is_valid)
+
+        with mock.patch.object(validate, 'check_hierarchy_cycles') as cycles:
+            validate.validate_all(use_cache=False, changed_since="no-such-ref")
+        cycles.assert_called_once()
+
+    def test_results_stored_by_script_run(self):
+        """Test results saved by `python validate.py` (as __main__) load when imported."""
+        scripts = self.root / 'scripts'
+        scripts.mkdir()
+        shutil.copy(validate.__file__, scripts)
+        env = dict(os.environ, PYTHONPATH=str(Path(validate.__file__).parent))
+        subprocess.run([sys.executable, str(scripts / 'validate.py'), '--quiet', '--no-cache'],
+                       cwd=self.root, env=env, capture_output=True)
+        self.append('relationships/blood_supply.yaml',
+                    "- subject: BAP_0000001\n  predicate: supplied_by\n  object: BAP_0000099\n")
+
+        with mock.patch.object(validate, 'results_from_dict', wraps=validate.results_from_dict) as loaded:
+            report = validate.validate_all(use_cache=False, changed_since="HEAD")
+        loaded.assert_called_once()
+        self.assertEqual(report.to_dict(), validate.validate_all(use_cache=False).to_dict())
+
+
+class TestSchemaValidation(unittest.TestCase):
+    """Tests for compiled, pooled schema validation."""
+
+    def setUp(self):
+        self.schema = validate.SCHEMAS_DIR / 'structure.schema.json'
+        self.bad = {
+            'metadata': {'category': 'regions'},
+            'structures': [
+                {'id': 'bad', 'name': 'Body'},
+                {'id': 'BAP_0000002', 'name': 5, 'parent': None},
+            ],
+        }
+
+    def test_reports_every_error_with_path(self):
+        """Test that all violations are reported, not just the first."""
+        messages = [i.message for i in validate.schema_issues(self.bad, self.schema, 'regions.yaml')]
+        self.assertEqual(len(messages), 2)
+        self.assertIn('$.structures[0].id', messages[0])
+        self.assertIn('$.structures[1].name', messages[1])
+
+    def test_pool_matches_inline(self):
+        """Test that a process pool gives the same issues per document."""
+        good = {'metadata': {'category': 'regions'},
+                'structures': [{'id': 'BAP_0000001', 'name': 'Body', 'parent': None}]}
+        tasks = [('a', self.bad, self.schema, 'a.yaml'), ('b', good, self.schema, 'b.yaml')]
+
+        pooled = validate.validate_schemas(tasks, jobs=2)
+        self.assertEqual(pooled, validate.validate_schemas(tasks, jobs=1))
+        self.assertEqual(len(pooled['a']), 2)
+        self.assertEqual(pooled['b'], [])
+
+
+if __name__ == '__main__':
+    os.chdir(Path(__file__).parent)
+    unittest.main(verbosity=2)
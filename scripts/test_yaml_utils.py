@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the formatting-preserving YAML writer.
+
+Run with: python -m pytest scripts/test_yaml_utils.py -v
+Or: python scripts/test_yaml_utils.py
+"""
+
+import unittest
+import tempfile
+import os
+from pathlib import Path
+from unittest import mock
+
+from ruamel.yaml import YAML
+
+from yaml_utils import OntologyWriter
+
+
+STRUCTURES_YAML = """\
+# Test structures
+metadata:
+  category: test
+structures:
+- id: BAP_0000001
+  name: Body
+  parent: null
+- id: BAP_0000002
+  name: Head   # keep me
+  parent: BAP_0000001
+- id: BAP_0000003
+  name: Eye
+  parent: BAP_0000002
+"""
+
+RELATIONSHIPS_YAML = """\
+relationships:
+- subject: BAP_0000003
+  predicate: supplied_by
+  object: BAP_0000002
+- subject: BAP_0000002
+  predicate: supplied_by
+  object: BAP_0000001
+"""
+
+
+def plain_yaml() -> YAML:
+    y = YAML()
+    y.preserve_quotes = True
+    y.width = 120
+    return y
+
+
+class TestOntologyWriter(unittest.TestCase):
+    """Tests for batched edits."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / 'structures').mkdir()
+        (self.root / 'relationships').mkdir()
+        self.structures = self.root / 'structures' / 'regions.yaml'
+        self.relationships = self.root / 'relationships' / 'blood_supply.yaml'
+        self.structures.write_text(STRUCTURES_YAML)
+        self.relationships.write_text(RELATIONSHIPS_YAML)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def writer(self) -> OntologyWriter:
+        return OntologyWriter(self.root / 'structures', yaml=plain_yaml())
+
+    def test_many_edits_write_each_file_once(self):
+        """Test that a batch of edits costs one load and one write per file."""
+        writer = self.writer()
+        with mock.patch.object(writer.yaml, 'load', wraps=writer.yaml.load) as load, \
+                mock.patch.object(writer.yaml, 'dump', wraps=writer.yaml.dump) as dump:
+            with writer:
+                writer.update_structure_parent(self.structures, 'BAP_0000003', 'BAP_0000001')
+                writer.add_structure(self.structures, {'id': 'BAP_0000004', 'name': 'Ear', 'parent': 'BAP_0000002'})
+                writer.update_structure(self.structures, 'BAP_0000002', {'definition': 'The head'})
+                self.assertEqual(self.structures.read_text(), STRUCTURES_YAML)
+
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(dump.call_count, 1)
+        text = self.structures.read_text()
+        self.assertIn('name: Head   # keep me', text)
+        self.assertIn('- id: BAP_0000004', text)
+        self.assertIn('definition: The head', text)
+
+    def test_untouched_files_are_not_written(self):
+        """Test that lookups alone leave files alone."""
+        writer = self.writer()
+        self.assertEqual(writer.find_structure('BAP_0000003'), (self.structures, 2))
+        self.assertEqual(writer.children_of('BAP_0000001'), ['BAP_0000002'])
+        self.assertEqual(writer.commit(), [])
+
+    def test_lookups_see_pending_edits(self):
+        """Test that children_of reflects earlier moves in the same batch."""
+        writer = self.writer()
+        self.assertEqual(writer.children_of('BAP_0000002'), ['BAP_0000003'])
+
+        writer.update_structure_parent(self.structures, 'BAP_0000003', 'BAP_0000001')
+        self.assertEqual(writer.children_of('BAP_0000002'), [])
+
+        writer.add_structure(self.structures, {'id': 'BAP_0000004', 'name': 'Ear', 'parent': 'BAP_0000002'})
+        self.assertEqual(writer.find_structure('BAP_0000004'), (self.structures, 3))
+        writer.remove_structure_by_index(self.structures, 0)
+        self.assertIsNone(writer.find_structure('BAP_0000001'))
+
+    def test_exception_rolls_back(self):
+        """Test that an error inside the block discards pending edits."""
+        with self.assertRaises(RuntimeError):
+            with self.writer() as writer:
+                writer.remove_structure_by_index(self.structures, 0)
+                raise RuntimeError("boom")
+
+        self.assertEqual(self.structures.read_text(), STRUCTURES_YAML)
+
+    def test_remove_relationships_by_structure(self):
+        """Test in-place removal and the returned count."""
+        with self.writer() as writer:
+            removed = writer.remove_relationships_by_structure(self.relationships, 'BAP_0000003')
+
+        self.assertEqual(removed, 1)
+        text = self.relationships.read_text()
+        self.assertNotIn('BAP_0000003', text)
+        self.assertIn('subject: BAP_0000002', text)
+
+
+if __name__ == '__main__':
+    os.chdir(Path(__file__).parent)
+    unittest.main(verbosity=2)
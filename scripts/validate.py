@@ -12,22 +12,45 @@ Usage:
     python scripts/validate.py
     python scripts/validate.py --strict  # Fail on warnings too
     python scripts/validate.py --json report.json  # Output JSON report
+    python scripts/validate.py --no-cache  # Ignore the parsed-YAML cache in .cache/
+    python scripts/validate.py --changed-since origin/main  # Only re-check what changed
+    python scripts/validate.py --jobs 4  # Schema-validate files in 4 processes
+
+Every run stores its per-file and per-structure results in .cache/validation/.
+With --changed-since REF, a stored run of REF is reused: only files that
+differ from REF, structures added/removed/modified since REF and their
+neighbours (children, relationships pointing at them) are re-checked, and
+the report is identical to a full run. Without stored results for REF it
+falls back to a full run.
+
+Schema validation reports every violation with its JSON path (e.g.
+$.structures[12].parent), not just the first. Each schema is compiled once
+per process. With --jobs N, files are validated in a pool of N processes
+(0: CPU count); by default they are validated inline.
 """
 
+import os
 import sys
 import json
+import pickle
+import hashlib
 import argparse
+import tempfile
+import subprocess
 from pathlib import Path
-from typing import Dict, List, Set, Any, Optional
-from dataclasses import dataclass, field
+from typing import Dict, List, Set, Any, Optional, Tuple
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ProcessPoolExecutor
 
-import yaml
 try:
     import jsonschema
 except ImportError:
     jsonschema = None
     print("Warning: jsonschema not installed. Schema validation disabled.")
 
+import yaml_fast
+from ontology import Ontology, find_hierarchy_cycles, load_file, load_ontology
+
 
 # ============================================================================
 # Configuration
@@ -37,6 +60,8 @@ ROOT_DIR = Path(__file__).parent.parent
 STRUCTURES_DIR = ROOT_DIR / "structures"
 RELATIONSHIPS_DIR = ROOT_DIR / "relationships"
 SCHEMAS_DIR = ROOT_DIR / "schemas"
+RESULTS_CACHE = ROOT_DIR / ".cache" / "validation" / "results.pickle"
+RESULTS_VERSION = 2
 
 
 # ============================================================================
@@ -125,21 +150,15 @@ class ValidationReport:
 
 
 # ============================================================================
-# YAML Loading
+# Loading
 # ============================================================================
 
 def load_yaml_file(filepath: Path) -> Optional[dict]:
     """Load a YAML file and return its contents."""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
-    except yaml.YAMLError as e:
-        return None
-    except FileNotFoundError:
-        return None
+    return load_file(filepath).data
 
 
-def load_all_structures(report: ValidationReport) -> Dict[str, dict]:
+def load_all_structures(report: ValidationReport, onto: Optional[Ontology] = None) -> Dict[str, dict]:
     """Load all structure definitions from YAML files."""
     structures = {}
     
@@ -147,37 +166,35 @@ def load_all_structures(report: ValidationReport) -> Dict[str, dict]:
         report.add_error("FileSystem", f"Structures directory not found: {STRUCTURES_DIR}")
         return structures
     
-    yaml_files = list(STRUCTURES_DIR.glob("*.yaml")) + list(STRUCTURES_DIR.glob("*.yml"))
+    if onto is None:
+        onto = load_ontology(ROOT_DIR)
     
-    for filepath in yaml_files:
-        data = load_yaml_file(filepath)
+    for file in onto.structure_files:
+        data = file.data
         if data is None:
-            report.add_error("YAML", f"Failed to parse {filepath.name}")
+            report.add_error("YAML", f"Failed to parse {file.name}")
             continue
         
         if "structures" not in data:
-            report.add_warning("Schema", f"No 'structures' key in {filepath.name}")
+            report.add_warning("Schema", f"No 'structures' key in {file.name}")
             continue
         
         for struct in data.get("structures", []):
             if "id" not in struct:
-                report.add_error("Schema", f"Structure missing 'id' in {filepath.name}")
+                report.add_error("Schema", f"Structure missing 'id' in {file.name}")
                 continue
             
             struct_id = struct["id"]
             if struct_id in structures:
-                report.add_error("Duplicate", f"Duplicate structure ID: {struct_id}", filepath.name)
+                report.add_error("Duplicate", f"Duplicate structure ID: {struct_id}", file.name)
             
-            structures[struct_id] = {
-                **struct,
-                "_source_file": filepath.name
-            }
+            structures[struct_id] = onto.structures[struct_id]
     
     report.stats["Total structures"] = len(structures)
     return structures
 
 
-def load_all_relationships(report: ValidationReport) -> List[dict]:
+def load_all_relationships(report: ValidationReport, onto: Optional[Ontology] = None) -> List[dict]:
     """Load all relationship definitions from YAML files."""
     relationships = []
     
@@ -185,20 +202,14 @@ def load_all_relationships(report: ValidationReport) -> List[dict]:
         report.add_warning("FileSystem", f"Relationships directory not found: {RELATIONSHIPS_DIR}")
         return relationships
     
-    yaml_files = list(RELATIONSHIPS_DIR.glob("*.yaml")) + list(RELATIONSHIPS_DIR.glob("*.yml"))
+    if onto is None:
+        onto = load_ontology(ROOT_DIR)
     
-    for filepath in yaml_files:
-        data = load_yaml_file(filepath)
-        if data is None:
-            report.add_error("YAML", f"Failed to parse {filepath.name}")
-            continue
-        
-        rels = data.get("relationships") or []  # Handle None case
-        for rel in rels:
-            if rel is not None:  # Skip None entries
-                rel["_source_file"] = filepath.name
-                relationships.append(rel)
+    for file in onto.relationship_files:
+        if file.data is None:
+            report.add_error("YAML", f"Failed to parse {file.name}")
     
+    relationships = list(onto.relationships)
     report.stats["Total relationships"] = len(relationships)
     return relationships
 
@@ -207,40 +218,118 @@ def load_all_relationships(report: ValidationReport) -> List[dict]:
 # Schema Validation
 # ============================================================================
 
-def validate_schema(data: dict, schema_path: Path, report: ValidationReport, source_file: str):
-    """Validate data against JSON schema."""
+_validators: Dict[Path, Any] = {}
+
+
+def get_validator(schema_path: Path):
+    """Draft-07 validator for a schema file, compiled once per process."""
+    if schema_path not in _validators:
+        with open(schema_path, 'r') as f:
+            schema = json.load(f)
+        jsonschema.Draft7Validator.check_schema(schema)
+        _validators[schema_path] = jsonschema.Draft7Validator(schema)
+    return _validators[schema_path]
+
+
+def schema_issues(data: dict, schema_path: Path, source_file: str) -> List[ValidationIssue]:
+    """Validate data against JSON schema, returning every error with its JSON path."""
     if jsonschema is None:
-        return
+        return []
     
     if not schema_path.exists():
-        report.add_warning("Schema", f"Schema file not found: {schema_path}")
-        return
+        return [ValidationIssue("warning", "Schema", f"Schema file not found: {schema_path}")]
     
     try:
-        with open(schema_path, 'r') as f:
-            schema = json.load(f)
-        
-        jsonschema.validate(data, schema)
-    except jsonschema.ValidationError as e:
-        report.add_error("Schema", f"Schema validation failed: {e.message}", source_file)
+        validator = get_validator(schema_path)
     except json.JSONDecodeError as e:
-        report.add_error("Schema", f"Invalid JSON schema: {e}", str(schema_path))
+        return [ValidationIssue("error", "Schema", f"Invalid JSON schema: {e}", str(schema_path))]
+    except jsonschema.SchemaError as e:
+        return [ValidationIssue("error", "Schema", f"Invalid JSON schema: {e.message}", str(schema_path))]
+    
+    return [
+        ValidationIssue("error", "Schema", f"Schema validation failed at {e.json_path}: {e.message}", source_file)
+        for e in validator.iter_errors(data)
+    ]
+
+
+def validate_schema(data: dict, schema_path: Path, report: ValidationReport, source_file: str):
+    """Validate data against JSON schema."""
+    report.issues.extend(schema_issues(data, schema_path, source_file))
+
+
+def _schema_task(task: Tuple[str, dict, Path, str]) -> Tuple[str, List[ValidationIssue]]:
+    key, data, schema_path, source_file = task
+    return key, schema_issues(data, schema_path, source_file)
+
+
+def validate_schemas(
+    tasks: List[Tuple[str, dict, Path, str]],
+    jobs: int = 1
+) -> Dict[str, List[ValidationIssue]]:
+    """
+    Schema-validate several documents, given as (key, data, schema path,
+    file name), in a process pool when jobs > 1. Returns key -> issues.
+    """
+    if jobs <= 1 or len(tasks) <= 1 or jsonschema is None:
+        return dict(map(_schema_task, tasks))
+    
+    # Biggest documents first so the pool doesn't end up waiting on one
+    def size(task):
+        data = task[1]
+        return len(data.get("structures") or data.get("relationships") or []) if isinstance(data, dict) else 0
+    
+    tasks = sorted(tasks, key=size, reverse=True)
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+        return dict(pool.map(_schema_task, tasks))
 
 
 # ============================================================================
 # Referential Integrity Checks
 # ============================================================================
 
+def parent_issues(struct_id: str, struct: dict, structures: Dict[str, dict]) -> List[ValidationIssue]:
+    """Check that a structure's parent reference is valid."""
+    parent = struct.get("parent")
+    if parent is not None and parent not in structures:
+        return [ValidationIssue(
+            "error",
+            "Hierarchy",
+            f"Structure '{struct.get('name', struct_id)}' references non-existent parent: {parent}",
+            struct.get("_source_file")
+        )]
+    return []
+
+
+def relationship_issues(rel: dict, structures: Dict[str, dict]) -> List[ValidationIssue]:
+    """Check that a relationship's subject and object exist."""
+    issues = []
+    subject = rel.get("subject")
+    obj = rel.get("object")
+    source_file = rel.get("_source_file")
+    
+    if subject and subject not in structures:
+        issues.append(ValidationIssue(
+            "error",
+            "Relationship",
+            f"Relationship subject not found: {subject}",
+            source_file
+        ))
+    
+    if obj and obj not in structures:
+        issues.append(ValidationIssue(
+            "error",
+            "Relationship",
+            f"Relationship object not found: {obj}",
+            source_file
+        ))
+    
+    return issues
+
+
 def check_hierarchy_integrity(structures: Dict[str, dict], report: ValidationReport):
     """Check that all parent references are valid."""
     for struct_id, struct in structures.items():
-        parent = struct.get("parent")
-        if parent is not None and parent not in structures:
-            report.add_error(
-                "Hierarchy",
-                f"Structure '{struct.get('name', struct_id)}' references non-existent parent: {parent}",
-                struct.get("_source_file")
-            )
+        report.issues.extend(parent_issues(struct_id, struct, structures))
 
 
 def check_relationship_integrity(
@@ -250,23 +339,7 @@ def check_relationship_integrity(
 ):
     """Check that all relationship references are valid."""
     for rel in relationships:
-        subject = rel.get("subject")
-        obj = rel.get("object")
-        source_file = rel.get("_source_file")
-        
-        if subject and subject not in structures:
-            report.add_error(
-                "Relationship",
-                f"Relationship subject not found: {subject}",
-                source_file
-            )
-        
-        if obj and obj not in structures:
-            report.add_error(
-                "Relationship",
-                f"Relationship object not found: {obj}",
-                source_file
-            )
+        report.issues.extend(relationship_issues(rel, structures))
 
 
 # ============================================================================
@@ -274,32 +347,11 @@ def check_relationship_integrity(
 # ============================================================================
 
 def check_hierarchy_cycles(structures: Dict[str, dict], report: ValidationReport):
-    """Detect cycles in the hierarchy (A -> B -> C -> A)."""
-    # Build parent map
-    parent_map = {}
-    for struct_id, struct in structures.items():
-        parent = struct.get("parent")
-        if parent is not None:
-            parent_map[struct_id] = parent
-    
-    # Check for cycles using path traversal
-    cycles_found = []
-    for start_id in parent_map:
-        visited = set()
-        current = start_id
-        path = [current]
-        
-        while current in parent_map and current not in visited:
-            visited.add(current)
-            current = parent_map[current]
-            path.append(current)
-            
-            if current == start_id:
-                cycles_found.append(path)
-                break
+    """Detect cycles in the hierarchy (A -> B -> C -> A), reporting each once."""
+    parent_map = {struct_id: struct.get("parent") for struct_id, struct in structures.items()}
     
-    for cycle in cycles_found:
-        names = [structures.get(sid, {}).get("name", sid) for sid in cycle]
+    for cycle in find_hierarchy_cycles(parent_map):
+        names = [structures.get(sid, {}).get("name", sid) for sid in cycle + cycle[:1]]
         report.add_error("Hierarchy", f"Cycle detected: {' -> '.join(names)}")
 
 
@@ -307,28 +359,36 @@ def check_hierarchy_cycles(structures: Dict[str, dict], report: ValidationReport
 # Data Quality Checks
 # ============================================================================
 
+def data_quality_issues(struct_id: str, struct: dict) -> List[ValidationIssue]:
+    """Check a single structure for data quality issues."""
+    issues = []
+    name = struct.get("name", "")
+    abbrev = struct.get("abbreviation", "")
+    source_file = struct.get("_source_file")
+    
+    # Check for missing names
+    if not name:
+        issues.append(ValidationIssue("error", "DataQuality", f"Structure {struct_id} is missing a name", source_file))
+    
+    # Check for very short names (might be abbreviations)
+    if name and len(name) < 3:
+        issues.append(ValidationIssue("warning", "DataQuality", f"Very short name: '{name}' ({struct_id})", source_file))
+    
+    # Check for very long abbreviations (might be swapped with name)
+    if abbrev and len(abbrev) > 15:
+        issues.append(ValidationIssue("warning", "DataQuality", f"Long abbreviation ({len(abbrev)} chars): {struct_id}", source_file))
+    
+    # Check ID format
+    if not struct_id.startswith("BAP_") or len(struct_id) != 11:
+        issues.append(ValidationIssue("warning", "DataQuality", f"Non-standard ID format: {struct_id}", source_file))
+    
+    return issues
+
+
 def check_data_quality(structures: Dict[str, dict], report: ValidationReport):
     """Check for data quality issues."""
     for struct_id, struct in structures.items():
-        name = struct.get("name", "")
-        abbrev = struct.get("abbreviation", "")
-        source_file = struct.get("_source_file")
-        
-        # Check for missing names
-        if not name:
-            report.add_error("DataQuality", f"Structure {struct_id} is missing a name", source_file)
-        
-        # Check for very short names (might be abbreviations)
-        if name and len(name) < 3:
-            report.add_warning("DataQuality", f"Very short name: '{name}' ({struct_id})", source_file)
-        
-        # Check for very long abbreviations (might be swapped with name)
-        if abbrev and len(abbrev) > 15:
-            report.add_warning("DataQuality", f"Long abbreviation ({len(abbrev)} chars): {struct_id}", source_file)
-        
-        # Check ID format
-        if not struct_id.startswith("BAP_") or len(struct_id) != 11:
-            report.add_warning("DataQuality", f"Non-standard ID format: {struct_id}", source_file)
+        report.issues.extend(data_quality_issues(struct_id, struct))
 
 
 def check_orphan_structures(structures: Dict[str, dict], report: ValidationReport):
@@ -366,39 +426,255 @@ def check_duplicate_relationships(relationships: List[dict], report: ValidationR
         seen.add(key)
 
 
+# ============================================================================
+# Incremental Validation
+# ============================================================================
+
+@dataclass
+class CheckResults:
+    """Per-file and per-structure issues from one run, reusable by the next."""
+    blobs: Dict[str, str]  # relative path -> git blob id of the checked content
+    schemas: str  # fingerprint of the schemas the files were checked against
+    schema: Dict[str, List[ValidationIssue]] = field(default_factory=dict)  # path -> issues
+    hierarchy: Dict[str, List[ValidationIssue]] = field(default_factory=dict)  # id -> issues
+    quality: Dict[str, List[ValidationIssue]] = field(default_factory=dict)  # id -> issues
+    relationships: Dict[str, List[List[ValidationIssue]]] = field(default_factory=dict)  # path -> per rel
+
+
+@dataclass
+class ChangeSet:
+    """What differs between a git ref and the working tree."""
+    files: Set[str]  # relative paths added, removed or modified
+    structures: Set[str]  # structure IDs added, removed or modified
+    existence: Set[str]  # IDs present on one side only
+
+
+def git_blob_id(raw: bytes) -> str:
+    """The id git would give this content (so it can be compared with ls-tree)."""
+    return hashlib.sha1(b"blob %d\0" % len(raw) + raw).hexdigest()
+
+
+def relative_path(path: Path) -> str:
+    return f"{path.parent.name}/{path.name}"
+
+
+def current_blobs(onto: Ontology) -> Dict[str, str]:
+    """Blob ids of the YAML files as they are on disk."""
+    return {
+        relative_path(file.path): git_blob_id(file.path.read_bytes())
+        for file in onto.structure_files + onto.relationship_files
+    }
+
+
+def schemas_fingerprint() -> str:
+    digest = hashlib.sha256(b"jsonschema" if jsonschema else b"none")
+    for name in ("structure.schema.json", "relationship.schema.json"):
+        path = SCHEMAS_DIR / name
+        digest.update(path.read_bytes() if path.exists() else b"missing")
+    return digest.hexdigest()
+
+
+def run_git(*args: str) -> str:
+    result = subprocess.run(
+        ["git", *args], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+
+def ref_blobs(ref: str) -> Dict[str, str]:
+    """Blob ids of the YAML files at a git ref."""
+    blobs = {}
+    for line in run_git("ls-tree", "-r", ref, "--", "structures", "relationships").splitlines():
+        meta, path = line.split("\t", 1)
+        if path.endswith((".yaml", ".yml")):
+            blobs[path] = meta.split()[2]
+    return blobs
+
+
+def structures_by_id(data: Optional[dict]) -> Dict[str, dict]:
+    if not isinstance(data, dict):
+        return {}
+    return {s["id"]: s for s in data.get("structures") or [] if isinstance(s, dict) and "id" in s}
+
+
+def collect_changes(ref: str, onto: Ontology, blobs: Dict[str, str], old_blobs: Dict[str, str]) -> ChangeSet:
+    """Diff the working tree against ref, down to structure IDs."""
+    files = {path for path in set(blobs) | set(old_blobs) if blobs.get(path) != old_blobs.get(path)}
+    files_by_path = {relative_path(f.path): f for f in onto.structure_files}
+    
+    touched = set()
+    old_ids = set()
+    for path in files:
+        if not path.startswith("structures/"):
+            continue
+        old = {}
+        if path in old_blobs:
+            old = structures_by_id(yaml_fast.safe_load(run_git("show", f"{ref}:{path}")))
+        new = structures_by_id(files_by_path[path].data) if path in files_by_path else {}
+        old_ids.update(old)
+        touched.update(sid for sid in set(old) | set(new) if old.get(sid) != new.get(sid))
+    
+    changed_names = {Path(path).name for path in files if path.startswith("structures/")}
+    old_ids.update(
+        s["id"] for s in onto.structure_records if s["_source_file"] not in changed_names
+    )
+    existence = {sid for sid in touched if (sid in old_ids) != (sid in onto.structures)}
+    return ChangeSet(files, touched, existence)
+
+
+def load_previous_results(ref: str, onto: Ontology, blobs: Dict[str, str]) -> Optional[Tuple[CheckResults, ChangeSet]]:
+    """Stored results for ref plus the changes since, or None if unusable."""
+    try:
+        with open(RESULTS_CACHE, 'rb') as f:
+            previous = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        print("No stored validation results; running full validation")
+        return None
+    
+    try:
+        old_blobs = ref_blobs(ref)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Cannot read git ref '{ref}' ({e}); running full validation")
+        return None
+    
+    if (not isinstance(previous, dict) or previous.get("version") != RESULTS_VERSION
+            or previous["results"]["blobs"] != old_blobs
+            or previous["results"]["schemas"] != schemas_fingerprint()):
+        print(f"Stored validation results are not for '{ref}'; running full validation")
+        return None
+    
+    changes = collect_changes(ref, onto, blobs, old_blobs)
+    print(f"Changed since {ref}: {len(changes.files)} file(s), {len(changes.structures)} structure(s)")
+    return results_from_dict(previous["results"]), changes
+
+
+def results_from_dict(stored: dict) -> CheckResults:
+    """
+    Rebuild CheckResults from save_results' plain dicts (stored that way so
+    the pickle loads whether this module ran as __main__ or was imported).
+    """
+    def issues(items):
+        return [ValidationIssue(**item) for item in items]
+    
+    return CheckResults(
+        blobs=stored["blobs"],
+        schemas=stored["schemas"],
+        schema={k: issues(v) for k, v in stored["schema"].items()},
+        hierarchy={k: issues(v) for k, v in stored["hierarchy"].items()},
+        quality={k: issues(v) for k, v in stored["quality"].items()},
+        relationships={k: [issues(rel) for rel in v] for k, v in stored["relationships"].items()},
+    )
+
+
+def save_results(results: CheckResults):
+    try:
+        RESULTS_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=RESULTS_CACHE.parent, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({"version": RESULTS_VERSION, "results": asdict(results)}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, RESULTS_CACHE)
+    except OSError:
+        pass
+
+
+def run_item_checks(
+    onto: Ontology,
+    structures: Dict[str, dict],
+    blobs: Dict[str, str],
+    previous: Optional[Tuple[CheckResults, ChangeSet]] = None,
+    jobs: int = 1
+) -> CheckResults:
+    """
+    Run the per-file and per-structure checks.
+    
+    With previous results, only the changed files, the changed structures
+    and their neighbours are checked; everything else is copied over.
+    """
+    results = CheckResults(blobs, schemas_fingerprint())
+    old, changes = previous if previous else (CheckResults({}, ""), None)
+    
+    # Neighbours: structures whose parent appeared or disappeared, and
+    # relationship files that reference such an ID
+    recheck = set(structures)
+    recheck_rel_files = {relative_path(f.path) for f in onto.relationship_files}
+    if changes:
+        recheck = {sid for sid in changes.structures if sid in structures}
+        recheck_rel_files = {path for path in changes.files if path.startswith("relationships/")}
+        for sid in changes.existence:
+            recheck.update(onto.children_of(sid))
+            for rel in onto.relationships_from(sid) + onto.relationships_to(sid):
+                recheck_rel_files.add(f"{RELATIONSHIPS_DIR.name}/{rel['_source_file']}")
+    
+    schema_paths = {
+        STRUCTURES_DIR.name: SCHEMAS_DIR / "structure.schema.json",
+        RELATIONSHIPS_DIR.name: SCHEMAS_DIR / "relationship.schema.json",
+    }
+    schema_tasks = []
+    for file in onto.structure_files + onto.relationship_files:
+        path = relative_path(file.path)
+        if changes and path not in changes.files and path in old.schema:
+            results.schema[path] = old.schema[path]
+        elif file.data:
+            schema_tasks.append((path, file.data, schema_paths[file.path.parent.name], file.name))
+    results.schema.update(validate_schemas(schema_tasks, jobs))
+    
+    for struct_id, struct in structures.items():
+        if struct_id in recheck or struct_id not in old.hierarchy:
+            results.hierarchy[struct_id] = parent_issues(struct_id, struct, structures)
+            results.quality[struct_id] = data_quality_issues(struct_id, struct)
+        else:
+            results.hierarchy[struct_id] = old.hierarchy[struct_id]
+            results.quality[struct_id] = old.quality[struct_id]
+    
+    rels_by_file: Dict[str, List[dict]] = {relative_path(f.path): [] for f in onto.relationship_files}
+    for rel in onto.relationships:
+        rels_by_file[f"{RELATIONSHIPS_DIR.name}/{rel['_source_file']}"].append(rel)
+    for path, rels in rels_by_file.items():
+        if path in recheck_rel_files or path not in old.relationships:
+            results.relationships[path] = [relationship_issues(rel, structures) for rel in rels]
+        else:
+            results.relationships[path] = old.relationships[path]
+    
+    return results
+
+
 # ============================================================================
 # Main Validation
 # ============================================================================
 
-def validate_all(strict: bool = False) -> ValidationReport:
-    """Run all validation checks."""
+def validate_all(
+    strict: bool = False,
+    use_cache: Optional[bool] = None,
+    changed_since: Optional[str] = None,
+    jobs: int = 1
+) -> ValidationReport:
+    """Run all validation checks (incrementally against changed_since if possible)."""
     report = ValidationReport()
+    onto = load_ontology(ROOT_DIR, use_cache=use_cache)
     
     print("Loading structures...")
-    structures = load_all_structures(report)
+    structures = load_all_structures(report, onto)
     
     print("Loading relationships...")
-    relationships = load_all_relationships(report)
+    relationships = load_all_relationships(report, onto)
+    
+    blobs = current_blobs(onto)
+    previous = load_previous_results(changed_since, onto, blobs) if changed_since else None
+    results = run_item_checks(onto, structures, blobs, previous, jobs if jobs > 0 else os.cpu_count() or 1)
     
     # Schema validation
     print("Validating schemas...")
-    structure_schema = SCHEMAS_DIR / "structure.schema.json"
-    relationship_schema = SCHEMAS_DIR / "relationship.schema.json"
-    
-    for filepath in STRUCTURES_DIR.glob("*.yaml"):
-        data = load_yaml_file(filepath)
-        if data:
-            validate_schema(data, structure_schema, report, filepath.name)
-    
-    for filepath in RELATIONSHIPS_DIR.glob("*.yaml"):
-        data = load_yaml_file(filepath)
-        if data:
-            validate_schema(data, relationship_schema, report, filepath.name)
+    for file in onto.structure_files + onto.relationship_files:
+        report.issues.extend(results.schema.get(relative_path(file.path), []))
     
     # Referential integrity
     print("Checking referential integrity...")
-    check_hierarchy_integrity(structures, report)
-    check_relationship_integrity(relationships, structures, report)
+    for struct_id in structures:
+        report.issues.extend(results.hierarchy[struct_id])
+    for rel_issues in results.relationships.values():
+        for issues in rel_issues:
+            report.issues.extend(issues)
     
     # Hierarchy checks
     print("Checking hierarchy...")
@@ -407,14 +683,16 @@ def validate_all(strict: bool = False) -> ValidationReport:
     
     # Data quality
     print("Checking data quality...")
-    check_data_quality(structures, report)
+    for struct_id in structures:
+        report.issues.extend(results.quality[struct_id])
     check_duplicate_relationships(relationships, report)
     
     # Count statistics
-    report.stats["Structure files"] = len(list(STRUCTURES_DIR.glob("*.yaml")))
-    report.stats["Relationship files"] = len(list(RELATIONSHIPS_DIR.glob("*.yaml")))
+    report.stats["Structure files"] = len(onto.structure_files)
+    report.stats["Relationship files"] = len(onto.relationship_files)
     report.stats["Root structures"] = sum(1 for s in structures.values() if s.get("parent") is None)
     
+    save_results(results)
     return report
 
 
@@ -423,9 +701,19 @@ def main():
     parser.add_argument("--strict", action="store_true", help="Fail on warnings too")
     parser.add_argument("--json", type=str, help="Output report to JSON file")
     parser.add_argument("--quiet", "-q", action="store_true", help="Minimal output")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse YAML instead of using .cache/")
+    parser.add_argument("--changed-since", metavar="REF",
+                        help="Only re-check what changed since this git ref (reuses stored results)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Processes for schema validation (default: 1, inline; 0: CPU count)")
     args = parser.parse_args()
     
-    report = validate_all(strict=args.strict)
+    report = validate_all(
+        strict=args.strict,
+        use_cache=False if args.no_cache else None,
+        changed_since=args.changed_since,
+        jobs=args.jobs
+    )
     
     if not args.quiet:
         report.print_report()
@@ -3,7 +3,7 @@
 Verify that lateralized relationships match the database when de-lateralized.
 """
 
-import yaml
+import yaml_fast
 from pathlib import Path
 from collections import defaultdict
 
@@ -14,7 +14,7 @@ def load_yaml_relationships():
     
     for yaml_file in rel_dir.glob('*.yaml'):
         with open(yaml_file) as f:
-            data = yaml.safe_load(f)
+            data = yaml_fast.safe_load(f)
             if data and 'relationships' in data and data['relationships']:
                 relationships.extend(data['relationships'])
     
@@ -27,7 +27,7 @@ def load_all_structures():
     
     for yaml_file in struct_dir.glob('*.yaml'):
         with open(yaml_file) as f:
-            data = yaml.safe_load(f)
+            data = yaml_fast.safe_load(f)
             if data and 'structures' in data:
                 for struct in data['structures']:
                     structures[struct['id']] = struct
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Fast read-only YAML loading.
+
+Uses libyaml's C parser (yaml.CSafeLoader) when PyYAML was built with it and
+falls back to the pure-Python SafeLoader otherwise. Both produce the same
+data; only the speed differs (see benchmark_yaml.py).
+
+Use this for reads. Edits that must keep comments and formatting go through
+yaml_utils (ruamel.yaml).
+"""
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+    HAS_LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader
+    HAS_LIBYAML = False
+
+
+def safe_load(stream):
+    """Drop-in replacement for yaml.safe_load using the fastest safe loader."""
+    return yaml.load(stream, Loader=SafeLoader)
@@ -2,12 +2,30 @@
 """
 YAML utilities that preserve formatting when modifying files.
 Uses ruamel.yaml to maintain comments, ordering, and style.
+
+For more than one edit, use OntologyWriter: it loads each file once, applies
+all edits in memory and writes every touched file exactly once on commit.
+
+    with OntologyWriter() as writer:
+        for struct_id in moved:
+            writer.update_structure_parent(path, struct_id, new_parent_id)
+    # files written here (or discarded if the block raised)
+
+The module-level helpers below are one-edit transactions kept for existing
+callers.
 """
 
+import io
+import os
+import tempfile
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from ruamel.yaml import YAML
 
+from ontology import load_ontology
+from structure_index import load_structure_index
+
 
 def get_yaml() -> YAML:
     """Get a configured YAML instance that preserves formatting."""
@@ -32,80 +50,225 @@ def save_yaml(filepath: Path, data: dict):
         yaml.dump(data, f)
 
 
+# ============================================================================
+# Batched Writer
+# ============================================================================
+
+class OntologyWriter:
+    """
+    Transactional, formatting-preserving editor for ontology YAML files.
+
+    Files are loaded lazily on first use and kept in memory, so later edits
+    and lookups see earlier (uncommitted) ones. commit() dumps every dirty
+    file and writes it in one go; rollback() drops pending edits. Used as a
+    context manager it commits on success and rolls back on an exception.
+    """
+
+    def __init__(self, structures_dir: Path = Path('structures'), yaml: Optional[YAML] = None):
+        self.structures_dir = Path(structures_dir)
+        self.yaml = yaml or get_yaml()
+        self._docs: Dict[Path, Any] = {}
+        self._paths: Dict[Path, Path] = {}
+        self._dirty: List[Path] = []
+
+    def __enter__(self) -> "OntologyWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    # ------------------------------------------------------------------------
+    # Documents
+    # ------------------------------------------------------------------------
+
+    def document(self, filepath: Path) -> Any:
+        """The in-memory document for a file, loading it on first access."""
+        key = Path(filepath).resolve()
+        if key not in self._docs:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                self._docs[key] = self.yaml.load(f) or {}
+            self._paths[key] = Path(filepath)
+        return self._docs[key]
+
+    def mark_dirty(self, filepath: Path):
+        """Schedule a file to be written on commit."""
+        key = Path(filepath).resolve()
+        if key not in self._dirty:
+            self._dirty.append(key)
+
+    @property
+    def dirty_files(self) -> List[Path]:
+        return [self._paths[key] for key in self._dirty]
+
+    def commit(self) -> List[Path]:
+        """Write every file with pending edits, each exactly once."""
+        # Serialise everything first so a dump error leaves no file half-done
+        rendered: List[Tuple[Path, str]] = []
+        for key in self._dirty:
+            buffer = io.StringIO()
+            self.yaml.dump(self._docs[key], buffer)
+            rendered.append((self._paths[key], buffer.getvalue()))
+
+        for path, text in rendered:
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            if path.exists():
+                os.chmod(tmp, path.stat().st_mode & 0o777)
+            os.replace(tmp, path)
+
+        written = [path for path, _ in rendered]
+        self._dirty = []
+        return written
+
+    def rollback(self):
+        """Discard pending edits (documents are re-read on next access)."""
+        for key in self._dirty:
+            self._docs.pop(key, None)
+        self._dirty = []
+
+    # ------------------------------------------------------------------------
+    # Lookups (see pending edits)
+    # ------------------------------------------------------------------------
+
+    def _pending_structures(self):
+        """(path, index, struct) for every structure in files with pending edits."""
+        for key in self._dirty:
+            for i, struct in enumerate(self._docs[key].get('structures') or []):
+                yield self._paths[key], i, struct
+
+    def find_structure(self, struct_id: str) -> Optional[Tuple[Path, int]]:
+        """
+        Locate a structure as (file, index) across the structure files.
+
+        Files with pending edits are searched in memory; everything else is
+        looked up in the on-disk structure index without parsing.
+        """
+        for path, i, struct in self._pending_structures():
+            if struct.get('id') == struct_id:
+                return path, i
+
+        for loc in load_structure_index(self.structures_dir).locate_all(struct_id):
+            if loc.path.resolve() not in self._dirty:
+                return loc.path, loc.index
+        return None
+
+    def children_of(self, parent_id: str) -> List[str]:
+        """IDs of all structures whose parent is parent_id."""
+        dirty_names = {key.name for key in self._dirty}
+        onto = load_ontology(self.structures_dir.parent)
+        children = [
+            child for child in onto.children_of(parent_id)
+            if onto.structures[child].get('_source_file') not in dirty_names
+        ]
+        for _, _, struct in self._pending_structures():
+            if struct.get('parent') == parent_id:
+                children.append(struct.get('id'))
+        return children
+
+    # ------------------------------------------------------------------------
+    # Edits
+    # ------------------------------------------------------------------------
+
+    def add_structure(self, filepath: Path, new_struct: dict):
+        data = self.document(filepath)
+        if 'structures' not in data or data['structures'] is None:
+            data['structures'] = []
+        data['structures'].append(new_struct)
+        self.mark_dirty(filepath)
+
+    def remove_structure_by_index(self, filepath: Path, index: int) -> Optional[dict]:
+        data = self.document(filepath)
+        if 'structures' not in data or index >= len(data['structures']):
+            return None
+        removed = data['structures'].pop(index)
+        self.mark_dirty(filepath)
+        return dict(removed)  # Convert from ruamel type
+
+    def update_structure(self, filepath: Path, struct_id: str, changes: dict) -> bool:
+        for struct in self.document(filepath).get('structures') or []:
+            if struct.get('id') == struct_id:
+                struct.update(changes)
+                self.mark_dirty(filepath)
+                return True
+        return False
+
+    def update_structure_parent(self, filepath: Path, struct_id: str, new_parent_id: str) -> bool:
+        return self.update_structure(filepath, struct_id, {'parent': new_parent_id})
+
+    def deprecate_structure(self, filepath: Path, index: int, reason: str):
+        data = self.document(filepath)
+        if 'structures' in data and index < len(data['structures']):
+            data['structures'][index]['deprecated'] = True
+            data['structures'][index]['deprecated_date'] = datetime.now().strftime('%Y-%m-%d')
+            data['structures'][index]['deprecation_reason'] = reason
+            self.mark_dirty(filepath)
+
+    def add_relationship(self, filepath: Path, new_rel: dict):
+        data = self.document(filepath)
+        if 'relationships' not in data or data['relationships'] is None:
+            data['relationships'] = []
+        data['relationships'].append(new_rel)
+        self.mark_dirty(filepath)
+
+    def remove_relationships_by_structure(self, filepath: Path, structure_id: str) -> int:
+        data = self.document(filepath)
+        rels = data.get('relationships')
+        if not rels:
+            return 0
+
+        # Delete in place so comments on the remaining entries survive
+        doomed = [
+            i for i, rel in enumerate(rels)
+            if rel.get('subject') == structure_id or rel.get('object') == structure_id
+        ]
+        for i in reversed(doomed):
+            del rels[i]
+
+        if doomed:
+            self.mark_dirty(filepath)
+        return len(doomed)
+
+
+# ============================================================================
+# Single-edit Helpers
+# ============================================================================
+
 def add_structure(filepath: Path, new_struct: dict):
     """Add a structure to a YAML file, preserving formatting."""
-    data = load_yaml(filepath)
-    
-    if 'structures' not in data:
-        data['structures'] = []
-    
-    data['structures'].append(new_struct)
-    save_yaml(filepath, data)
+    with OntologyWriter() as writer:
+        writer.add_structure(filepath, new_struct)
 
 
 def remove_structure_by_index(filepath: Path, index: int) -> Optional[dict]:
     """Remove a structure by index, preserving formatting."""
-    data = load_yaml(filepath)
-    
-    if 'structures' not in data or index >= len(data['structures']):
-        return None
-    
-    removed = data['structures'].pop(index)
-    save_yaml(filepath, data)
-    return dict(removed)  # Convert from ruamel type
+    with OntologyWriter() as writer:
+        return writer.remove_structure_by_index(filepath, index)
 
 
 def update_structure_parent(filepath: Path, struct_id: str, new_parent_id: str):
     """Update the parent of a structure, preserving formatting."""
-    data = load_yaml(filepath)
-    
-    for struct in data.get('structures', []):
-        if struct.get('id') == struct_id:
-            struct['parent'] = new_parent_id
-            break
-    
-    save_yaml(filepath, data)
+    with OntologyWriter() as writer:
+        writer.update_structure_parent(filepath, struct_id, new_parent_id)
 
 
 def add_relationship(filepath: Path, new_rel: dict):
     """Add a relationship to a YAML file, preserving formatting."""
-    data = load_yaml(filepath)
-    
-    if 'relationships' not in data or data['relationships'] is None:
-        data['relationships'] = []
-    
-    data['relationships'].append(new_rel)
-    save_yaml(filepath, data)
+    with OntologyWriter() as writer:
+        writer.add_relationship(filepath, new_rel)
 
 
 def remove_relationships_by_structure(filepath: Path, structure_id: str) -> int:
     """Remove all relationships involving a structure. Returns count removed."""
-    data = load_yaml(filepath)
-    
-    if 'relationships' not in data or not data['relationships']:
-        return 0
-    
-    original_count = len(data['relationships'])
-    data['relationships'] = [
-        rel for rel in data['relationships']
-        if rel.get('subject') != structure_id and rel.get('object') != structure_id
-    ]
-    removed_count = original_count - len(data['relationships'])
-    
-    if removed_count > 0:
-        save_yaml(filepath, data)
-    
-    return removed_count
+    with OntologyWriter() as writer:
+        return writer.remove_relationships_by_structure(filepath, structure_id)
 
 
 def deprecate_structure(filepath: Path, index: int, reason: str):
     """Mark a structure as deprecated, preserving formatting."""
-    from datetime import datetime
-    
-    data = load_yaml(filepath)
-    
-    if 'structures' in data and index < len(data['structures']):
-        data['structures'][index]['deprecated'] = True
-        data['structures'][index]['deprecated_date'] = datetime.now().strftime('%Y-%m-%d')
-        data['structures'][index]['deprecation_reason'] = reason
-        save_yaml(filepath, data)
+    with OntologyWriter() as writer:
+        writer.deprecate_structure(filepath, index, reason)